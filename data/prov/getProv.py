@@ -44,7 +44,6 @@ ___
 """
 import os
 from prov.model import ProvDocument
-from prov.dot import prov_to_dot
 from unidecode import unidecode
 import datetime
 
@@ -108,7 +107,12 @@ def create_agents(d1):
 
 def generate_prov_document(nome_arquivo):
     """
-    Gera o documento PROV com todas as entidades, atividades e agentes envolvidos.
+    Gera o documento PROV com todas as entidades, atividades e agentes envolvidos
+    e o salva em PROV-JSON.
+
+    O grafo não é desenhado aqui: renderizar o documento inteiro com o Graphviz
+    é lento; gráficos de partes da linhagem ficam com ``render_subgraph`` do
+    armazenamento de proveniência (``src/provenance_store.py``).
     """
     d1 = ProvDocument()
     d1.add_namespace("ufrj", "https://www.ufrj.br")
@@ -180,16 +184,15 @@ def generate_prov_document(nome_arquivo):
     d1.wasAssociatedWith(activities["process_data"], agents["script"])
     d1.wasAssociatedWith(activities["visualization"], agents["developer"])
 
-    # Salvar gráfico PROV
-    img_dir = "assets/img"
-    os.makedirs(img_dir, exist_ok=True)
-    output_path = os.path.join(img_dir, f"{nome_arquivo}.jpg")
-    dot = prov_to_dot(d1)
-    dot.write_jpg(output_path)
+    # Salvar documento PROV
+    output_dir = "data/outputs"
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, f"{nome_arquivo}.json")
+    d1.serialize(output_path, indent=2)
 
     return output_path
 
 
 if __name__ == "__main__":
-    prov_image_path = generate_prov_document("analise_algodao")
-    print(f"Arquivo PROV gerado: {prov_image_path}")
+    prov_path = generate_prov_document("analise_algodao")
+    print(f"Arquivo PROV gerado: {prov_path}")
@@ -75,7 +75,7 @@ def generate_provenance():
 
 def save_provenance(prov_doc: ProvDocument, filename="data/outputs/provenance.json"):
     """
-    Salva o documento de proveniência no formato JSON, garantindo que o diretório exista.
+    Salva o documento de proveniência no formato JSON compacto, garantindo que o diretório exista.
     """
     # Resolver o caminho absoluto com base no diretório do projeto
     base_dir = os.path.abspath(
@@ -88,7 +88,7 @@ def save_provenance(prov_doc: ProvDocument, filename="data/outputs/provenance.js
 
     # Salvar o arquivo
     with open(full_path, "w") as file:
-        file.write(prov_doc.serialize(indent=2))
+        file.write(prov_doc.serialize())
 
 
 def generate_provenance_graph(
@@ -1,28 +1,47 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import PolynomialFeatures
 import numpy as np
-import streamlit as st
+
+from data_cleaning import (
+    COTTON_METRICS,
+    COVERAGE_COLUMN,
+    aggregate_weather_by_safra,
+    join_safra_climate,
+)
+from startup import lazy_import
+from validation import parse_locale_number
+
+linear_model = lazy_import("sklearn.linear_model")
+preprocessing = lazy_import("sklearn.preprocessing")
 
 
 def analyze_seasonal_trends(
-    cotton_data: pd.DataFrame, weather_data: pd.DataFrame
+    cotton_data: pd.DataFrame, weather_data: pd.DataFrame, metric=None
 ) -> pd.DataFrame:
     """
     Analisa tendências sazonais combinando dados de algodão e climáticos.
+
+    Com ``metric``, apenas essa métrica da Conab é levada para a tabela combinada.
     """
     try:
-        # Identificar colunas numéricas
-        numeric_cols = weather_data.select_dtypes(include=[float, int]).columns.tolist()
-
-        # Agrupar os dados climáticos por ano e estação, calculando a média
-        seasonal_weather = weather_data.groupby(["Ano", "Estacao"], as_index=False)[
-            numeric_cols
-        ].mean()
-
-        # Combinar dados de algodão com as tendências sazonais climáticas
-        combined_data = pd.merge(cotton_data, seasonal_weather, on="Ano", how="inner")
+        # Identificar colunas numéricas (exceto as chaves de calendário)
+        numeric_cols = [
+            col
+            for col in weather_data.select_dtypes(include=[float, int]).columns
+            if col not in ("Ano", "Mes", "Safra")
+        ]
+
+        # Agrupar os dados climáticos por safra e estação, calculando a média
+        seasonal_weather = weather_data.groupby(
+            ["Safra", "Estacao"], as_index=False, observed=True
+        )[numeric_cols].mean()
+
+        # Combinar dados de algodão com as tendências sazonais da mesma safra
+        cotton = cotton_data
+        if "Safra" not in cotton.columns:
+            cotton = cotton.assign(Safra=cotton["Ano"].astype(int))
+        if metric is not None:
+            cotton = cotton[["Região/UF", "Ano", "Safra", metric]]
+        combined_data = pd.merge(cotton, seasonal_weather, on="Safra", how="inner")
 
         print("Pré-visualização dos dados sazonais combinados:")
         print(combined_data.head())
@@ -32,13 +51,13 @@ def analyze_seasonal_trends(
         raise RuntimeError(f"Erro ao analisar tendências sazonais: {e}")
 
 
-def analyze_regional_potential(cotton_data, weather_data):
+def analyze_regional_potential(cotton_data, weather_data, metric="Area_Plantada"):
     """
     Analisa as melhores regiões para o plantio de algodão.
     """
     try:
         # Inspecionar e garantir que todas as colunas numéricas sejam numéricas
-        numeric_cols = ["Area_Plantada"]  # Atualize conforme necessário
+        numeric_cols = [metric]
         for col in numeric_cols:
             cotton_data[col] = pd.to_numeric(cotton_data[col], errors="coerce")
 
@@ -53,7 +72,7 @@ def analyze_regional_potential(cotton_data, weather_data):
         regional_data = (
             cotton_data.groupby("Região/UF")[numeric_cols]
             .mean()
-            .sort_values(by="Area_Plantada", ascending=False)
+            .sort_values(by=metric, ascending=False)
         )
 
         # Resetar o índice para facilitar a visualização
@@ -67,74 +86,109 @@ def analyze_regional_potential(cotton_data, weather_data):
         raise RuntimeError(f"Erro ao analisar potencial regional: {e}")
 
 
-def analyze_climatic_influences(cotton_data, weather_data):
-    # Garantir que 'Região/UF' exista em ambos os datasets
-    if "Região/UF" not in weather_data.columns:
-        # Exemplo de mapeamento; ajuste conforme necessário
-        station_to_region = {
-            "A001": "NORTE",
-            "A002": "NORDESTE",
-            # Outros mapeamentos
-        }
-        weather_data["Região/UF"] = weather_data["ESTACAO"].map(station_to_region)
+def analyze_climatic_influences(
+    cotton_data,
+    weather_data,
+    safra_climate=None,
+    metric="Area_Plantada",
+    safra_features=None,
+    safra_indices=None,
+):
+    """
+    Correlaciona a métrica (por padrão, a área plantada) com o clima da janela de
+    cultivo de cada safra e, se informados, com os atributos das estações
+    resumidos por safra (graus-dia, estresse térmico, chuva acumulada) e com os
+    índices de extremos climáticos das estações da UF.
+    """
+    if safra_climate is None:
+        # Garantir que 'Região/UF' exista em ambos os datasets
+        if "Região/UF" not in weather_data.columns:
+            # Exemplo de mapeamento; ajuste conforme necessário
+            station_to_region = {
+                "A001": "NORTE",
+                "A002": "NORDESTE",
+                # Outros mapeamentos
+            }
+            weather_data["Região/UF"] = weather_data["ESTACAO"].map(station_to_region)
 
-    # Certificar-se de que a coluna 'Ano' existe e está correta
-    if "Ano" not in weather_data.columns:
-        weather_data["Ano"] = pd.to_datetime(weather_data["DATA (YYYY-MM-DD)"]).dt.year
+        safra_climate = aggregate_weather_by_safra(weather_data)
+    if safra_features is not None:
+        safra_climate = safra_climate.join(safra_features, how="left")
+    if safra_indices is not None:
+        safra_climate = safra_climate.join(safra_indices, how="left")
 
-    # Realizar a mesclagem
-    combined_data = cotton_data.merge(
-        weather_data, on=["Ano", "Região/UF"], how="inner"
-    )
+    # Junção direta pela chave (UF, safra)
+    combined_data = join_safra_climate(cotton_data, safra_climate)
 
-    # Filtrar apenas colunas numéricas
-    numeric_data = combined_data.select_dtypes(include=["float64", "int64"])
+    # Filtrar apenas colunas numéricas (sem as demais métricas da Conab)
+    other_metrics = [col for col in COTTON_METRICS if col != metric]
+    numeric_data = combined_data.drop(
+        columns=["Safra"] + other_metrics, errors="ignore"
+    ).select_dtypes(include=["float64", "int64"])
 
-    # Calcular correlações
-    correlations = numeric_data.corr()["Area_Plantada"].sort_values(ascending=False)
+    # Calcular correlações (ponderadas pela cobertura das séries regularizadas)
+    if COVERAGE_COLUMN in numeric_data.columns:
+        weights = numeric_data.pop(COVERAGE_COLUMN)
+        correlations = weighted_correlations(numeric_data, metric, weights)
+    else:
+        correlations = numeric_data.corr()[metric]
 
-    return correlations
+    return correlations.sort_values(ascending=False)
 
 
-def analyze_historical_trends(cotton_data):
+def weighted_correlations(data: pd.DataFrame, target: str, weights: pd.Series):
+    """
+    Correlação de Pearson ponderada de cada coluna com a coluna alvo, usando
+    apenas os pares observados de cada coluna.
+    """
+    values = data.to_numpy(dtype=float)
+    y = data[target].to_numpy(dtype=float)[:, None]
+    w = np.where(np.isnan(values) | np.isnan(y), 0.0, weights.to_numpy()[:, None])
+    x, y = np.nan_to_num(values), np.nan_to_num(y)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        total = w.sum(axis=0)
+        mean_x = (w * x).sum(axis=0) / total
+        mean_y = (w * y).sum(axis=0) / total
+        cov = (w * (x - mean_x) * (y - mean_y)).sum(axis=0)
+        var_x = (w * (x - mean_x) ** 2).sum(axis=0)
+        var_y = (w * (y - mean_y) ** 2).sum(axis=0)
+        return pd.Series(cov / np.sqrt(var_x * var_y), index=data.columns)
+
+
+def analyze_historical_trends(cotton_data, metric="Area_Plantada"):
     # Garantir que o nome da coluna esteja correto
-    if "Area_Planted" not in cotton_data.columns:
-        cotton_data.rename(columns={"Area_Plantada": "Area_Planted"}, inplace=True)
-
-    # Agrupar por ano e somar a área plantada
-    historical_trends = cotton_data.groupby("Ano")["Area_Planted"].sum().reset_index()
-
-    # Criar visualização
-    plt.figure(figsize=(10, 6))
-    plt.plot(historical_trends["Ano"], historical_trends["Area_Planted"], marker="o")
-    plt.title("Tendências Históricas de Plantio de Algodão")
-    plt.xlabel("Ano")
-    plt.ylabel("Área Plantada (em mil hectares)")
-    plt.grid(True)
-    plt.tight_layout()
-    st.pyplot(plt)
-    plt.close()
+    if metric not in cotton_data.columns and "Area_Planted" in cotton_data.columns:
+        cotton_data = cotton_data.rename(columns={"Area_Planted": "Area_Plantada"})
+
+    # Agrupar por ano: somar quantidades (área, produção), média de produtividades
+    aggregate = COTTON_METRICS.get(metric, {}).get("aggregate", "sum")
+    historical_trends = cotton_data.groupby("Ano")[metric].agg(aggregate).reset_index()
 
+    # O gráfico fica em visualization.plot_historical_trends
     return historical_trends
 
 
-def predict_planted_area(cotton_data, years_to_consider=10, forecast_until=2030):
+def predict_planted_area(
+    cotton_data, years_to_consider=10, forecast_until=2030, metric="Area_Plantada"
+):
     try:
-        cotton_data = cotton_data.rename(columns={"Area_Plantada": "Area_Planted"})
         recent_years = sorted(cotton_data["Ano"].unique())[-years_to_consider:]
         filtered_data = cotton_data[cotton_data["Ano"].isin(recent_years)].copy()
 
         # Validar dados
-        if filtered_data.empty or filtered_data["Area_Planted"].isnull().all():
+        if filtered_data.empty or filtered_data[metric].isnull().all():
             raise ValueError("Dados insuficientes para previsão.")
 
         X = filtered_data["Ano"].values.reshape(-1, 1)
-        y = filtered_data["Area_Planted"].values
+        y = filtered_data[metric].values
 
         # Regressão polinomial
-        poly = PolynomialFeatures(degree=2)  # Ajuste o grau conforme necessário
+        poly = preprocessing.PolynomialFeatures(
+            degree=2
+        )  # Ajuste o grau conforme necessário
         X_poly = poly.fit_transform(X)
-        model = LinearRegression()
+        model = linear_model.LinearRegression()
         model.fit(X_poly, y)
 
         # Prever anos futuros
@@ -145,7 +199,7 @@ def predict_planted_area(cotton_data, years_to_consider=10, forecast_until=2030)
         predictions = pd.DataFrame(
             {
                 "Ano": future_years.flatten(),
-                "Area_Planted_Predicted": future_predictions,
+                f"{metric}_Predicted": future_predictions,
             }
         )
 
@@ -167,13 +221,8 @@ def preprocess_data(file_path: str) -> pd.DataFrame:
             id_vars=["REGIÃO/UF"], var_name="Ano", value_name="Area_Plantada"
         )
 
-        # Remover separadores de milhar e transformar decimais
-        data_long["Area_Plantada"] = (
-            data_long["Area_Plantada"]
-            .str.replace(",", ".", regex=False)
-            .str.replace(".", "", regex=False)
-            .astype(float)
-        )
+        # Remover separadores de milhar antes de transformar os decimais
+        data_long["Area_Plantada"] = parse_locale_number(data_long["Area_Plantada"])
 
         # Converter coluna 'Ano' para numérico
         data_long["Ano"] = pd.to_numeric(
@@ -0,0 +1,376 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from analysis import predict_planted_area
+from data_cleaning import COTTON_METRICS, select_cotton_metric
+from fingerprint import file_signature
+from pipeline import (
+    DASHBOARD_FILES,
+    DATA_DIR,
+    dashboard_aggregate,
+    filter_dashboard_data,
+    load_dashboard_data,
+)
+from ranking import N_RESAMPLES, bootstrap_rankings
+from startup import lazy_import
+
+pa = lazy_import("pyarrow")
+
+API_HOST = os.environ.get("ALGODAO_API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("ALGODAO_API_PORT", "8502"))
+
+# Intervalo (s) entre verificações dos arquivos brutos e respostas guardadas
+DATA_CHECK_INTERVAL = 2.0
+RESPONSE_CACHE_SIZE = 256
+
+# Linhas por lote do fluxo Arrow IPC
+ARROW_BATCH_ROWS = 65_536
+ARROW_TYPE = "application/vnd.apache.arrow.stream"
+
+# Tabelas do painel expostas em /tables/<nome>
+API_TABLES = (
+    "cotton_metrics",
+    "cotton_trends",
+    "weather_regular",
+    "safra_climate",
+    "safra_features",
+    "station_indices",
+    "safra_indices",
+)
+
+
+class ApiError(Exception):
+    """
+    Erro de requisição, respondido com o código HTTP informado.
+    """
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class DashboardState:
+    """
+    Dados do painel mantidos em memória e recarregados quando os arquivos
+    brutos mudam; as respostas já codificadas ficam em um cache LRU da versão
+    atual dos dados.
+    """
+
+    def __init__(self, data_dir: str = DATA_DIR):
+        self.data_dir = data_dir
+        self.lock = threading.Lock()
+        self.load_lock = threading.Lock()
+        self.data, self.signature, self.checked = None, None, 0.0
+        self.responses = OrderedDict()
+
+    def _signature(self) -> tuple:
+        return tuple(
+            file_signature(os.path.join(self.data_dir, name))
+            for name in DASHBOARD_FILES
+            if os.path.exists(os.path.join(self.data_dir, name))
+        )
+
+    def current(self) -> dict:
+        """
+        Dados do painel; a assinatura barata dos arquivos (tamanho e data) é
+        conferida no máximo a cada ``DATA_CHECK_INTERVAL`` segundos.
+
+        A recarga é feita fora de ``lock``: enquanto uma requisição carrega a
+        nova versão, as demais seguem respondendo com a anterior.
+        """
+        with self.lock:
+            now = time.monotonic()
+            if self.data is not None and now - self.checked <= DATA_CHECK_INTERVAL:
+                return self.data
+            self.checked = now
+            data, current_signature = self.data, self.signature
+
+        signature = self._signature()
+        if data is not None and signature == current_signature:
+            return data
+
+        # Só a primeira carga espera; depois, se outra requisição já está
+        # recarregando, responde com a versão anterior
+        if not self.load_lock.acquire(blocking=data is None):
+            return data
+        try:
+            with self.lock:
+                if self.data is not None and self.signature == signature:
+                    return self.data  # já recarregado por outra requisição
+            loaded = load_dashboard_data(self.data_dir)
+            with self.lock:
+                self.data, self.signature = loaded, signature
+                self.responses.clear()
+            return loaded
+        finally:
+            self.load_lock.release()
+
+    def cached(self, etag: str):
+        with self.lock:
+            if etag in self.responses:
+                self.responses.move_to_end(etag)
+                return self.responses[etag]
+            return None
+
+    def store(self, etag: str, response: tuple):
+        with self.lock:
+            self.responses[etag] = response
+            while len(self.responses) > RESPONSE_CACHE_SIZE:
+                self.responses.popitem(last=False)
+
+
+def _param(query: dict, name: str, default=None, cast=str):
+    values = query.get(name)
+    if not values or values[-1] == "":
+        return default
+    try:
+        return cast(values[-1])
+    except ValueError:
+        raise ApiError(400, f"Parâmetro inválido: {name}={values[-1]}")
+
+
+def _list_param(query: dict, name: str):
+    value = _param(query, name)
+    return [item for item in value.split(",") if item] if value else None
+
+
+def _range_param(query: dict, name: str):
+    value = _param(query, name)
+    if value is None:
+        return None
+    try:
+        first, _, last = value.partition("-")
+        return int(first), int(last or first)
+    except ValueError:
+        raise ApiError(400, f"Parâmetro inválido: {name}={value}")
+
+
+def _metric(query: dict) -> str:
+    metric = _param(query, "metric", "Area_Plantada")
+    if metric not in COTTON_METRICS:
+        raise ApiError(400, f"Métrica desconhecida: {metric}")
+    return metric
+
+
+def _view(data: dict, query: dict) -> dict:
+    """
+    Dados restritos aos filtros ``ufs``, ``stations`` e ``safras`` (ex.:
+    ``?ufs=MT,BA&safras=2010-2020``), como na barra lateral do painel.
+    """
+    return filter_dashboard_data(
+        data,
+        _list_param(query, "ufs"),
+        _list_param(query, "stations"),
+        _range_param(query, "safras"),
+    )
+
+
+def _aggregate(name: str):
+    def handler(data, query):
+        view, metric = _view(data, query), _metric(query)
+        cotton_data = select_cotton_metric(view["cotton_metrics"], metric)
+        return dashboard_aggregate(name, view, cotton_data, metric)
+
+    return handler
+
+
+def _forecast(data, query):
+    view, metric = _view(data, query), _metric(query)
+    cotton_data = select_cotton_metric(view["cotton_metrics"], metric)
+    historical = dashboard_aggregate("historical_trends", view, cotton_data, metric)
+    return predict_planted_area(
+        historical,
+        years_to_consider=_param(query, "years", 10, int),
+        forecast_until=_param(query, "until", 2030, int),
+        metric=metric,
+    )
+
+
+def _ranking(data, query):
+    view, metric = _view(data, query), _metric(query)
+    cotton_data = select_cotton_metric(view["cotton_metrics"], metric)
+    return bootstrap_rankings(
+        cotton_data,
+        metric,
+        window=_range_param(query, "window"),
+        n_resamples=_param(query, "resamples", N_RESAMPLES, int),
+    )["summary"]
+
+
+def _cotton_trends(data, query):
+    trends = _view(data, query)["cotton_trends"]
+    return trends.loc[[_metric(query)]] if "metric" in query else trends
+
+
+def _metrics(data, query):
+    return pd.DataFrame(
+        [{"metric": name, **info} for name, info in COTTON_METRICS.items()]
+    )
+
+
+def _table(name: str):
+    def handler(data, query):
+        table = _view(data, query)[name]
+        if table is None:
+            raise ApiError(404, f"Tabela indisponível: {name}")
+        return table
+
+    return handler
+
+
+# Rotas: caminho → função (dados do painel, parâmetros) → tabela
+ROUTES = {
+    "/metrics": _metrics,
+    "/seasonal-trends": _aggregate("seasonal_trends"),
+    "/regional-potential": _aggregate("regional_potential"),
+    "/climatic-influences": _aggregate("climatic_influences"),
+    "/historical-trends": _aggregate("historical_trends"),
+    "/forecast": _forecast,
+    "/ranking": _ranking,
+    "/cotton-trends": _cotton_trends,
+    **{f"/tables/{name}": _table(name) for name in API_TABLES},
+}
+
+
+def _as_frame(result) -> pd.DataFrame:
+    if isinstance(result, pd.Series):
+        result = result.to_frame(result.name or "valor")
+    if not isinstance(result.index, pd.RangeIndex):
+        result = result.reset_index()
+    return result
+
+
+def encode_json(result) -> bytes:
+    frame = _as_frame(result)
+    return frame.to_json(orient="records", date_format="iso", force_ascii=False).encode(
+        "utf-8"
+    )
+
+
+def encode_arrow(result) -> bytes:
+    """
+    Tabela no formato de fluxo Arrow IPC, em lotes de ``ARROW_BATCH_ROWS``
+    linhas (o cliente pode ler lote a lote).
+    """
+    table = pa.Table.from_pandas(_as_frame(result), preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=ARROW_BATCH_ROWS):
+            writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+def request_etag(version: str, path: str, query: str, arrow: bool) -> str:
+    """
+    ETag de uma consulta: versão dos dados (``key`` de ``load_dashboard_data``,
+    hash do conteúdo dos arquivos e do código, igual entre reinícios e
+    réplicas), rota, parâmetros e formato.
+    """
+    request_key = json.dumps([version, path, sorted(query.split("&")), arrow])
+    return f'"{hashlib.sha1(request_key.encode("utf-8")).hexdigest()}"'
+
+
+def make_handler(state: DashboardState):
+    class ApiHandler(BaseHTTPRequestHandler):
+        """
+        GET em uma rota de ``ROUTES``: JSON (padrão) ou Arrow IPC
+        (``?format=arrow`` ou ``Accept: application/vnd.apache.arrow.stream``),
+        com ETag da versão dos dados e da consulta.
+        """
+
+        def _send(self, status, body=b"", content_type=None, etag=None):
+            self.send_response(status)
+            if content_type:
+                self.send_header("Content-Type", content_type)
+            if etag:
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", "no-cache")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(body)
+
+        def _error(self, status, message):
+            body = json.dumps({"erro": message}, ensure_ascii=False).encode("utf-8")
+            self._send(status, body, "application/json; charset=utf-8")
+
+        def do_GET(self):
+            try:
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                path = url.path.rstrip("/") or "/"
+                data = state.current()
+                if path in ("/", "/health"):
+                    body = json.dumps(
+                        {
+                            "status": "ok",
+                            "data_version": data["key"],
+                            "routes": list(ROUTES),
+                        }
+                    ).encode("utf-8")
+                    return self._send(200, body, "application/json; charset=utf-8")
+                if path not in ROUTES:
+                    raise ApiError(404, f"Rota desconhecida: {path}")
+
+                arrow = _param(query, "format") == "arrow" or ARROW_TYPE in (
+                    self.headers.get("Accept") or ""
+                )
+                # A ETag depende apenas da versão dos dados e da consulta: uma
+                # revalidação é respondida sem calcular nem ler a resposta
+                etag = request_etag(data["key"], path, url.query, arrow)
+                if etag in (self.headers.get("If-None-Match") or ""):
+                    return self._send(304, etag=etag)
+
+                response = state.cached(etag)
+                if response is None:
+                    result = ROUTES[path](data, query)
+                    response = (
+                        (encode_arrow(result), ARROW_TYPE)
+                        if arrow
+                        else (encode_json(result), "application/json; charset=utf-8")
+                    )
+                    state.store(etag, response)
+                self._send(200, response[0], response[1], etag)
+            except ApiError as e:
+                self._error(e.status, str(e))
+            except Exception as e:
+                self._error(500, f"Erro ao processar a requisição: {e}")
+
+        do_HEAD = do_GET
+
+        def log_message(self, format, *args):
+            pass
+
+    return ApiHandler
+
+
+def serve(host: str = API_HOST, port: int = API_PORT, data_dir: str = DATA_DIR):
+    """
+    Sobe a API HTTP local com os resultados das análises, reaproveitando os
+    dados e o cache compartilhado do painel (não depende do Streamlit rodando).
+    """
+    state = DashboardState(data_dir)
+    state.current()
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    print(f"API disponível em http://{host}:{port} ({len(ROUTES)} rotas)")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API local das análises do algodão")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    args = parser.parse_args()
+    serve(args.host, args.port)
@@ -1,21 +1,52 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import os
-from data_cleaning import load_cotton_data, load_weather_data
-from analysis import (
-    analyze_seasonal_trends,
-    analyze_regional_potential,
-    analyze_climatic_influences,
-    analyze_historical_trends,
-    predict_planted_area,
+import time
+
+# Início da execução do script (para o tempo até o primeiro gráfico)
+SCRIPT_START = time.perf_counter()
+
+from data_cleaning import (
+    COTTON_METRICS,
+    COVERAGE_COLUMN,
+    metric_label,
+    select_cotton_metric,
+)
+from data_grid import show_data_grid
+from interpolation import interpolate_surface
+from pipeline import dashboard_aggregate, filter_dashboard_data, load_dashboard_data
+from startup import LAZY_IMPORT_TIMES, import_profile
+from analysis import predict_planted_area
+from ranking import BLOCK_SIZE, N_RESAMPLES, RANKING_WINDOW, bootstrap_rankings
+from sketches import sketch_quantiles
+from trends import trend_segments
+from modeling import (
+    CLIMATE_VARS,
+    build_feature_table,
+    train_yield_model,
+    predict_with_model,
+)
+from scenarios import (
+    fit_climate_response,
+    build_scenario_grid,
+    simulate_scenarios,
+    scenario_cube_to_frame,
 )
 from visualization import (
+    CHART_BACKENDS,
+    CLIMATE_LABELS,
     plot_seasonal_trends,
+    climate_heat_points,
     plot_regional_map,
     plot_climatic_influence,
     plot_historical_trends,
     plot_correlation_heatmap,
     plot_historical_trends_with_prediction,
+    plot_trend_slopes,
+    plot_change_points,
+    plot_rank_stability,
+    plot_percentile_bands,
 )
 
 # Diretório base ajustado
@@ -24,6 +55,58 @@ DATA_DIR = os.path.join(BASE_DIR, "data", "raw")
 GEO_DIR = os.path.join(BASE_DIR, "data", "geo")
 
 
+@st.cache_data(show_spinner="Carregando dados...")
+def load_datasets(data_dir):
+    """
+    Carrega os dados pelo pipeline (reaproveitando as etapas já registradas na
+    proveniência), regulariza as séries das estações e pré-calcula o clima por
+    (UF, safra). O resultado vem do cache compartilhado entre as réplicas.
+    """
+    return load_dashboard_data(data_dir)
+
+
+@st.cache_data(show_spinner="Aplicando filtros...")
+def load_view(data_key, ufs, stations, safras, _data):
+    """
+    Dados do painel restritos aos filtros da barra lateral (cache por filtro).
+    """
+    return filter_dashboard_data(_data, ufs, stations, safras)
+
+
+@st.cache_data(show_spinner=False)
+def load_aggregate(name, data_key, metric, _data, _cotton_data):
+    """
+    Agregado do painel por métrica (cache do processo sobre o cache compartilhado).
+    """
+    return dashboard_aggregate(name, _data, _cotton_data, metric)
+
+
+@st.cache_data(show_spinner="Reamostrando o ranking...")
+def load_rankings(data_key, metric, window, n_resamples, _cotton_data):
+    """
+    Ranking das UFs e sua estabilidade na janela de safras (cache por janela).
+    """
+    return bootstrap_rankings(
+        _cotton_data, metric, window=window, n_resamples=n_resamples
+    )
+
+
+@st.cache_data(show_spinner="Montando atributos do modelo...")
+def load_feature_table(
+    data_key, metric, _cotton_data, _weather_data, _safra_climate, _safra_features
+):
+    """
+    Tabela de atributos do modelo climático (cache por dados e métrica).
+    """
+    return build_feature_table(
+        _cotton_data,
+        _weather_data,
+        target=metric,
+        safra_features=_safra_features,
+        safra_climate=_safra_climate,
+    )
+
+
 # Configuração inicial da página
 st.set_page_config(page_title="Análise de Algodão no Brasil", layout="wide")
 
@@ -39,25 +122,91 @@ st.markdown(
 # Carregar dados
 st.sidebar.header("Carregar Dados")
 try:
-    cotton_data_path = os.path.join(DATA_DIR, "AlgodoSerieHist.xlsx")
-    weather_data_path = os.path.join(DATA_DIR, "weather_sum_all.csv")
-
-    cotton_data = load_cotton_data(cotton_data_path)
-    weather_data = load_weather_data(weather_data_path)
-
+    dashboard = load_datasets(DATA_DIR)
     st.sidebar.success("Dados carregados com sucesso!")
 except Exception as e:
     st.sidebar.error(f"Erro ao carregar dados: {e}")
     st.stop()
 
-# Sidebar para exibir dados brutos
+# Filtros de período, UF e estação, aplicados na camada de dados (só os blocos
+# e partições correspondentes são lidos)
+st.sidebar.header("Filtros")
+safra_range = (
+    int(dashboard["cotton_metrics"]["Safra"].min()),
+    int(dashboard["cotton_metrics"]["Safra"].max()),
+)
+safras = st.sidebar.slider(
+    "Safras:", min_value=safra_range[0], max_value=safra_range[1], value=safra_range
+)
+ufs = st.sidebar.multiselect(
+    "UFs:", sorted(dashboard["cotton_metrics"]["Região/UF"].astype(str).unique())
+)
+station_options = dashboard["partitions"]["weather_data"].index.astype(str).tolist()
+if ufs and dashboard["stations"] is not None:
+    in_ufs = dashboard["stations"]["Região/UF"].isin(ufs)
+    in_ufs = set(dashboard["stations"].index[in_ufs].astype(str))
+    station_options = [station for station in station_options if station in in_ufs]
+selected_stations = st.sidebar.multiselect("Estações:", station_options)
+
+try:
+    dashboard = load_view(
+        dashboard["key"],
+        tuple(ufs),
+        tuple(selected_stations),
+        None if tuple(safras) == safra_range else tuple(safras),
+        dashboard,
+    )
+    cotton_metrics, weather_data, weather_regular, safra_climate, stations = (
+        dashboard[name]
+        for name in (
+            "cotton_metrics",
+            "weather_data",
+            "weather_regular",
+            "safra_climate",
+            "stations",
+        )
+    )
+except Exception as e:
+    st.sidebar.error(f"Erro ao aplicar os filtros: {e}")
+    st.stop()
+
+# Métrica da Conab analisada em todas as abas (área, produção ou produtividade)
+metric = st.sidebar.selectbox(
+    "Métrica de algodão:",
+    options=list(COTTON_METRICS),
+    format_func=metric_label,
+)
+cotton_data = select_cotton_metric(cotton_metrics, metric)
+chart_key = (dashboard["key"], metric)
+
+# Gráficos interativos (Plotly) ou imagens estáticas (matplotlib)
+backend = st.sidebar.radio(
+    "Gráficos:",
+    options=CHART_BACKENDS,
+    format_func=lambda name: {
+        "plotly": "Interativos (Plotly)",
+        "matplotlib": "Estáticos (matplotlib)",
+    }[name],
+)
+
+# Relatórios de validação gerados na carga (violações contabilizadas, não descartadas em silêncio)
+with st.sidebar.expander("Relatório de validação dos dados"):
+    for label, data in (("Algodão", cotton_data), ("Meteorológicos", weather_data)):
+        report = pd.DataFrame(data.attrs.get("validation", []))
+        if report.empty:
+            st.write(f"{label}: nenhuma violação encontrada.")
+        else:
+            st.write(f"{label}:")
+            st.dataframe(report.drop(columns="Exemplos"))
+
+# Sidebar para exibir dados brutos (paginados no servidor)
 if st.sidebar.checkbox("Exibir dados brutos de algodão"):
     st.subheader("Dados Brutos de Algodão")
-    st.write(cotton_data.head(20))
+    show_data_grid(cotton_data, key="raw_cotton")
 
 if st.sidebar.checkbox("Exibir dados meteorológicos brutos"):
     st.subheader("Dados Brutos Meteorológicos")
-    st.write(weather_data.head(20))
+    show_data_grid(weather_data, key="raw_weather")
 
 # Tabs principais
 tabs = st.tabs(
@@ -66,8 +215,11 @@ tabs = st.tabs(
         "Melhores Regiões",
         "Influência Climática",
         "Tendências Históricas",
+        "Tendências por UF",
         "Correlação de Variáveis",
         "Previsão de Area Plantada",
+        "Modelo Climático",
+        "Simulador de Cenários",
         "Conclusões",
     ]
 )
@@ -76,27 +228,127 @@ tabs = st.tabs(
 with tabs[0]:
     st.header("Tendências Sazonais")
     try:
-        seasonal_trends = analyze_seasonal_trends(cotton_data, weather_data)
+        # Médias sobre as séries regularizadas (lacunas preenchidas), para que
+        # estações sem meses de verão não distorçam as médias sazonais
+        seasonal_trends = load_aggregate(
+            "seasonal_trends", dashboard["key"], metric, dashboard, cotton_data
+        )
+        st.caption(
+            f"Cobertura média das séries das estações: "
+            f"{weather_regular[COVERAGE_COLUMN].mean():.0%} "
+            f"(o restante foi preenchido por interpolação, estações vizinhas "
+            f"ou climatologia)."
+        )
         st.subheader("Gráfico")
-        plot_seasonal_trends(seasonal_trends)
+        plot_seasonal_trends(seasonal_trends, backend, chart_key)
+        first_paint = time.perf_counter() - SCRIPT_START
         st.subheader("Dados de Tendências Sazonais")
-        st.write(seasonal_trends)
+        show_data_grid(seasonal_trends, key="seasonal_trends")
+
+        # Percentis por mês, mesclando os resumos de quantis das estações
+        sketches = dashboard["weather_sketches"]
+        if sketches is not None and not sketches.empty:
+            st.subheader("Distribuição Mensal (percentis)")
+            band_var = st.selectbox(
+                "Variável:",
+                list(sketches["Variavel"].cat.categories),
+                format_func=lambda var: CLIMATE_LABELS.get(var, var),
+            )
+            band_ufs = (
+                sorted(sketches["Região/UF"].dropna().unique())
+                if "Região/UF" in sketches.columns
+                else []
+            )
+            band_uf = st.selectbox("UF:", ["Todas", *band_ufs])
+            selected = (
+                sketches
+                if band_uf == "Todas"
+                else sketches[sketches["Região/UF"] == band_uf]
+            )
+            bands = sketch_quantiles(selected, by=("Mes",), variables=[band_var])
+            bands = bands.droplevel("Variavel")
+            plot_percentile_bands(
+                bands, band_var, backend, (*chart_key, "bands", band_var, band_uf)
+            )
     except Exception as e:
         st.error(f"Erro ao analisar tendências sazonais: {e}")
+        first_paint = None
+
+# Perfil de inicialização: bibliotecas pesadas são importadas sob demanda
+with st.sidebar.expander("Perfil de inicialização"):
+    if first_paint is not None:
+        st.write(f"Tempo até o primeiro gráfico: {first_paint:.2f} s")
+    if LAZY_IMPORT_TIMES:
+        st.write("Importações sob demanda nesta sessão:")
+        st.dataframe(
+            pd.Series(LAZY_IMPORT_TIMES, name="Tempo (s)").sort_values(ascending=False)
+        )
+    if st.button("Medir importação dos módulos"):
+        st.dataframe(import_profile())
 
 # Aba: Melhores Regiões
 with tabs[1]:
     st.header("Melhores Regiões para Plantio")
     try:
-        regional_potential = analyze_regional_potential(cotton_data, weather_data)
+        regional_potential = load_aggregate(
+            "regional_potential", dashboard["key"], metric, dashboard, cotton_data
+        )
         st.subheader("Mapa")
 
+        # Camada de calor: média de toda a série de cada estação interpolada
+        heat_points, heat_name = None, None
+        if stations is not None and "LATITUDE" in stations.columns:
+            heat_var = st.selectbox(
+                "Variável climática da camada de calor",
+                [var for var in CLIMATE_VARS if var in weather_regular.columns],
+                index=1,
+            )
+            period = f"{weather_regular['Ano'].min()}-{weather_regular['Ano'].max()}"
+            surface = interpolate_surface(
+                weather_regular.groupby("ESTACAO", observed=True)[heat_var].mean(),
+                stations,
+                heat_var,
+                period,
+            )
+            heat_points = climate_heat_points(surface, heat_var)
+            heat_name = f"{heat_var} ({period})"
+
         # Adicione o caminho correto para o shapefile
         shapefile_path = "./data/geo/br_states.json"
-        plot_regional_map(regional_potential, shapefile_path)
+        plot_regional_map(
+            regional_potential, shapefile_path, heat_points, heat_name, metric
+        )
 
         st.subheader("Detalhes por Região")
         st.write(regional_potential)
+
+        # Ranking na janela escolhida, com nível e tendência, e sua estabilidade
+        # por bootstrap em blocos de safras
+        st.subheader("Estabilidade do Ranking")
+        first_safra = int(cotton_data["Ano"].min())
+        last_safra = int(cotton_data["Ano"].max())
+        window = st.slider(
+            "Janela de safras do ranking:",
+            first_safra,
+            last_safra,
+            (max(first_safra, last_safra - RANKING_WINDOW + 1), last_safra),
+        )
+        n_resamples = st.select_slider(
+            "Reamostragens:", options=[500, 1000, 2000, 5000], value=N_RESAMPLES
+        )
+        rankings = load_rankings(
+            dashboard["key"], metric, window, n_resamples, cotton_data
+        )
+        st.caption(
+            f"Escore: média de {window[0]}–{window[1]} mais a tendência projetada "
+            f"até a última safra. {rankings['n_resamples']} reamostragens em blocos "
+            f"de {BLOCK_SIZE} safras ({rankings['seconds']:.2f} s)."
+        )
+        top = rankings["summary"].head(15)
+        # A figura depende da janela e das reamostragens que geraram o resumo
+        ranking_key = (*chart_key, "ranking", *window, n_resamples, BLOCK_SIZE)
+        plot_rank_stability(top, metric, backend, ranking_key)
+        st.write(rankings["summary"])
     except Exception as e:
         st.error(f"Erro ao analisar regiões: {e}")
 
@@ -104,9 +356,11 @@ with tabs[1]:
 with tabs[2]:
     st.header("Influência Climática")
     try:
-        climatic_influences = analyze_climatic_influences(cotton_data, weather_data)
+        climatic_influences = load_aggregate(
+            "climatic_influences", dashboard["key"], metric, dashboard, cotton_data
+        )
         st.subheader("Gráfico")
-        plot_climatic_influence(climatic_influences)
+        plot_climatic_influence(climatic_influences, metric)
         st.subheader("Detalhes da Influência Climática")
         st.write(climatic_influences)
     except Exception as e:
@@ -116,26 +370,71 @@ with tabs[2]:
 with tabs[3]:
     st.header("Tendências Históricas")
     try:
-        historical_trends = analyze_historical_trends(cotton_data)
+        historical_trends = load_aggregate(
+            "historical_trends", dashboard["key"], metric, dashboard, cotton_data
+        )
         st.subheader("Gráfico de Tendências Históricas")
-        plot_historical_trends(historical_trends)
+        plot_historical_trends(historical_trends, metric, backend, chart_key)
         st.subheader("Dados Históricos")
         st.write(historical_trends)
     except Exception as e:
         st.error(f"Erro ao analisar tendências históricas: {e}")
 
-# Aba: Correlação de Variáveis
+# Aba: Tendências por UF (Mann-Kendall, inclinação de Sen e quebras estruturais)
 with tabs[4]:
+    st.header("Tendências e Quebras Estruturais por UF")
+    try:
+        trends = dashboard["cotton_trends"].loc[metric].reset_index()
+        st.caption(
+            "Tendência monotônica pelo teste de Mann-Kendall (p < 0,05) com a "
+            "inclinação de Sen; quebras estruturais são mudanças de nível ou de "
+            "variabilidade da série (até três por UF)."
+        )
+        plot_trend_slopes(trends, metric, backend, (*chart_key, "slopes"))
+
+        # UFs com as maiores mudanças de nível por padrão
+        ranked = trends.dropna(subset=["Mudança de nível"])
+        ranked = ranked.reindex(
+            ranked["Mudança de nível"].abs().sort_values(ascending=False).index
+        )
+        selected_ufs = st.multiselect(
+            "UFs para comparar:",
+            trends["Região/UF"].tolist(),
+            default=[uf for uf in ranked["Região/UF"] if len(uf) == 2][:4],
+        )
+        if selected_ufs:
+            segments = trend_segments(
+                cotton_data, dashboard["cotton_trends"], metric, selected_ufs
+            )
+            plot_change_points(
+                segments, metric, backend, (*chart_key, "breaks", *selected_ufs)
+            )
+
+        st.subheader("Resultados por UF")
+        st.dataframe(
+            trends.assign(
+                Quebras=trends["Quebras"].map(lambda b: ", ".join(map(str, b)))
+            )
+            .drop(columns=["S"])
+            .sort_values("Sen")
+        )
+    except Exception as e:
+        st.error(f"Erro ao analisar tendências por UF: {e}")
+
+# Aba: Correlação de Variáveis
+with tabs[5]:
     st.header("Mapa de Correlação")
     try:
         st.subheader("Mapa de Calor")
-        plot_correlation_heatmap(cotton_data, weather_data)
+        plot_correlation_heatmap(
+            cotton_data, weather_data, safra_climate, metric, backend, chart_key
+        )
     except Exception as e:
         st.error(f"Erro ao gerar mapa de correlação: {e}")
 
 
 # Aba: Previsão
-with tabs[5]:
+with tabs[6]:
     st.header("Previsão da Área Plantada")
 
     try:
@@ -144,7 +443,7 @@ with tabs[5]:
             "Anos para considerar na previsão:",
             min_value=2,
             max_value=len(cotton_data["Ano"].unique()),
-            value=10,
+            value=min(10, len(cotton_data["Ano"].unique())),
             step=1,
         )
         # Análise de tendências históricas
@@ -156,10 +455,10 @@ with tabs[5]:
             historical_trends["Ano"] = pd.to_numeric(
                 historical_trends["Ano"], errors="coerce"
             )
-            historical_trends["Area_Planted"] = pd.to_numeric(
-                historical_trends["Area_Planted"], errors="coerce"
+            historical_trends[metric] = pd.to_numeric(
+                historical_trends[metric], errors="coerce"
             )
-            historical_trends = historical_trends.dropna(subset=["Ano", "Area_Planted"])
+            historical_trends = historical_trends.dropna(subset=["Ano", metric])
 
             # Filtrar os anos recentes
             recent_years = sorted(historical_trends["Ano"].unique())[
@@ -180,7 +479,9 @@ with tabs[5]:
                 try:
                     # Previsão com dados filtrados
                     predicted_areas = predict_planted_area(
-                        filtered_historical_trends, years_to_consider=years_to_consider
+                        filtered_historical_trends,
+                        years_to_consider=years_to_consider,
+                        metric=metric,
                     )
 
                     if predicted_areas.empty:
@@ -188,12 +489,16 @@ with tabs[5]:
                             "Não foi possível gerar previsões para a área plantada."
                         )
                     else:
-                        st.write("Previsão de Área Plantada (ha):")
+                        st.write(f"Previsão de {metric_label(metric)}:")
                         st.write(predicted_areas)
 
                         # Gráfico com histórico e previsão
                         plot_historical_trends_with_prediction(
-                            filtered_historical_trends, predicted_areas
+                            filtered_historical_trends,
+                            predicted_areas,
+                            metric,
+                            backend,
+                            (*chart_key, years_to_consider),
                         )
 
                         st.success("Análise e previsão concluídas com sucesso!")
@@ -204,8 +509,123 @@ with tabs[5]:
         st.error(f"Erro ao analisar tendências históricas com previsão: {e}")
 
 
+# Aba: Modelo Climático
+with tabs[7]:
+    st.header("Modelo Climático de Área Plantada")
+    try:
+        model_name = st.selectbox(
+            "Modelo:",
+            options=["gbr", "ridge"],
+            format_func=lambda name: {
+                "gbr": "Gradient Boosting",
+                "ridge": "Regressão Ridge",
+            }[name],
+        )
+        # Clima nas janelas de cultivo de cada UF e atributos das estações
+        # (graus-dia, estresse térmico, chuva acumulada) lidos do armazenamento,
+        # sem recalcular a partir das séries diárias
+        features = load_feature_table(
+            dashboard["key"],
+            metric,
+            cotton_data,
+            weather_data,
+            safra_climate,
+            dashboard["safra_features"],
+        )
+
+        # O modelo é carregado do disco quando já foi treinado com os mesmos dados
+        with st.spinner("Carregando modelo..."):
+            bundle = train_yield_model(features, target=metric, model_name=model_name)
+
+        st.subheader("Validação Cruzada Temporal")
+        st.write(bundle["cv_scores"])
+        st.caption(
+            f"Modelo `{bundle['key']}` treinado em {bundle['train_seconds']:.2f} s."
+        )
+
+        st.subheader("Previsões do Modelo")
+        st.write(predict_with_model(bundle, features))
+    except Exception as e:
+        st.error(f"Erro ao carregar modelo climático: {e}")
+
+
+# Aba: Simulador de Cenários
+with tabs[8]:
+    st.header("Simulador de Cenários Climáticos")
+    try:
+        if safra_climate is None:
+            st.warning(
+                "Cadastro de estações ausente: clima por (UF, safra) indisponível."
+            )
+        else:
+            response = fit_climate_response(cotton_data, safra_climate, target=metric)
+
+            scenario_ufs = st.multiselect(
+                "UFs afetadas:",
+                options=response["ufs"],
+                default=[uf for uf in ("MT", "BA") if uf in response["ufs"]],
+            )
+            temp_range = st.slider(
+                "Variação da temperatura (°C):", -3.0, 3.0, (0.0, 2.0), step=0.5
+            )
+            rain_range = st.slider("Variação da chuva (%):", -50, 50, (-20, 0), step=5)
+            steps = st.number_input(
+                "Valores por variável:", min_value=1, max_value=100, value=10
+            )
+
+            if not scenario_ufs:
+                st.info("Selecione ao menos uma UF afetada para simular os cenários.")
+            else:
+                grid = build_scenario_grid(
+                    scenario_ufs,
+                    temp_deltas=np.linspace(*temp_range, steps),
+                    rain_factors=1 + np.linspace(*rain_range, steps) / 100,
+                )
+                start = time.perf_counter()
+                cube = simulate_scenarios(response, grid)
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                st.caption(
+                    f"{len(cube['scenarios'])} cenários × {len(cube['ufs'])} UFs × "
+                    f"{len(cube['safras'])} safras avaliados em {elapsed_ms:.1f} ms."
+                )
+
+                # Variação média da área (soma das UFs afetadas, média das safras)
+                affected = [cube["ufs"].index(uf) for uf in scenario_ufs]
+                change = cube["values"][:, affected] - cube["baseline"][affected]
+                summary = cube["scenarios"].assign(
+                    Variacao_Area=np.nanmean(change.sum(axis=1), axis=1)
+                )
+                st.subheader(f"Variação Média: {metric_label(metric)}")
+                st.write(
+                    summary.pivot(
+                        index="temp_delta",
+                        columns="rain_factor",
+                        values="Variacao_Area",
+                    )
+                )
+
+                scenario_id = st.selectbox(
+                    "Cenário para detalhar:",
+                    options=summary.index,
+                    format_func=lambda i: (
+                        f"{summary.loc[i, 'temp_delta']:+.1f} °C, "
+                        f"chuva {summary.loc[i, 'rain_factor'] - 1:+.0%}"
+                    ),
+                )
+                detail = scenario_cube_to_frame(cube, [scenario_id])
+                detail = detail[detail["Região/UF"].isin(scenario_ufs)]
+                st.line_chart(
+                    detail.pivot(
+                        index="Safra", columns="Região/UF", values="Area_Prevista"
+                    )
+                )
+                st.write(detail)
+    except Exception as e:
+        st.error(f"Erro ao simular cenários: {e}")
+
+
 # Aba: Conclusões
-with tabs[6]:
+with tabs[9]:
     st.header("Conclusões e Insights")
     st.markdown(
         """
@@ -0,0 +1,239 @@
+import numpy as np
+import pandas as pd
+from joblib import Parallel, cpu_count, delayed
+
+from data_cleaning import assign_safra_windows
+from features import HEAT_STRESS_TEMP
+
+# Limiares dos índices (mm e °C)
+WET_DAY_MM = 1.0
+HEAVY_RAIN_MM = (10.0, 20.0)
+TROPICAL_NIGHT_TEMP = 20.0
+
+# Fração mínima de dias observados no período para o índice ser calculado
+MIN_COVERAGE = 0.8
+
+# Linhas por bloco de estações processado em paralelo
+ROWS_PER_CHUNK = 1_000_000
+
+# Índices de extremos no padrão ETCCDI (SU35 adapta o SU25 ao algodão)
+CLIMATE_INDICES = {
+    "PRCPTOT": "Chuva total em dias úmidos (mm)",
+    "SDII": "Intensidade diária da chuva (mm/dia úmido)",
+    "R10mm": "Dias com chuva ≥ 10 mm",
+    "R20mm": "Dias com chuva ≥ 20 mm",
+    "Rx1day": "Maior chuva em 1 dia (mm)",
+    "Rx5day": "Maior chuva em 5 dias (mm)",
+    "CDD": "Maior sequência de dias secos",
+    "CWD": "Maior sequência de dias úmidos",
+    "TXx": "Maior temperatura máxima (°C)",
+    "TNn": "Menor temperatura mínima (°C)",
+    "SU35": "Dias com máxima acima de 35 °C",
+    "TR20": "Noites tropicais (mínima acima de 20 °C)",
+    "DTR": "Amplitude térmica diária média (°C)",
+}
+RAIN_INDICES = ("PRCPTOT", "SDII", "R10mm", "R20mm", "Rx1day", "Rx5day", "CDD", "CWD")
+
+
+def _longest_runs(condition, continues, group, n_groups) -> np.ndarray:
+    """
+    Maior sequência de dias consecutivos que satisfazem a condição em cada
+    grupo. ``continues`` indica se a linha é o dia seguinte da anterior no
+    mesmo grupo; as sequências são medidas com somas acumuladas, sem laços.
+    """
+    previous = np.concatenate([[False], condition[:-1]])
+    starts = condition & ~(previous & continues)
+    run_id = np.cumsum(starts) - 1
+    lengths = np.bincount(run_id[condition], minlength=int(starts.sum()))
+    longest = np.zeros(n_groups)
+    np.maximum.at(longest, group[starts], lengths)
+    return longest
+
+
+def _window_sums(values, continues, days: int) -> np.ndarray:
+    """
+    Soma móvel de ``days`` dias consecutivos terminando em cada linha (NaN se a
+    janela não está completa ou tem ausentes).
+    """
+    prefix = np.concatenate([[0.0], np.cumsum(np.nan_to_num(values))])
+    missing = np.concatenate([[0], np.cumsum(np.isnan(values))])
+    chained = np.concatenate([[0], np.cumsum(~continues)])
+    row = np.arange(len(values))
+    left = np.maximum(row - days + 1, 0)
+    complete = (row - left + 1 == days) & (chained[row + 1] - chained[left + 1] == 0)
+    complete &= missing[row + 1] - missing[left] == 0
+    return np.where(complete, prefix[row + 1] - prefix[left], np.nan)
+
+
+def _chunk_indices(data: pd.DataFrame, period: str, windows) -> pd.DataFrame:
+    """
+    Índices de um bloco de estações (linhas ordenadas por estação e data).
+    """
+    dates = data["DATA"].to_numpy().astype("datetime64[D]")
+    if period == "year":
+        key = data["Ano"].to_numpy(dtype=np.int64)
+        inside = np.ones(len(data), dtype=bool)
+        first_month, last_month = np.zeros(len(data)), np.full(len(data), 11)
+    else:
+        key, inside, first_month, last_month = assign_safra_windows(data, windows)
+
+    stations = data["ESTACAO"].to_numpy()
+    codes, station_index = pd.factorize(stations)
+    combined = codes.astype(np.int64) * 10_000 + key
+    keys, group = np.unique(np.where(inside, combined, -1), return_inverse=True)
+    if keys[0] == -1:
+        keys, group = keys[1:], group - 1
+    n_groups = len(keys)
+    rows = group >= 0
+
+    dates, group = dates[rows], group[rows]
+    first_month, last_month = first_month[rows], last_month[rows]
+    rain = data["rain_max"].to_numpy(dtype=float)[rows]
+    temp_max = data["temp_max"].to_numpy(dtype=float)[rows]
+    temp_min = data["temp_min"].to_numpy(dtype=float)[rows]
+
+    continues = np.concatenate(
+        [[False], (group[1:] == group[:-1]) & (np.diff(dates).astype(np.int64) == 1)]
+    )
+    wet = rain >= WET_DAY_MM
+    dry = rain < WET_DAY_MM  # ausentes não contam como secos nem úmidos
+
+    def count(mask):
+        return np.bincount(group, weights=mask, minlength=n_groups)
+
+    def total(values):
+        return np.bincount(group, weights=np.nan_to_num(values), minlength=n_groups)
+
+    def extreme(values, func):
+        result = np.full(n_groups, np.nan)
+        observed = ~np.isnan(values)
+        order = np.lexsort((values[observed], group[observed]))
+        grouped, sorted_values = group[observed][order], values[observed][order]
+        if func == "max":
+            last = np.r_[grouped[1:] != grouped[:-1], True]
+            result[grouped[last]] = sorted_values[last]
+        else:
+            first = np.r_[True, grouped[1:] != grouped[:-1]]
+            result[grouped[first]] = sorted_values[first]
+        return result
+
+    wet_days = count(wet)
+    indices = {
+        "PRCPTOT": total(np.where(wet, rain, 0.0)),
+        "R10mm": count(rain >= HEAVY_RAIN_MM[0]),
+        "R20mm": count(rain >= HEAVY_RAIN_MM[1]),
+        "Rx1day": extreme(rain, "max"),
+        "Rx5day": extreme(_window_sums(rain, continues, 5), "max"),
+        "CDD": _longest_runs(dry, continues, group, n_groups),
+        "CWD": _longest_runs(wet, continues, group, n_groups),
+        "TXx": extreme(temp_max, "max"),
+        "TNn": extreme(temp_min, "min"),
+        "SU35": count(temp_max > HEAT_STRESS_TEMP),
+        "TR20": count(temp_min > TROPICAL_NIGHT_TEMP),
+    }
+    with np.errstate(invalid="ignore", divide="ignore"):
+        indices["SDII"] = indices["PRCPTOT"] / wet_days
+        range_days = count(~np.isnan(temp_max - temp_min))
+        indices["DTR"] = total(temp_max - temp_min) / range_days
+
+    # Dias esperados no período (ano civil ou janela da safra de cada grupo)
+    period_key = keys % 10_000
+    first = np.zeros(n_groups, dtype=np.int64)
+    last = np.zeros(n_groups, dtype=np.int64)
+    first[group] = first_month
+    last[group] = last_month
+    month = np.datetime64("0000-01", "M")
+    expected = (
+        (month + period_key * 12 + last + 1).astype("datetime64[D]")
+        - (month + period_key * 12 + first).astype("datetime64[D]")
+    ).astype(np.int64)
+
+    rain_days = count(~np.isnan(rain))
+    temp_days = count(~np.isnan(temp_max) & ~np.isnan(temp_min))
+    table = pd.DataFrame(
+        {
+            "ESTACAO": np.asarray(station_index)[keys // 10_000],
+            "Periodo": period_key.astype(np.int16),
+            "Dias": np.maximum(rain_days, temp_days).astype(np.int16),
+        }
+    )
+    for name in CLIMATE_INDICES:
+        days = rain_days if name in RAIN_INDICES else temp_days
+        table[name] = np.where(
+            days >= MIN_COVERAGE * expected, indices[name], np.nan
+        ).astype(np.float32)
+
+    if "Região/UF" in data.columns:
+        uf = data.drop_duplicates("ESTACAO").set_index("ESTACAO")["Região/UF"]
+        table.insert(1, "Região/UF", table["ESTACAO"].map(uf))
+    return table
+
+
+def compute_climate_indices(
+    weather: pd.DataFrame, period: str = "year", windows=None, n_jobs: int = -1
+) -> pd.DataFrame:
+    """
+    Índices de extremos climáticos (``CLIMATE_INDICES``) por estação e ano
+    civil (``period="year"``) ou janela de cultivo da safra da UF
+    (``period="safra"``), a partir das séries diárias.
+
+    Limiares, sequências (dias secos/úmidos consecutivos) e somas móveis são
+    operações vetorizadas sobre todas as estações; tabelas grandes são
+    divididas em blocos de estações processados em paralelo. Períodos com
+    menos de ``MIN_COVERAGE`` dos dias observados ficam sem índice.
+    """
+    try:
+        if period not in ("year", "safra"):
+            raise ValueError(f"Período desconhecido: {period}")
+        weather = weather.sort_values(["ESTACAO", "DATA"], kind="mergesort")
+
+        # Blocos de estações inteiras com cerca de ROWS_PER_CHUNK linhas
+        n_chunks = min(
+            cpu_count() if n_jobs == -1 else max(n_jobs, 1),
+            -(-len(weather) // ROWS_PER_CHUNK),
+        )
+        if n_chunks <= 1:
+            tables = [_chunk_indices(weather, period, windows)]
+        else:
+            stations = weather["ESTACAO"].to_numpy()
+            bounds = np.flatnonzero(np.r_[True, stations[1:] != stations[:-1]])
+            cuts = bounds[
+                np.searchsorted(
+                    bounds, np.linspace(0, len(weather), n_chunks + 1)[1:-1]
+                )
+            ]
+            edges = [0, *np.unique(cuts), len(weather)]
+            tables = Parallel(n_jobs=n_chunks)(
+                delayed(_chunk_indices)(weather.iloc[start:stop], period, windows)
+                for start, stop in zip(edges, edges[1:])
+                if stop > start
+            )
+
+        label = "Ano" if period == "year" else "Safra"
+        indices = pd.concat(tables, ignore_index=True).rename(
+            columns={"Periodo": label}
+        )
+        if "Região/UF" in indices.columns:
+            indices["Região/UF"] = indices["Região/UF"].astype("category")
+        return indices.set_index(["ESTACAO", label]).sort_index()
+    except Exception as e:
+        raise RuntimeError(f"Erro ao calcular índices de extremos climáticos: {e}")
+
+
+def aggregate_indices_by_safra(indices: pd.DataFrame) -> pd.DataFrame:
+    """
+    Média dos índices das estações de cada (UF, safra), para correlacionar com
+    as métricas da Conab.
+    """
+    try:
+        return (
+            indices.reset_index()
+            .dropna(subset=["Região/UF"])
+            .groupby(["Região/UF", "Safra"], observed=True)[list(CLIMATE_INDICES)]
+            .mean()
+            .astype(float)
+            .rename(index=str, level="Região/UF")
+            .sort_index()
+        )
+    except Exception as e:
+        raise RuntimeError(f"Erro ao agregar índices de extremos por safra: {e}")
@@ -1,42 +1,306 @@
+import numpy as np
 import pandas as pd
 
+from validation import parse_iso_dates, validate_cotton_data, validate_weather_data
 
-def load_cotton_data(filepath: str) -> pd.DataFrame:
+# Estações do ano (hemisfério sul) e o código da estação de cada mês (jan = 0)
+SEASONS = ["Verão", "Outono", "Inverno", "Primavera"]
+SEASON_CODE_BY_MONTH = np.array([0, 0, 1, 1, 1, 2, 2, 2, 3, 3, 3, 0], dtype=np.int8)
+
+# A safra "2019/20" começa em setembro de 2019 e é identificada pelo ano 2019
+SAFRA_START_MONTH = 9
+
+# Janela de plantio à colheita do algodão por UF/região, em meses contados a partir
+# de janeiro do ano de início da safra (0 = jan/Y, 11 = dez/Y, 12 = jan/Y+1, ...).
+# Referência aproximada: calendário de plantio e colheita da Conab.
+SAFRA_WINDOWS = {
+    # Centro-Oeste e Matopiba: plantio nov/dez, colheita até setembro
+    "MT": (11, 20),
+    "MS": (10, 19),
+    "GO": (10, 19),
+    "DF": (10, 19),
+    "BA": (10, 20),
+    "MA": (11, 20),
+    "PI": (11, 20),
+    "TO": (11, 20),
+    # Semiárido nordestino: plantio no início das chuvas, colheita até setembro
+    "CE": (13, 20),
+    "RN": (13, 20),
+    "PB": (13, 20),
+    "PE": (13, 20),
+    "AL": (13, 20),
+    "SE": (13, 20),
+    # Sudeste e Sul: plantio out/nov, colheita até junho/julho
+    "MG": (10, 19),
+    "SP": (9, 18),
+    "RJ": (9, 18),
+    "ES": (10, 19),
+    "PR": (9, 18),
+    "SC": (9, 18),
+    "RS": (9, 18),
+    # Norte
+    "RO": (11, 20),
+    "PA": (11, 20),
+    "RR": (11, 20),
+    "AM": (11, 20),
+    "AP": (11, 20),
+    "AC": (11, 20),
+    # Agregados regionais
+    "NORTE": (11, 20),
+    "NORDESTE": (11, 20),
+    "CENTRO-OESTE": (11, 20),
+    "SUDESTE": (10, 19),
+    "SUL": (9, 18),
+    "CENTRO-SUL": (10, 19),
+}
+DEFAULT_SAFRA_WINDOW = (10, 19)
+
+# Abas da série histórica da Conab: métrica → aba, rótulo, unidade e como
+# agregar entre UFs
+COTTON_METRICS = {
+    "Area_Plantada": {
+        "sheet": "Área",
+        "label": "Área Plantada",
+        "unit": "mil ha",
+        "aggregate": "sum",
+    },
+    "Produtividade": {
+        "sheet": "Produtividade Algodão em Caroço",
+        "label": "Produtividade (algodão em caroço)",
+        "unit": "kg/ha",
+        "aggregate": "mean",
+    },
+    "Produtividade_Pluma": {
+        "sheet": "Produtividade Pluma",
+        "label": "Produtividade (pluma)",
+        "unit": "kg/ha",
+        "aggregate": "mean",
+    },
+    "Produtividade_Caroco": {
+        "sheet": "Produtividade Caroço de Algodão",
+        "label": "Produtividade (caroço de algodão)",
+        "unit": "kg/ha",
+        "aggregate": "mean",
+    },
+    "Rendimento_Pluma": {
+        "sheet": "Rendimento Pluma (%)",
+        "label": "Rendimento de Pluma",
+        "unit": "%",
+        "aggregate": "mean",
+    },
+    "Producao": {
+        "sheet": "Produção Algodão em Caroço",
+        "label": "Produção (algodão em caroço)",
+        "unit": "mil t",
+        "aggregate": "sum",
+    },
+    "Producao_Pluma": {
+        "sheet": "Produção de Pluma",
+        "label": "Produção (pluma)",
+        "unit": "mil t",
+        "aggregate": "sum",
+    },
+    "Producao_Caroco": {
+        "sheet": "Produção de Caroço de Algodão",
+        "label": "Produção (caroço de algodão)",
+        "unit": "mil t",
+        "aggregate": "sum",
+    },
+}
+
+# Fração das medições esperadas que foram de fato observadas (séries regularizadas)
+COVERAGE_COLUMN = "Cobertura"
+
+
+def metric_label(metric: str, unit: bool = True) -> str:
     """
-    Carrega e processa os dados de algodão do arquivo Excel.
+    Rótulo da métrica (com a unidade, por padrão) para títulos e eixos dos
+    gráficos.
     """
-    try:
-        data = pd.read_excel(filepath, engine="openpyxl", skiprows=4, header=None)
-        col_count = len(data.columns)
+    info = COTTON_METRICS.get(metric)
+    if info is None:
+        return metric
+    return f"{info['label']} ({info['unit']})" if unit else info["label"]
 
-        # Criar nomes de colunas dinamicamente
-        col_names = ["Região/UF"] + [
-            str(year) for year in range(1976, 1976 + col_count - 1)
-        ]
-        data.columns = col_names[:col_count]
 
-        # Excluir totais e valores agregados
-        data = data[~data["Região/UF"].str.contains("BRASIL|NORTE/NORDESTE", na=False)]
+def _melt_conab_sheet(raw: pd.DataFrame) -> tuple:
+    """
+    Converte uma aba da série histórica da Conab para o formato longo
+    (Região/UF, Ano, Valor) e valida os valores.
+    """
+    # Localizar a linha de cabeçalho ("REGIÃO/UF", "1976/77", ...) em vez de
+    # depender de um número fixo de linhas de título
+    first_col = raw[0].astype(str).str.strip().str.upper()
+    header_rows = np.flatnonzero(first_col == "REGIÃO/UF")
+    if len(header_rows) == 0:
+        raise ValueError("Cabeçalho 'REGIÃO/UF' não encontrado na planilha.")
+    header_row = header_rows[0]
 
-        # Transformar para formato longo
-        data_long = data.melt(
-            id_vars=["Região/UF"], var_name="Ano", value_name="Area_Plantada"
-        )
-        data_long["Area_Plantada"] = pd.to_numeric(
-            data_long["Area_Plantada"], errors="coerce"
-        )
-        data_long["Ano"] = pd.to_numeric(
-            data_long["Ano"].str.extract(r"(\d{4})")[0], errors="coerce"
+    data = raw.iloc[header_row + 1 :].copy()
+    data.columns = ["Região/UF"] + [
+        str(label).strip() for label in raw.iloc[header_row, 1:]
+    ]
+    data = data.loc[:, data.columns.notna() & (data.columns != "nan")]
+    data["Região/UF"] = data["Região/UF"].astype(str).str.strip()
+
+    # Excluir totais, valores agregados e notas de rodapé
+    data = data[~data["Região/UF"].str.contains("BRASIL|NORTE/NORDESTE", na=False)]
+
+    # Transformar para formato longo
+    data_long = data.melt(id_vars=["Região/UF"], var_name="Ano", value_name="Valor")
+    data_long["Ano"] = pd.to_numeric(
+        data_long["Ano"].str.extract(r"(\d{4})")[0], errors="coerce"
+    )
+
+    # Validar números, valores negativos e duplicatas; o relatório acompanha os dados
+    data_long, report = validate_cotton_data(data_long)
+
+    # Remover valores ausentes
+    return data_long.dropna(subset=["Ano", "Valor"]), report
+
+
+def load_cotton_metrics(filepath: str, metrics=None) -> pd.DataFrame:
+    """
+    Carrega as métricas da série histórica da Conab em uma tabela longa e tipada
+    com chave (Região/UF, Safra, Metrica).
+
+    Todas as abas pedidas são lidas em uma única abertura da planilha.
+    """
+    try:
+        metrics = list(metrics or COTTON_METRICS)
+        unknown = set(metrics) - set(COTTON_METRICS)
+        if unknown:
+            raise ValueError(f"Métricas desconhecidas: {unknown}")
+
+        sheets = pd.read_excel(
+            filepath,
+            engine="openpyxl",
+            header=None,
+            sheet_name=[COTTON_METRICS[metric]["sheet"] for metric in metrics],
         )
 
-        # Remover valores ausentes
-        data_long.dropna(subset=["Ano", "Area_Plantada"], inplace=True)
+        frames, reports = [], []
+        for metric in metrics:
+            data_long, report = _melt_conab_sheet(
+                sheets[COTTON_METRICS[metric]["sheet"]]
+            )
+            frames.append(data_long.assign(Metrica=metric))
+            reports += [{"Metrica": metric, **row} for row in report.to_dict("records")]
 
-        return data_long
+        # Cada coluna da planilha é uma safra ("1976/77"); o ano é o de início
+        store = pd.concat(frames, ignore_index=True)
+        store = pd.DataFrame(
+            {
+                "Região/UF": store["Região/UF"].astype("category"),
+                "Safra": store["Ano"].astype(np.int16),
+                "Metrica": pd.Categorical(store["Metrica"], categories=metrics),
+                "Valor": store["Valor"].astype(float),
+            }
+        )
+        store.attrs["validation"] = reports
+        return store
     except Exception as e:
         raise RuntimeError(f"Erro ao carregar dados de algodão: {e}")
 
 
+def select_cotton_metric(store: pd.DataFrame, metrics="Area_Plantada") -> pd.DataFrame:
+    """
+    Tabela (Região/UF, Ano, métricas..., Safra) no formato usado pelas análises,
+    com uma coluna por métrica pedida.
+    """
+    metrics = [metrics] if isinstance(metrics, str) else list(metrics)
+    selected = store[store["Metrica"].isin(metrics)]
+
+    table = (
+        selected.set_index(["Região/UF", "Safra", "Metrica"])["Valor"]
+        .unstack("Metrica")
+        .reindex(columns=metrics)
+        .dropna(how="all")
+        .reset_index()
+    )
+    table.columns.name = None
+    table["Região/UF"] = table["Região/UF"].astype(str)
+    table["Safra"] = table["Safra"].astype(int)
+    table.insert(1, "Ano", table["Safra"])
+    table = table[["Região/UF", "Ano"] + metrics + ["Safra"]]
+
+    table.attrs["validation"] = [
+        row for row in store.attrs.get("validation", []) if row["Metrica"] in metrics
+    ]
+    return table
+
+
+def load_cotton_data(filepath: str, metric: str = "Area_Plantada") -> pd.DataFrame:
+    """
+    Carrega e processa os dados de algodão do arquivo Excel.
+    """
+    return select_cotton_metric(load_cotton_metrics(filepath, [metric]), metric)
+
+
+def safra_year(ano, mes, safra_start_month: int = SAFRA_START_MONTH):
+    """
+    Retorna o ano de início da safra agrícola a que pertence cada (ano, mês).
+    """
+    return ano - (mes < safra_start_month)
+
+
+def derive_calendar(
+    dates: pd.Series, safra_start_month: int = SAFRA_START_MONTH
+) -> pd.DataFrame:
+    """
+    Deriva ano, mês, estação do ano e safra agrícola a partir de uma coluna de datas.
+
+    Aceita tanto datas já convertidas (datetime64) quanto strings YYYY-MM-DD.
+    A estação é obtida indexando diretamente uma tabela de 12 posições.
+    """
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        year = dates.dt.year.to_numpy()
+        month = dates.dt.month.to_numpy()
+        valid = ~np.isnan(month.astype(float))
+        year = np.nan_to_num(year, nan=0).astype(np.int16)
+        month = np.nan_to_num(month, nan=1).astype(np.int8)
+    else:
+        year, month, _, valid = parse_iso_dates(dates)
+
+    if not valid.all():
+        raise ValueError(
+            f"Erro ao mapear meses para estações: {int((~valid).sum())} datas inválidas."
+        )
+    return calendar_from_parts(year, month, dates.index, safra_start_month)
+
+
+def calendar_from_parts(
+    year, month, index=None, safra_start_month: int = SAFRA_START_MONTH
+) -> pd.DataFrame:
+    """
+    Ano, mês, estação do ano e safra agrícola a partir de ano e mês já extraídos.
+    """
+    month = month.astype(np.int8)
+    year = year.astype(np.int16)
+    season = pd.Categorical.from_codes(
+        SEASON_CODE_BY_MONTH[month - 1], categories=SEASONS
+    )
+
+    return pd.DataFrame(
+        {
+            "Ano": year,
+            "Mes": month,
+            "Estacao": season,
+            "Safra": safra_year(year, month, safra_start_month),
+        },
+        index=index,
+    )
+
+
+def dates_from_parts(year, month, day) -> np.ndarray:
+    """
+    Datas (datetime64) montadas a partir de ano, mês e dia, sem reler as strings.
+    """
+    months = (year.astype(np.int64) - 1970) * 12 + month.astype(np.int64) - 1
+    days = months.astype("datetime64[M]").astype("datetime64[D]") + (day - 1)
+    return days.astype("datetime64[ns]")
+
+
 def load_weather_data(filepath: str) -> pd.DataFrame:
     """
     Carrega e processa os dados climáticos.
@@ -45,31 +309,244 @@ def load_weather_data(filepath: str) -> pd.DataFrame:
         # Carregar os dados
         data = pd.read_csv(filepath)
 
-        # Converter a coluna DATA para datetime
-        data["DATA"] = pd.to_datetime(data["DATA (YYYY-MM-DD)"], errors="coerce")
-        data["Ano"] = data["DATA"].dt.year
-        data["Mes"] = data["DATA"].dt.month
-
-        # Definir estações do ano com base nos meses
-        season_bins = [0, 2, 5, 8, 11, 12]  # Divisão em meses
-        season_labels = ["Verão", "Outono", "Inverno", "Primavera", "Verão"]
-        data["Estacao"] = pd.cut(
-            data["Mes"],
-            bins=season_bins,
-            labels=season_labels,
-            ordered=False,
-            right=True,
-        )
-
-        # Verificar duplicatas ou problemas
-        if data["Estacao"].isna().any():
-            raise ValueError(
-                "Erro ao mapear meses para estações: valores nulos detectados."
-            )
+        # Validar antes de derivar o calendário: datas inválidas e duplicatas são
+        # removidas, sentinelas e valores fora da faixa viram NaN
+        data, report = validate_weather_data(data)
 
-        print("Pré-visualização dos dados meteorológicos:")
-        print(data.head())
+        # Data em formato fixo lida uma única vez: a data e o calendário são
+        # montados a partir do ano, mês e dia decodificados
+        year, month, day, _ = parse_iso_dates(data["DATA (YYYY-MM-DD)"])
+        data["DATA"] = dates_from_parts(year, month, day)
+        calendar = calendar_from_parts(year, month, data.index)
+        for col in calendar.columns:
+            data[col] = calendar[col]
 
+        # Ordenar por (estação, data): cada estação ocupa um bloco contíguo, o
+        # que permite filtrar estações e períodos sem varrer a tabela
+        data = data.sort_values(
+            ["ESTACAO", "DATA"], kind="mergesort", ignore_index=True
+        )
+        # O relatório acompanha os dados; quem chama decide como exibi-lo
+        data.attrs["validation"] = report.to_dict("records")
         return data
     except Exception as e:
         raise RuntimeError(f"Erro ao carregar dados meteorológicos: {e}")
+
+
+def load_station_metadata(filepath: str) -> pd.DataFrame:
+    """
+    Carrega o cadastro das estações do INMET (código, UF e coordenadas).
+    """
+    try:
+        stations = pd.read_csv(filepath)
+        stations.columns = [col.strip().upper() for col in stations.columns]
+
+        code_col = next(
+            col for col in ("CODIGO (WMO)", "CODIGO", "ESTACAO") if col in stations
+        )
+        stations = stations.rename(
+            columns={code_col: "ESTACAO", "UF": "Região/UF"}
+        ).drop_duplicates(subset="ESTACAO")
+
+        return stations.set_index("ESTACAO")
+    except StopIteration:
+        raise RuntimeError("Erro ao carregar estações: coluna de código ausente.")
+    except Exception as e:
+        raise RuntimeError(f"Erro ao carregar estações meteorológicas: {e}")
+
+
+def attach_station_uf(weather_data: pd.DataFrame, stations: pd.DataFrame):
+    """
+    Adiciona a UF de cada estação aos dados climáticos.
+    """
+    station = weather_data["ESTACAO"].astype("category")
+    uf_by_code = stations["Região/UF"].reindex(station.cat.categories)
+    weather_data["Região/UF"] = pd.Categorical.from_codes(
+        station.cat.codes, categories=station.cat.categories
+    ).map(dict(zip(uf_by_code.index, uf_by_code.values)))
+    return weather_data
+
+
+def station_partitions(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Posições de início e fim do bloco de cada estação em uma tabela ordenada
+    por (estação, data).
+    """
+    codes = data["ESTACAO"].to_numpy()
+    starts = np.flatnonzero(np.concatenate([[True], codes[1:] != codes[:-1]]))
+    starts = starts[starts < len(codes)]
+    partitions = pd.DataFrame(
+        {"start": starts, "stop": np.append(starts[1:], len(codes))},
+        index=pd.Index(codes[starts], name="ESTACAO"),
+    )
+    if not partitions.index.is_unique:
+        raise ValueError("A tabela não está ordenada por estação.")
+    return partitions
+
+
+def filter_station_frame(
+    data: pd.DataFrame, stations=None, start=None, end=None, partitions=None
+) -> pd.DataFrame:
+    """
+    Seleciona estações e período (datas inclusivas) de uma tabela ordenada por
+    (estação, data) sem varrê-la: apenas os blocos das estações pedidas são
+    visitados e, em cada um, os limites do período são achados por busca
+    binária.
+    """
+    try:
+        if stations is None and start is None and end is None:
+            return data
+        if partitions is None:
+            partitions = station_partitions(data)
+        if stations is not None:
+            partitions = partitions[partitions.index.isin(list(stations))]
+
+        dates = data["DATA"].to_numpy()
+        start = None if start is None else pd.Timestamp(start).to_datetime64()
+        end = None if end is None else pd.Timestamp(end).to_datetime64()
+        # Cada bloco é uma fatia contígua (sem a cópia de uma seleção por
+        # posições, que custa proporcionalmente à tabela inteira)
+        pieces = [data.iloc[0:0]]
+        for first, stop in zip(partitions["start"], partitions["stop"]):
+            block = dates[first:stop]
+            left = first if start is None else first + block.searchsorted(start)
+            right = stop if end is None else first + block.searchsorted(end, "right")
+            if right > left:
+                pieces.append(data.iloc[left:right])
+        filtered = pd.concat(pieces)
+        filtered.attrs = data.attrs
+        return filtered
+    except Exception as e:
+        raise RuntimeError(f"Erro ao filtrar estações e período: {e}")
+
+
+def filter_cotton_metrics(store: pd.DataFrame, ufs=None, safras=None) -> pd.DataFrame:
+    """
+    Restringe a tabela de métricas às UFs e ao intervalo de safras
+    [primeira, última] antes de qualquer seleção ou agregação.
+    """
+    mask = np.ones(len(store), dtype=bool)
+    if ufs is not None:
+        mask &= store["Região/UF"].isin(list(ufs)).to_numpy()
+    if safras is not None:
+        safra = store["Safra"].to_numpy()
+        mask &= (safra >= safras[0]) & (safra <= safras[1])
+    return store if mask.all() else store[mask]
+
+
+def safra_period(safras, windows=None) -> tuple:
+    """
+    Primeiro e último dia que podem entrar nas janelas de cultivo das safras
+    [primeira, última], considerando as janelas de todas as UFs.
+    """
+    windows = windows or SAFRA_WINDOWS
+    bounds = np.array([*windows.values(), DEFAULT_SAFRA_WINDOW])
+    start, end = _month_start(
+        np.array([safras[0], safras[1]]),
+        np.array([bounds[:, 0].min(), bounds[:, 1].max()]),
+    )
+    return start, end + pd.offsets.MonthEnd(0)
+
+
+def _month_start(safras, offsets) -> pd.Series:
+    """
+    Primeiro dia do mês ``offset`` contado a partir de janeiro do ano da safra.
+    """
+    month_index = safras * 12 + offsets
+    return pd.to_datetime(
+        pd.DataFrame({"year": month_index // 12, "month": month_index % 12 + 1, "day": 1})
+    )
+
+
+def build_safra_calendar(ufs, safras, windows=None) -> pd.DataFrame:
+    """
+    Monta o índice de janelas plantio → colheita para cada (UF, safra).
+    """
+    windows = windows or SAFRA_WINDOWS
+    index = pd.MultiIndex.from_product(
+        [sorted(set(ufs)), sorted(set(safras))], names=["Região/UF", "Safra"]
+    )
+    calendar = index.to_frame(index=False)
+
+    bounds = np.array(
+        [windows.get(uf, DEFAULT_SAFRA_WINDOW) for uf in calendar["Região/UF"]]
+    )
+    safra = calendar["Safra"].to_numpy()
+    calendar["Inicio"] = _month_start(safra, bounds[:, 0])
+    calendar["Fim"] = _month_start(safra, bounds[:, 1]) + pd.offsets.MonthEnd(0)
+
+    return calendar.set_index(["Região/UF", "Safra"])
+
+
+def assign_safra_windows(weather_data: pd.DataFrame, windows=None) -> tuple:
+    """
+    Atribui cada registro, em uma passada vetorizada, à safra cuja janela
+    plantio → colheita da sua UF contém o mês do registro.
+
+    Retorna a safra de cada registro, a máscara dos registros dentro de alguma
+    janela e os limites (meses contados a partir de janeiro da safra) da janela
+    de cada registro.
+    """
+    windows = windows or SAFRA_WINDOWS
+    uf = weather_data["Região/UF"].astype("category")
+    bounds = np.array(
+        [windows.get(cat, DEFAULT_SAFRA_WINDOW) for cat in uf.cat.categories]
+        + [DEFAULT_SAFRA_WINDOW],
+        dtype=np.int32,
+    )
+    codes = uf.cat.codes.to_numpy()
+
+    # Mês absoluto de cada registro e safra candidata conforme a janela da UF
+    month_index = weather_data["Ano"].to_numpy(dtype=np.int32) * 12 + (
+        weather_data["Mes"].to_numpy(dtype=np.int32) - 1
+    )
+    start, end = bounds[codes, 0], bounds[codes, 1]
+    safra = (month_index - start) // 12
+    in_window = (codes >= 0) & (month_index - safra * 12 <= end)
+    return safra, in_window, start, end
+
+
+def aggregate_weather_by_safra(
+    weather_data: pd.DataFrame, climate_vars=None, windows=None, how="mean"
+) -> pd.DataFrame:
+    """
+    Agrega as variáveis climáticas sobre a janela de cultivo de cada (UF, safra).
+
+    Cada registro é atribuído, em uma única passada vetorizada, à safra cuja
+    janela plantio → colheita da sua UF contém o mês do registro. O resultado é
+    indexado por (Região/UF, Safra) para junções diretas com os dados de algodão.
+    ``how`` é a agregação (média por padrão, ou um dicionário por variável).
+    """
+    try:
+        if climate_vars is None:
+            climate_vars = weather_data.select_dtypes(include="float").columns.tolist()
+
+        uf = weather_data["Região/UF"].astype("category")
+        safra, in_window, _, _ = assign_safra_windows(weather_data, windows)
+
+        safra_climate = (
+            weather_data.loc[in_window, climate_vars]
+            .groupby([uf[in_window], safra[in_window]], observed=True)
+            .agg(how)
+            .rename_axis(["Região/UF", "Safra"])
+            .reset_index()
+        )
+        safra_climate["Região/UF"] = safra_climate["Região/UF"].astype(str)
+        safra_climate = safra_climate.set_index(["Região/UF", "Safra"]).sort_index()
+
+        return safra_climate
+    except Exception as e:
+        raise RuntimeError(f"Erro ao agregar dados climáticos por safra: {e}")
+
+
+def join_safra_climate(
+    cotton_data: pd.DataFrame, safra_climate: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Junta os dados de algodão ao clima da janela de cultivo pela chave (UF, safra).
+    """
+    cotton = cotton_data
+    if "Safra" not in cotton.columns:
+        cotton = cotton.assign(Safra=cotton["Ano"].astype(int))
+    combined = cotton.join(safra_climate, on=["Região/UF", "Safra"], how="inner")
+    return combined.reset_index(drop=True)
@@ -0,0 +1,202 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+PAGE_SIZES = [25, 50, 100, 500]
+
+
+def _filter_positions(data: pd.DataFrame, filters) -> np.ndarray:
+    """
+    Aplica os filtros em sequência, avaliando cada um apenas sobre as linhas que
+    passaram pelos anteriores. Retorna as posições das linhas selecionadas.
+
+    Cada filtro é um dicionário com ``column`` e um dos critérios: ``values``
+    (lista de valores aceitos), ``min``/``max`` (faixa numérica) ou ``contains``
+    (trecho de texto, sem diferenciar maiúsculas).
+    """
+    positions = np.arange(len(data))
+    for rule in filters or []:
+        column = data[rule["column"]]
+        if len(positions) < len(data):
+            column = column.take(positions)
+
+        if "values" in rule:
+            mask = column.isin(rule["values"]).to_numpy()
+        elif "contains" in rule:
+            mask = (
+                column.astype(str)
+                .str.contains(rule["contains"], case=False, regex=False)
+                .to_numpy(dtype=bool)
+            )
+        else:
+            values = pd.to_numeric(column, errors="coerce").to_numpy(dtype=float)
+            mask = ~np.isnan(values)
+            if rule.get("min") is not None:
+                mask &= values >= rule["min"]
+            if rule.get("max") is not None:
+                mask &= values <= rule["max"]
+
+        positions = positions[mask]
+    return positions
+
+
+def _sort_keys(column: pd.Series):
+    """
+    Chaves numéricas de ordenação (NaN para ausentes), ou None quando a coluna
+    precisa da ordenação genérica do pandas.
+    """
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        codes = column.cat.codes.to_numpy(dtype=float)
+        codes[codes < 0] = np.nan
+        return codes
+    if pd.api.types.is_bool_dtype(column) or pd.api.types.is_numeric_dtype(column):
+        return pd.to_numeric(column, errors="coerce").to_numpy(dtype=float)
+    if pd.api.types.is_datetime64_any_dtype(column):
+        keys = column.to_numpy().astype("datetime64[ns]").view("i8").astype(float)
+        keys[column.isna().to_numpy()] = np.nan
+        return keys
+    return None
+
+
+def _sorted_page(column: pd.Series, ascending: bool, stop: int) -> np.ndarray:
+    """
+    Ordem (relativa à coluna) das primeiras ``stop`` linhas após a ordenação.
+
+    Para colunas numéricas só as linhas até o fim da página são ordenadas: uma
+    partição encontra o valor de corte e apenas os candidatos até ele (inclusive
+    empates, para que a paginação seja estável) passam pela ordenação completa.
+    Ausentes ficam sempre no fim.
+    """
+    keys = _sort_keys(column)
+    if keys is None:
+        order = (
+            column.reset_index(drop=True)
+            .sort_values(ascending=ascending, na_position="last", kind="mergesort")
+            .index.to_numpy()
+        )
+        return order[:stop]
+
+    if not ascending:
+        keys = -keys
+    if stop < len(keys):
+        cutoff = np.partition(keys, stop - 1)[stop - 1]
+        if not np.isnan(cutoff):
+            candidates = np.flatnonzero(keys <= cutoff)
+            order = candidates[np.argsort(keys[candidates], kind="mergesort")]
+            return order[:stop]
+    return np.argsort(keys, kind="mergesort")[:stop]
+
+
+def query_frame(
+    data: pd.DataFrame,
+    columns=None,
+    filters=None,
+    sort_by=None,
+    ascending: bool = True,
+    page: int = 0,
+    page_size: int = 50,
+) -> tuple:
+    """
+    Calcula apenas a página visível de uma tabela: filtros, ordenação e seleção
+    de colunas são aplicados sobre os dados, e só as linhas da página são
+    copiadas.
+
+    Retorna a página (com o índice original) e o total de linhas após os filtros;
+    páginas além da última mostram a última.
+    """
+    try:
+        positions = _filter_positions(data, filters)
+        total = len(positions)
+        last_page = max(0, -(-total // page_size) - 1)
+        start = min(max(page, 0), last_page) * page_size
+        stop = min(start + page_size, total)
+
+        if sort_by is not None and start < stop:
+            column = data[sort_by]
+            if total < len(data):
+                column = column.take(positions)
+            positions = positions[_sorted_page(column, ascending, stop)]
+        positions = positions[start:stop]
+
+        columns = list(data.columns) if columns is None else list(columns)
+        return data.iloc[positions, data.columns.get_indexer(columns)], total
+    except Exception as e:
+        raise RuntimeError(f"Erro ao consultar a tabela: {e}")
+
+
+def _filter_widget(data: pd.DataFrame, column: str, key: str):
+    """
+    Controle de filtro adequado ao tipo da coluna; retorna o filtro ou None.
+    """
+    series = data[column]
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        values = st.multiselect(
+            f"Valores de {column}", list(series.cat.categories), key=f"{key}_values"
+        )
+        return {"column": column, "values": values} if values else None
+
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        low, high = float(np.nanmin(series)), float(np.nanmax(series))
+        min_col, max_col = st.columns(2)
+        chosen_min = min_col.number_input("Mínimo", value=low, key=f"{key}_min")
+        chosen_max = max_col.number_input("Máximo", value=high, key=f"{key}_max")
+        if chosen_min <= low and chosen_max >= high:
+            return None
+        return {"column": column, "min": chosen_min, "max": chosen_max}
+
+    text = st.text_input(f"{column} contém", key=f"{key}_contains")
+    return {"column": column, "contains": text} if text else None
+
+
+def show_data_grid(data: pd.DataFrame, key: str, page_size: int = 50):
+    """
+    Tabela paginada no servidor: o navegador recebe apenas a página visível,
+    o que permite navegar por milhões de linhas.
+    """
+    with st.expander("Colunas, filtro e ordenação"):
+        columns = st.multiselect(
+            "Colunas", list(data.columns), default=list(data.columns), key=f"{key}_cols"
+        )
+        filter_column = st.selectbox(
+            "Filtrar por", [None, *data.columns], key=f"{key}_filter"
+        )
+        filters = []
+        if filter_column is not None:
+            rule = _filter_widget(data, filter_column, f"{key}_{filter_column}")
+            if rule is not None:
+                filters.append(rule)
+
+        sort_col, order_col = st.columns(2)
+        sort_by = sort_col.selectbox(
+            "Ordenar por", [None, *data.columns], key=f"{key}_sort"
+        )
+        ascending = order_col.radio(
+            "Ordem", ["Crescente", "Decrescente"], horizontal=True, key=f"{key}_order"
+        )
+
+    size_col, page_col = st.columns(2)
+    page_size = size_col.selectbox(
+        "Linhas por página",
+        PAGE_SIZES,
+        index=PAGE_SIZES.index(page_size) if page_size in PAGE_SIZES else 1,
+        key=f"{key}_size",
+    )
+    page = page_col.number_input("Página", min_value=1, value=1, key=f"{key}_page")
+
+    view, total = query_frame(
+        data,
+        columns=columns or list(data.columns),
+        filters=filters,
+        sort_by=sort_by,
+        ascending=ascending == "Crescente",
+        page=page - 1,
+        page_size=page_size,
+    )
+    st.dataframe(view)
+
+    pages = max(1, -(-total // page_size))
+    first = (min(page, pages) - 1) * page_size
+    st.caption(
+        f"Linhas {min(first + 1, total)}–{first + len(view)} de {total:,} "
+        f"(página {min(page, pages)} de {pages}; total da tabela: {len(data):,})."
+    )
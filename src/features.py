@@ -0,0 +1,294 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from joblib import dump, load
+
+from data_cleaning import (
+    DEFAULT_SAFRA_WINDOW,
+    SAFRA_WINDOWS,
+    aggregate_weather_by_safra,
+    safra_year,
+)
+from fingerprint import (
+    combine_fingerprints,
+    fingerprint_dependencies,
+    fingerprint_params,
+)
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+FEATURE_DIR = os.path.join(BASE_DIR, "data", "processed", "features")
+MANIFEST_NAME = "manifest.json"
+
+# Janelas (dias) da chuva acumulada
+RAIN_WINDOWS = (30, 60, 90)
+
+# Temperatura base do algodão para graus-dia e limiar de estresse térmico (°C)
+GDD_BASE_TEMP = 15.5
+HEAT_STRESS_TEMP = 35.0
+
+# Agregação de cada atributo sobre a janela de cultivo da safra: total de
+# graus-dia e de horas de estresse, e o menor acumulado de chuva (veranicos)
+SAFRA_FEATURE_AGGREGATES = {
+    "gdd": "sum",
+    "heat_hours": "sum",
+    **{f"rain_{days}d": "min" for days in RAIN_WINDOWS},
+}
+
+
+def heat_stress_hours(temp_min, temp_max, threshold: float = HEAT_STRESS_TEMP):
+    """
+    Horas do dia acima do limiar, estimadas a partir da mínima e da máxima com um
+    ciclo diário triangular (a temperatura sobe e desce linearmente).
+    """
+    temp_min = np.asarray(temp_min, dtype=float)
+    temp_max = np.asarray(temp_max, dtype=float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        fraction = (temp_max - threshold) / (temp_max - temp_min)
+    hours = 24.0 * np.clip(np.nan_to_num(fraction, nan=0.0), 0.0, 1.0)
+    hours[temp_min >= threshold] = 24.0
+    hours[np.isnan(temp_min) | np.isnan(temp_max)] = np.nan
+    return hours
+
+
+def _run_totals(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """
+    Soma acumulada reiniciada no início de cada grupo (``starts`` é, para cada
+    linha, a posição da primeira linha do seu grupo). Ausentes contam como zero.
+    """
+    prefix = np.concatenate([[0.0], np.cumsum(np.nan_to_num(values))])
+    return prefix[1:] - prefix[starts]
+
+
+def compute_station_features(
+    weather: pd.DataFrame,
+    rain_windows=RAIN_WINDOWS,
+    gdd_base: float = GDD_BASE_TEMP,
+    heat_threshold: float = HEAT_STRESS_TEMP,
+) -> pd.DataFrame:
+    """
+    Calcula os atributos diários de cada estação: chuva acumulada nas janelas
+    móveis, graus-dia e horas de estresse térmico (do dia e acumulados na safra).
+
+    Tudo é feito em passadas vetorizadas sobre as séries ordenadas por (estação,
+    data): as janelas móveis são diferenças de somas de prefixo, com o início de
+    cada janela localizado por busca binária na chave (estação, dia), o que
+    também respeita dias ausentes. Janelas incompletas resultam em NaN.
+    """
+    try:
+        weather = weather.sort_values(["ESTACAO", "DATA"], kind="mergesort")
+        codes, _ = pd.factorize(weather["ESTACAO"], sort=True)
+        day = weather["DATA"].to_numpy().astype("datetime64[D]").astype(np.int64)
+        key = codes.astype(np.int64) * 10_000_000 + (day - day.min())
+        row = np.arange(len(weather))
+
+        features = weather[["ESTACAO", "DATA"]].reset_index(drop=True)
+        if "Região/UF" in weather.columns:
+            features["Região/UF"] = weather["Região/UF"].to_numpy()
+        year = weather["DATA"].dt.year.to_numpy()
+        month = weather["DATA"].dt.month.to_numpy()
+        features["Ano"] = year.astype(np.int16)
+        features["Mes"] = month.astype(np.int8)
+        features["Safra"] = safra_year(year, month).astype(np.int16)
+
+        # Chuva acumulada: a janela de k dias termina no próprio dia
+        rain = weather["rain_max"].to_numpy(dtype=float)
+        rain_prefix = np.concatenate([[0.0], np.cumsum(np.nan_to_num(rain))])
+        valid_prefix = np.concatenate([[0], np.cumsum(~np.isnan(rain))])
+        for days in rain_windows:
+            left = np.searchsorted(key, key - days + 1)
+            observed = valid_prefix[row + 1] - valid_prefix[left]
+            total = rain_prefix[row + 1] - rain_prefix[left]
+            features[f"rain_{days}d"] = np.where(
+                observed == days, total, np.nan
+            ).astype(np.float32)
+
+        # Graus-dia e horas de estresse, acumulados desde o início da safra
+        temp_min = weather["temp_min"].to_numpy(dtype=float)
+        temp_max = weather["temp_max"].to_numpy(dtype=float)
+        gdd = np.maximum((temp_max + temp_min) / 2 - gdd_base, 0.0)
+        heat = heat_stress_hours(temp_min, temp_max, heat_threshold)
+
+        group = codes.astype(np.int64) * 10_000 + features["Safra"].to_numpy()
+        new_group = np.concatenate([[True], group[1:] != group[:-1]])
+        starts = np.maximum.accumulate(np.where(new_group, row, 0))
+
+        features["gdd"] = gdd.astype(np.float32)
+        features["gdd_safra"] = _run_totals(gdd, starts).astype(np.float32)
+        features["heat_hours"] = heat.astype(np.float32)
+        features["heat_hours_safra"] = _run_totals(heat, starts).astype(np.float32)
+        return features
+    except Exception as e:
+        raise RuntimeError(f"Erro ao calcular atributos das estações: {e}")
+
+
+def _partition_fingerprints(weather: pd.DataFrame, version: str) -> pd.Series:
+    """
+    Hash de cada partição (estação, ano): combina as linhas do ano e as do ano
+    anterior, das quais dependem as janelas móveis e os acumulados da safra.
+    """
+    columns = ["ESTACAO", "DATA", "temp_min", "temp_max", "rain_max"]
+    rows = pd.util.hash_pandas_object(weather[columns], index=False)
+    years = weather["DATA"].dt.year.rename("Ano")
+    own = rows.groupby([weather["ESTACAO"], years]).sum()
+
+    previous = own.copy()
+    previous.index = previous.index.set_levels(
+        previous.index.levels[1] + 1, level="Ano"
+    )
+    previous = previous.reindex(own.index, fill_value=0)
+    return pd.Series(
+        [
+            combine_fingerprints(version, str(a), str(b))
+            for a, b in zip(own.to_numpy(), previous.to_numpy())
+        ],
+        index=[f"{station}/{year}" for station, year in own.index],
+    )
+
+
+def _read_manifest(store_dir: str) -> dict:
+    path = os.path.join(store_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def _write_manifest(store_dir: str, manifest: dict):
+    path = os.path.join(store_dir, MANIFEST_NAME)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as file:
+        json.dump(manifest, file, sort_keys=True)
+    os.replace(f"{path}.tmp", path)
+
+
+def update_feature_store(
+    weather: pd.DataFrame, store_dir: str = FEATURE_DIR, **params
+) -> pd.DataFrame:
+    """
+    Atualiza o armazenamento de atributos, particionado por estação/ano.
+
+    Só as partições cujas linhas (ou as do ano anterior) mudaram são
+    recalculadas, junto com o ano anterior necessário para as janelas; uma
+    mudança no cálculo (inclusive nas funções auxiliares e limiares) recalcula
+    todas. Retorna um relatório com o total de partições e as recalculadas.
+    """
+    try:
+        version = combine_fingerprints(
+            fingerprint_dependencies(compute_station_features),
+            fingerprint_params(params),
+        )
+        fingerprints = _partition_fingerprints(weather, version)
+        manifest = _read_manifest(store_dir)
+        stale = [
+            partition
+            for partition, value in fingerprints.items()
+            if manifest.get(partition) != value
+            or not os.path.exists(os.path.join(store_dir, f"{partition}.joblib"))
+        ]
+
+        if stale:
+            stale_keys = pd.Series(stale).str.split("/", expand=True)
+            stale_set = set(zip(stale_keys[0], stale_keys[1].astype(int)))
+            needed = stale_set | {(station, year - 1) for station, year in stale_set}
+
+            years = weather["DATA"].dt.year
+            keys = pd.MultiIndex.from_arrays([weather["ESTACAO"], years])
+            subset = weather[keys.isin(list(needed))]
+            features = compute_station_features(subset, **params)
+
+            for (station, year), partition in features.groupby(
+                ["ESTACAO", "Ano"], sort=False
+            ):
+                if (station, int(year)) not in stale_set:
+                    continue
+                path = os.path.join(store_dir, str(station), f"{year}.joblib")
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                dump(partition.reset_index(drop=True), path)
+                manifest[f"{station}/{year}"] = fingerprints[f"{station}/{year}"]
+            _write_manifest(store_dir, manifest)
+
+        return pd.DataFrame(
+            {"Particoes": [len(fingerprints)], "Recalculadas": [len(stale)]}
+        )
+    except Exception as e:
+        raise RuntimeError(f"Erro ao atualizar o armazenamento de atributos: {e}")
+
+
+def load_features(
+    store_dir: str = FEATURE_DIR, stations=None, years=None
+) -> pd.DataFrame:
+    """
+    Lê os atributos do armazenamento, abrindo apenas as partições das estações
+    e dos anos pedidos.
+    """
+    try:
+        stations = None if stations is None else set(map(str, stations))
+        years = None if years is None else set(map(int, years))
+        partitions = []
+        for partition in sorted(_read_manifest(store_dir)):
+            station, year = partition.split("/")
+            if stations is not None and station not in stations:
+                continue
+            if years is not None and int(year) not in years:
+                continue
+            partitions.append(load(os.path.join(store_dir, f"{partition}.joblib")))
+        if not partitions:
+            return pd.DataFrame()
+        return pd.concat(partitions, ignore_index=True)
+    except Exception as e:
+        raise RuntimeError(f"Erro ao ler o armazenamento de atributos: {e}")
+
+
+def build_station_features(
+    weather: pd.DataFrame, store_dir: str = FEATURE_DIR, **params
+) -> pd.DataFrame:
+    """
+    Atualiza o armazenamento e retorna os atributos das estações e anos presentes
+    nos dados (etapa do pipeline), com o relatório da atualização em
+    ``attrs["store_report"]``.
+    """
+    report = update_feature_store(weather, store_dir, **params)
+    features = load_features(
+        store_dir,
+        stations=weather["ESTACAO"].unique(),
+        years=weather["DATA"].dt.year.unique(),
+    )
+    features.attrs["store_report"] = report.to_dict("records")
+    return features
+
+
+def aggregate_features_by_safra(features: pd.DataFrame, windows=None) -> pd.DataFrame:
+    """
+    Resume os atributos de cada estação sobre a janela de cultivo da sua UF
+    (totais de graus-dia e de horas de estresse, menor chuva acumulada) e faz a
+    média entre as estações de cada (UF, safra).
+    """
+    try:
+        windows = windows or SAFRA_WINDOWS
+        features = features.dropna(subset=["Região/UF"])
+
+        # Cada estação é agregada com a janela da sua UF
+        station_uf = features.drop_duplicates("ESTACAO").set_index("ESTACAO")[
+            "Região/UF"
+        ]
+        station_windows = {
+            station: windows.get(uf, DEFAULT_SAFRA_WINDOW)
+            for station, uf in station_uf.items()
+        }
+        per_station = aggregate_weather_by_safra(
+            features.assign(**{"Região/UF": features["ESTACAO"]}),
+            climate_vars=list(SAFRA_FEATURE_AGGREGATES),
+            windows=station_windows,
+            how=SAFRA_FEATURE_AGGREGATES,
+        ).reset_index()
+
+        per_station["Região/UF"] = per_station["Região/UF"].map(station_uf)
+        return (
+            per_station.groupby(["Região/UF", "Safra"])[list(SAFRA_FEATURE_AGGREGATES)]
+            .mean()
+            .astype(float)
+            .sort_index()
+        )
+    except Exception as e:
+        raise RuntimeError(f"Erro ao agregar atributos por safra: {e}")
@@ -0,0 +1,216 @@
+import hashlib
+import inspect
+import json
+import os
+import sys
+import types
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# Diretório dos módulos do projeto: só o código daqui entra nas dependências
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Tipos de constantes de módulo cujo valor entra no hash das dependências
+CONSTANT_TYPES = (bool, int, float, str, bytes, tuple, list, dict, set, frozenset)
+
+# Estado mutável privado de um módulo (ex.: ``_dependency_cache``) muda com o
+# histórico de chamadas do processo e não entra no hash
+MUTABLE_TYPES = (list, dict, set)
+
+
+def fingerprint_frame(data: pd.DataFrame) -> str:
+    """
+    Calcula um hash estável do conteúdo de um DataFrame (valores, índice e colunas).
+    """
+    hasher = hashlib.sha256()
+    hasher.update(",".join(map(str, data.columns)).encode("utf-8"))
+    hasher.update(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+    return hasher.hexdigest()
+
+
+def fingerprint_object(obj) -> str:
+    """
+    Calcula o hash de um resultado qualquer (DataFrame, Series ou objeto Python).
+    """
+    if isinstance(obj, pd.Series):
+        obj = obj.to_frame()
+    if isinstance(obj, pd.DataFrame):
+        return fingerprint_frame(obj)
+    return joblib.hash(obj, hash_name="sha1")
+
+
+def fingerprint_file(filepath: str, chunk_size: int = 1 << 20) -> str:
+    """
+    Calcula o hash do conteúdo de um arquivo lendo-o em blocos.
+    """
+    hasher = hashlib.sha256()
+    with open(filepath, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def file_signature(filepath: str) -> str:
+    """
+    Assinatura barata de um arquivo (tamanho e data de modificação), sem lê-lo.
+    """
+    stat = os.stat(filepath)
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def fingerprint_code(func) -> str:
+    """
+    Calcula o hash do código-fonte de uma função (mudanças no código invalidam
+    os caches que dependem dela).
+    """
+    try:
+        source = inspect.getsource(func)
+    except (OSError, TypeError):
+        source = f"{func.__module__}.{func.__qualname__}"
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+def _project_module(obj):
+    """
+    Módulo do projeto (em ``SRC_DIR``) que define o objeto, ou None. Lê
+    ``__dict__`` diretamente para não disparar importações preguiçosas.
+    """
+    if isinstance(obj, types.ModuleType):
+        module = obj
+    else:
+        module = sys.modules.get(getattr(obj, "__module__", None) or "")
+    path = module.__dict__.get("__file__") if module is not None else None
+    if path and os.path.dirname(os.path.abspath(path)) == SRC_DIR:
+        return module
+    return None
+
+
+def _code_names(code) -> set:
+    """
+    Nomes globais usados por um código e pelas funções aninhadas nele.
+    """
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _code_names(const)
+    return names
+
+
+def _source(obj) -> str:
+    try:
+        return inspect.getsource(obj)
+    except (OSError, TypeError):
+        return f"{getattr(obj, '__module__', '')}.{getattr(obj, '__qualname__', obj)}"
+
+
+def _constant_repr(value, pending: list) -> str:
+    """
+    Representação estável de uma constante (sem endereços de memória nem ordem
+    de conjuntos); funções e classes do projeto citadas nela entram em
+    ``pending`` para terem o código incluído.
+    """
+    if isinstance(value, dict):
+        items = [
+            f"{_constant_repr(k, pending)}: {_constant_repr(v, pending)}"
+            for k, v in value.items()
+        ]
+        return "{" + ", ".join(items) + "}"
+    if isinstance(value, (list, tuple)):
+        return f"{type(value).__name__}({', '.join(_constant_repr(v, pending) for v in value)})"
+    if isinstance(value, (set, frozenset)):
+        return f"set({', '.join(sorted(_constant_repr(v, pending) for v in value))})"
+    if isinstance(value, (bool, int, float, str, bytes, type(None), np.ndarray)):
+        return repr(value)
+    if callable(value):
+        if (inspect.isfunction(value) or inspect.isclass(value)) and _project_module(
+            value
+        ):
+            pending.append(value)
+        return f"{getattr(value, '__module__', '')}.{getattr(value, '__qualname__', type(value).__name__)}"
+    return type(value).__name__
+
+
+_dependency_cache = {}
+
+
+def fingerprint_dependencies(func) -> str:
+    """
+    Hash do código de uma função e de tudo o que ela usa do projeto: funções e
+    classes chamadas (recursivamente), constantes de módulo, valores padrão dos
+    parâmetros e módulos do projeto usados inteiros (``modulo.atributo``).
+
+    Mudanças em funções auxiliares, limiares ou regras de validação invalidam
+    assim os caches que dependem delas. O resultado fica guardado pela
+    identidade do objeto de código (módulos recarregados geram objetos novos;
+    objetos de código iguais em valor não bastam, pois os auxiliares podem ter
+    mudado).
+    """
+    root = inspect.unwrap(func)
+    root_code = getattr(root, "__code__", root)
+    cached = _dependency_cache.get(id(root_code))
+    if cached is not None and cached[0] is root_code:
+        return cached[1]
+
+    pieces, seen, pending = [], set(), [root]
+    while pending:
+        obj = inspect.unwrap(pending.pop())
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+
+        if isinstance(obj, types.ModuleType):
+            pieces.append(_source(obj))
+            continue
+        pieces.append(_source(obj))
+        if inspect.isclass(obj):
+            pending += [
+                value
+                for value in vars(obj).values()
+                if inspect.isfunction(value) and _project_module(value)
+            ]
+            continue
+
+        code = getattr(obj, "__code__", None)
+        if code is None:
+            continue
+        pieces.append(repr((obj.__defaults__, obj.__kwdefaults__)))
+        namespace = obj.__globals__
+        for name in sorted(_code_names(code)):
+            if name not in namespace:
+                continue
+            value = namespace[name]
+            if name.startswith("_") and isinstance(value, MUTABLE_TYPES):
+                continue
+            if isinstance(value, CONSTANT_TYPES + (np.ndarray,)):
+                pieces.append(f"{name}={_constant_repr(value, pending)}")
+            elif (
+                inspect.isfunction(value)
+                or inspect.isclass(value)
+                or isinstance(value, types.ModuleType)
+            ) and _project_module(value):
+                pending.append(value)
+
+    digest = hashlib.sha256("\n".join(pieces).encode("utf-8")).hexdigest()
+    _dependency_cache[id(root_code)] = (root_code, digest)
+    return digest
+
+
+def fingerprint_params(params) -> str:
+    """
+    Calcula o hash de um conjunto de parâmetros serializáveis em JSON.
+    """
+    payload = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def combine_fingerprints(*fingerprints: str) -> str:
+    """
+    Combina vários hashes em uma única chave curta.
+    """
+    hasher = hashlib.sha256()
+    for value in fingerprints:
+        hasher.update(value.encode("utf-8"))
+    return hasher.hexdigest()[:16]
+
@@ -0,0 +1,345 @@
+import os
+
+import numpy as np
+import pandas as pd
+from joblib import dump, load
+
+from fingerprint import combine_fingerprints, fingerprint_object, fingerprint_params
+from resampling import EARTH_RADIUS_KM, station_coordinates, unit_vectors
+from startup import lazy_import
+
+spatial = lazy_import("scipy.spatial")
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+GEOJSON_PATH = os.path.join(BASE_DIR, "data", "geo", "br_states.json")
+CACHE_DIR = os.path.join(BASE_DIR, "data", "processed", "interpolation")
+
+# Retângulo que contém o território brasileiro (graus)
+BRAZIL_BOUNDS = {"lat": (-34.0, 5.5), "lon": (-74.0, -34.5)}
+
+INTERPOLATION_METHODS = ("idw", "kriging")
+
+
+def build_grid(resolution: float = 0.5, bounds=None) -> pd.DataFrame:
+    """
+    Grade regular de células (centro em latitude/longitude) com a área relativa
+    de cada célula, proporcional ao cosseno da latitude.
+    """
+    bounds = bounds or BRAZIL_BOUNDS
+    lat = np.arange(bounds["lat"][0] + resolution / 2, bounds["lat"][1], resolution)
+    lon = np.arange(bounds["lon"][0] + resolution / 2, bounds["lon"][1], resolution)
+    lat_grid, lon_grid = np.meshgrid(lat, lon, indexing="ij")
+    return pd.DataFrame(
+        {
+            "lat": lat_grid.ravel(),
+            "lon": lon_grid.ravel(),
+            "area": np.cos(np.radians(lat_grid.ravel())),
+        }
+    )
+
+
+def assign_grid_to_ufs(
+    grid: pd.DataFrame,
+    geojson_path: str = GEOJSON_PATH,
+    coordinates=None,
+    station_ufs=None,
+    max_distance_km: float = 300.0,
+) -> np.ndarray:
+    """
+    UF de cada célula da grade (``None`` fora do território).
+
+    Usa os polígonos das UFs quando o GeoJSON está disponível; caso contrário,
+    aproxima a área de cada UF pelas células mais próximas das suas estações.
+    """
+    if os.path.exists(geojson_path):
+        import geopandas as gpd
+
+        states = gpd.read_file(geojson_path)[["id", "geometry"]]
+        points = gpd.GeoDataFrame(
+            geometry=gpd.points_from_xy(grid["lon"], grid["lat"]), crs=states.crs
+        )
+        joined = gpd.sjoin(points, states, how="left", predicate="within")
+        joined = joined[~joined.index.duplicated()]
+        return joined["id"].where(joined["id"].notna(), None).to_numpy(dtype=object)
+
+    if coordinates is None or station_ufs is None:
+        raise ValueError("Sem GeoJSON das UFs nem estações para aproximar as áreas.")
+
+    located = ~np.isnan(coordinates).any(axis=1)
+    chord = 2 * np.sin(max_distance_km / (2 * EARTH_RADIUS_KM))
+    distances, nearest = spatial.cKDTree(unit_vectors(coordinates[located])).query(
+        unit_vectors(grid[["lat", "lon"]].to_numpy()), distance_upper_bound=chord
+    )
+    ufs = np.append(np.asarray(station_ufs, dtype=object)[located], None)
+    return ufs[np.where(np.isfinite(distances), nearest, len(ufs) - 1)]
+
+
+def _chord_to_km(chord):
+    """
+    Converte a distância em corda (esfera unitária) para quilômetros.
+    """
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0, 1))
+
+
+def interpolation_weights(
+    source: np.ndarray,
+    targets: np.ndarray,
+    method: str = "idw",
+    k: int = 8,
+    power: float = 2.0,
+    range_km: float = 300.0,
+    nugget: float = 0.1,
+):
+    """
+    Vizinhos (consulta em KD-tree) e pesos de interpolação de cada ponto alvo.
+
+    ``idw`` usa o inverso da distância elevado a ``power``; ``kriging`` resolve,
+    em lote para todos os alvos, o sistema da krigagem ordinária local com
+    covariância exponencial. Os pesos dependem só da geometria e são reutilizados
+    para todas as variáveis e períodos.
+    """
+    if method not in INTERPOLATION_METHODS:
+        raise ValueError(f"Método de interpolação desconhecido: {method}")
+
+    points = unit_vectors(source)
+    k = min(k, len(points))
+    chord, neighbours = spatial.cKDTree(points).query(unit_vectors(targets), k=k)
+    chord, neighbours = chord.reshape(len(targets), k), neighbours.reshape(-1, k)
+    distances = _chord_to_km(chord)
+
+    if method == "idw":
+        weights = 1.0 / np.maximum(distances, 1e-6) ** power
+        # Alvo coincidente com uma estação: usar apenas a estação
+        exact = distances < 1e-6
+        weights = np.where(exact.any(axis=1, keepdims=True), exact * 1.0, weights)
+        return neighbours, weights / weights.sum(axis=1, keepdims=True)
+
+    def covariance(h):
+        return (1 - nugget) * np.exp(-3 * h / range_km) + nugget * (h < 1e-6)
+
+    # Sistema (k+1)×(k+1) por alvo: covariâncias entre vizinhos + restrição Σw = 1
+    neighbour_points = points[neighbours]
+    between = np.linalg.norm(
+        neighbour_points[:, :, None, :] - neighbour_points[:, None, :, :], axis=-1
+    )
+    system = np.ones((len(targets), k + 1, k + 1))
+    system[:, :k, :k] = covariance(_chord_to_km(between))
+    system[:, k, k] = 0.0
+    rhs = np.ones((len(targets), k + 1))
+    rhs[:, :k] = covariance(distances)
+    solution = np.linalg.solve(system, rhs[:, :, None])[:, :k, 0]
+    return neighbours, solution
+
+
+def apply_weights(values: np.ndarray, neighbours, weights) -> np.ndarray:
+    """
+    Interpola uma matriz estação × período para os alvos. Estações sem valor em
+    um período são ignoradas e os pesos restantes são renormalizados.
+    """
+    total = np.zeros((len(neighbours), values.shape[1]))
+    weight_sum = np.zeros_like(total)
+    for j in range(neighbours.shape[1]):
+        column = values[neighbours[:, j]]
+        available = ~np.isnan(column)
+        total += np.where(available, column, 0.0) * weights[:, j, None]
+        weight_sum += available * weights[:, j, None]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(np.abs(weight_sum) > 1e-9, total / weight_sum, np.nan)
+
+
+def _cached_periods(matrix: pd.DataFrame, cache_path: str, compute) -> np.ndarray:
+    """
+    Resultados por período com cache em disco por (variável, período): cada
+    coluna é identificada pelo hash dos seus valores e só os períodos novos ou
+    alterados são recalculados.
+    """
+    cache = load(cache_path) if os.path.exists(cache_path) else {}
+    hashes = pd.util.hash_pandas_object(matrix.T, index=False).to_numpy()
+    keys = list(zip(matrix.columns, hashes))
+
+    missing = [i for i, key in enumerate(keys) if key not in cache]
+    if missing:
+        results = compute(matrix.iloc[:, missing].to_numpy(dtype=float))
+        for position, i in enumerate(missing):
+            cache[keys[i]] = results[:, position]
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        dump(cache, cache_path)
+
+    return np.column_stack([cache[key] for key in keys])
+
+
+def interpolate_to_ufs(
+    matrix: pd.DataFrame,
+    coordinates: np.ndarray,
+    grid: pd.DataFrame,
+    cell_ufs: np.ndarray,
+    variable: str,
+    method: str = "idw",
+    cache_dir: str = CACHE_DIR,
+    weights=None,
+    **params,
+) -> pd.DataFrame:
+    """
+    Valor de cada UF por período: interpola as estações para a grade e faz a
+    média das células da UF ponderada pela área.
+
+    ``matrix`` é estação × período. Retorna período × UF. ``weights`` são os
+    vizinhos e pesos de ``interpolation_weights`` para as células dentro das
+    UFs; quem interpola várias variáveis os calcula uma única vez.
+    """
+    inside = pd.notna(cell_ufs)
+    ufs, cell_codes = np.unique(cell_ufs[inside].astype(str), return_inverse=True)
+
+    # Matriz de pertinência UF × célula com a área de cada célula
+    membership = np.zeros((len(ufs), inside.sum()))
+    membership[cell_codes, np.arange(inside.sum())] = grid["area"].to_numpy()[inside]
+    targets = grid.loc[inside, ["lat", "lon"]].to_numpy()
+
+    def compute(values):
+        neighbours, cell_weights = weights or interpolation_weights(
+            coordinates, targets, method, **params
+        )
+        cells = apply_weights(values, neighbours, cell_weights)
+        observed = ~np.isnan(cells)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return (membership @ np.where(observed, cells, 0.0)) / (
+                membership @ observed
+            )
+
+    geometry_key = combine_fingerprints(
+        fingerprint_object(pd.DataFrame(coordinates, index=matrix.index)),
+        fingerprint_object(grid.assign(UF=cell_ufs.astype(str))),
+        fingerprint_params({"method": method, **params}),
+    )
+    cache_path = os.path.join(cache_dir, f"uf-{variable}-{geometry_key}.joblib")
+    values = _cached_periods(matrix, cache_path, compute)
+    return pd.DataFrame(values.T, index=matrix.columns, columns=ufs)
+
+
+def interpolate_surface(
+    station_values: pd.Series,
+    stations: pd.DataFrame,
+    variable: str,
+    period,
+    method: str = "idw",
+    resolution: float = 0.5,
+    max_distance_km: float = 300.0,
+    cache_dir: str = CACHE_DIR,
+    **params,
+) -> pd.DataFrame:
+    """
+    Superfície interpolada de uma variável em um período (grade lat/lon),
+    guardada em cache por (variável, período). Células a mais de
+    ``max_distance_km`` da estação mais próxima ficam de fora.
+    """
+    try:
+        station_values = station_values.dropna()
+        coordinates = station_coordinates(stations, station_values.index)
+        located = ~np.isnan(coordinates).any(axis=1)
+        station_values, coordinates = station_values[located], coordinates[located]
+
+        grid = build_grid(resolution)
+        chord, _ = spatial.cKDTree(unit_vectors(coordinates)).query(
+            unit_vectors(grid[["lat", "lon"]].to_numpy())
+        )
+        grid = grid[_chord_to_km(chord) <= max_distance_km].reset_index(drop=True)
+        targets = grid[["lat", "lon"]].to_numpy()
+
+        def compute(values):
+            neighbours, weights = interpolation_weights(
+                coordinates, targets, method, **params
+            )
+            return apply_weights(values, neighbours, weights)
+
+        geometry_key = combine_fingerprints(
+            fingerprint_object(pd.DataFrame(coordinates, index=station_values.index)),
+            fingerprint_params(
+                {
+                    "method": method,
+                    "resolution": resolution,
+                    "max_distance_km": max_distance_km,
+                    **params,
+                }
+            ),
+        )
+        cache_path = os.path.join(
+            cache_dir, f"surface-{variable}-{geometry_key}.joblib"
+        )
+        matrix = station_values.to_frame(name=str(period))
+        grid[variable] = _cached_periods(matrix, cache_path, compute)[:, 0]
+        return grid
+    except Exception as e:
+        raise RuntimeError(f"Erro ao interpolar superfície climática: {e}")
+
+
+def interpolate_uf_climate(
+    weather_data: pd.DataFrame,
+    stations: pd.DataFrame,
+    climate_vars=None,
+    method: str = "idw",
+    resolution: float = 0.5,
+    geojson_path: str = GEOJSON_PATH,
+    cache_dir: str = CACHE_DIR,
+) -> pd.DataFrame:
+    """
+    Clima mensal de cada UF ponderado pela área, a partir das médias mensais das
+    estações, no mesmo formato (Região/UF, Ano, Mes) aceito por
+    ``aggregate_weather_by_safra``.
+
+    Sem coordenadas no cadastro, recai na média simples das estações de cada UF.
+    """
+    try:
+        if climate_vars is None:
+            climate_vars = weather_data.select_dtypes(include="float").columns.tolist()
+
+        if not {"LATITUDE", "LONGITUDE"} <= set(stations.columns):
+            return (
+                weather_data.groupby(["Região/UF", "Ano", "Mes"], observed=True)[
+                    climate_vars
+                ]
+                .mean()
+                .reset_index()
+            )
+
+        monthly = weather_data.groupby(["ESTACAO", "Ano", "Mes"], observed=True)[
+            climate_vars
+        ].mean()
+        station_ids = monthly.index.get_level_values("ESTACAO").unique()
+        coordinates = station_coordinates(stations, station_ids)
+        located = ~np.isnan(coordinates).any(axis=1)
+        station_ids, coordinates = station_ids[located], coordinates[located]
+
+        grid = build_grid(resolution)
+        cell_ufs = assign_grid_to_ufs(
+            grid,
+            geojson_path,
+            coordinates,
+            stations["Região/UF"].reindex(station_ids).to_numpy(),
+        )
+
+        # Os pesos dependem só da geometria: os mesmos para todas as variáveis
+        targets = grid.loc[pd.notna(cell_ufs), ["lat", "lon"]].to_numpy()
+        weights = interpolation_weights(coordinates, targets, method)
+
+        frames = []
+        for variable in climate_vars:
+            matrix = monthly[variable].unstack(["Ano", "Mes"]).reindex(station_ids)
+            frames.append(
+                interpolate_to_ufs(
+                    matrix,
+                    coordinates,
+                    grid,
+                    cell_ufs,
+                    variable,
+                    method,
+                    cache_dir,
+                    weights=weights,
+                )
+                .stack()
+                .rename(variable)
+            )
+
+        uf_climate = pd.concat(frames, axis=1).rename_axis(["Ano", "Mes", "Região/UF"])
+        return uf_climate.reset_index()[["Região/UF", "Ano", "Mes"] + climate_vars]
+    except Exception as e:
+        raise RuntimeError(f"Erro ao interpolar clima por UF: {e}")
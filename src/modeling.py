@@ -0,0 +1,238 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed, dump, load
+
+from data_cleaning import aggregate_weather_by_safra
+from fingerprint import combine_fingerprints, fingerprint_frame, fingerprint_params
+from startup import lazy_import
+
+# scikit-learn é importado apenas quando um modelo é treinado ou avaliado
+sklearn_base = lazy_import("sklearn.base")
+ensemble = lazy_import("sklearn.ensemble")
+impute = lazy_import("sklearn.impute")
+linear_model = lazy_import("sklearn.linear_model")
+metrics = lazy_import("sklearn.metrics")
+model_selection = lazy_import("sklearn.model_selection")
+sklearn_pipeline = lazy_import("sklearn.pipeline")
+preprocessing = lazy_import("sklearn.preprocessing")
+
+# Diretório onde os modelos treinados são persistidos
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+MODEL_DIR = os.path.join(BASE_DIR, "data", "models")
+
+# Modelos mantidos em disco; acima disso os usados há mais tempo são removidos
+MAX_MODELS = 20
+
+CLIMATE_VARS = [
+    "temp_max",
+    "temp_avg",
+    "temp_min",
+    "hum_max",
+    "hum_min",
+    "rain_max",
+    "rad_max",
+    "wind_avg",
+    "wind_max",
+]
+
+MODEL_FACTORIES = {
+    "gbr": lambda params: ensemble.HistGradientBoostingRegressor(**params),
+    "ridge": lambda params: sklearn_pipeline.make_pipeline(
+        impute.SimpleImputer(strategy="median"),
+        preprocessing.StandardScaler(),
+        linear_model.Ridge(**params),
+    ),
+}
+
+DEFAULT_PARAMS = {
+    "gbr": {"max_iter": 200, "learning_rate": 0.05, "max_depth": 3},
+    "ridge": {"alpha": 1.0},
+}
+
+
+def build_feature_table(
+    cotton_data: pd.DataFrame,
+    weather_data: pd.DataFrame = None,
+    target: str = "Area_Plantada",
+    lags=(0, 1),
+    climate_vars=None,
+    safra_features=None,
+    safra_climate=None,
+) -> pd.DataFrame:
+    """
+    Monta a tabela de atributos por (UF, safra) com médias climáticas defasadas.
+
+    Cada atributo climático ``var_lagK`` corresponde à média da variável na
+    janela de cultivo da UF ``K`` safras antes da safra alvo. O clima vem de
+    ``safra_climate`` (etapa do pipeline) ou, se omitido, é agregado de
+    ``weather_data`` pelas janelas de cada UF. A área da safra anterior também
+    é incluída. ``safra_features`` (graus-dia, estresse térmico e chuva
+    acumulada por UF e safra, lidos do armazenamento de atributos) entra com as
+    mesmas defasagens.
+    """
+    if safra_climate is None:
+        if weather_data is None or "Região/UF" not in weather_data.columns:
+            raise ValueError("Dados meteorológicos sem a coluna 'Região/UF'.")
+        climate_vars = [
+            col for col in (climate_vars or CLIMATE_VARS) if col in weather_data.columns
+        ]
+        safra_climate = aggregate_weather_by_safra(weather_data, climate_vars)
+
+    climate_vars = [
+        col for col in (climate_vars or CLIMATE_VARS) if col in safra_climate.columns
+    ]
+    climate = safra_climate[climate_vars].sort_index()
+    if safra_features is not None:
+        climate = climate.join(safra_features, how="left")
+
+    # Defasagens calculadas dentro de cada UF
+    lagged = []
+    for lag in lags:
+        shifted = climate.groupby(level="Região/UF").shift(lag) if lag else climate
+        lagged.append(shifted.add_suffix(f"_lag{lag}"))
+    features = pd.concat(lagged, axis=1).reset_index()
+
+    cotton = cotton_data[["Região/UF", "Ano", target]].rename(columns={"Ano": "Safra"})
+    cotton = cotton.sort_values(["Região/UF", "Safra"])
+    cotton[f"{target}_lag1"] = cotton.groupby("Região/UF")[target].shift(1)
+
+    table = cotton.merge(features, on=["Região/UF", "Safra"], how="inner")
+    return table.sort_values(["Safra", "Região/UF"]).reset_index(drop=True)
+
+
+def _fit_fold(estimator, X, y, train_idx, test_idx):
+    """
+    Ajusta o estimador em um fold e retorna as métricas de validação.
+    """
+    model = sklearn_base.clone(estimator)
+    model.fit(X[train_idx], y[train_idx])
+    predicted = model.predict(X[test_idx])
+    return {
+        "mae": metrics.mean_absolute_error(y[test_idx], predicted),
+        "r2": (
+            metrics.r2_score(y[test_idx], predicted) if len(test_idx) > 1 else np.nan
+        ),
+        "n_train": len(train_idx),
+        "n_test": len(test_idx),
+    }
+
+
+def time_series_folds(safras: np.ndarray, n_splits: int = 5):
+    """
+    Gera folds de validação temporal agrupados por safra (sem vazamento de futuro).
+    """
+    unique_safras = np.unique(safras)
+    n_splits = min(n_splits, len(unique_safras) - 1)
+    if n_splits < 2:
+        raise ValueError("Safras insuficientes para validação cruzada temporal.")
+
+    for train_pos, test_pos in model_selection.TimeSeriesSplit(n_splits=n_splits).split(
+        unique_safras
+    ):
+        train_idx = np.flatnonzero(np.isin(safras, unique_safras[train_pos]))
+        test_idx = np.flatnonzero(np.isin(safras, unique_safras[test_pos]))
+        yield train_idx, test_idx
+
+
+def model_cache_key(features: pd.DataFrame, model_name: str, params: dict) -> str:
+    """
+    Chave de cache do modelo: hash dos dados de treino e dos hiperparâmetros.
+    """
+    return combine_fingerprints(
+        fingerprint_frame(features),
+        fingerprint_params({"model": model_name, "params": params}),
+    )
+
+
+def train_yield_model(
+    features: pd.DataFrame,
+    target: str = "Area_Plantada",
+    model_name: str = "gbr",
+    params=None,
+    n_splits: int = 5,
+    n_jobs: int = -1,
+    model_dir: str = MODEL_DIR,
+) -> dict:
+    """
+    Treina (ou carrega do cache) um modelo climático para a variável alvo.
+
+    Os folds de validação temporal são executados em paralelo com joblib e o
+    modelo final, ajustado em todas as safras, é persistido em disco com uma
+    chave derivada dos dados e dos hiperparâmetros.
+    """
+    try:
+        if model_name not in MODEL_FACTORIES:
+            raise ValueError(f"Modelo desconhecido: {model_name}")
+        params = {**DEFAULT_PARAMS[model_name], **(params or {})}
+
+        features = features.dropna(subset=[target])
+        feature_cols = [
+            col for col in features.columns if col not in ("Região/UF", "Safra", target)
+        ]
+
+        key = model_cache_key(features, model_name, params)
+        model_path = os.path.join(model_dir, f"{model_name}-{key}.joblib")
+        if os.path.exists(model_path):
+            os.utime(model_path)  # usado agora: último a ser removido
+            return load(model_path)
+
+        X = features[feature_cols].to_numpy(dtype=float)
+        y = features[target].to_numpy(dtype=float)
+        safras = features["Safra"].to_numpy()
+        estimator = MODEL_FACTORIES[model_name](params)
+
+        start = time.perf_counter()
+        fold_scores = Parallel(n_jobs=n_jobs)(
+            delayed(_fit_fold)(estimator, X, y, train_idx, test_idx)
+            for train_idx, test_idx in time_series_folds(safras, n_splits)
+        )
+
+        final_model = sklearn_base.clone(estimator).fit(X, y)
+        bundle = {
+            "key": key,
+            "model_name": model_name,
+            "params": params,
+            "target": target,
+            "features": feature_cols,
+            "model": final_model,
+            "cv_scores": pd.DataFrame(fold_scores),
+            "train_seconds": time.perf_counter() - start,
+        }
+
+        os.makedirs(model_dir, exist_ok=True)
+        dump(bundle, model_path)
+        evict_models(model_dir)
+        return bundle
+    except Exception as e:
+        raise RuntimeError(f"Erro ao treinar modelo climático: {e}")
+
+
+def evict_models(model_dir: str = MODEL_DIR, max_models: int = MAX_MODELS):
+    """
+    Mantém em disco apenas os ``max_models`` modelos usados mais recentemente.
+    """
+    paths = [
+        os.path.join(model_dir, name)
+        for name in os.listdir(model_dir)
+        if name.endswith(".joblib")
+    ]
+    paths.sort(key=os.path.getmtime, reverse=True)
+    for path in paths[max_models:]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def predict_with_model(bundle: dict, features: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aplica um modelo persistido à tabela de atributos.
+    """
+    predictions = features[["Região/UF", "Safra"]].copy()
+    predictions[f"{bundle['target']}_Predicted"] = bundle["model"].predict(
+        features[bundle["features"]].to_numpy(dtype=float)
+    )
+    return predictions
@@ -0,0 +1,680 @@
+import argparse
+import datetime
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import dump, load
+
+from analysis import (
+    analyze_seasonal_trends,
+    analyze_regional_potential,
+    analyze_climatic_influences,
+    analyze_historical_trends,
+    predict_planted_area,
+)
+from climate_indices import aggregate_indices_by_safra, compute_climate_indices
+from data_cleaning import (
+    load_cotton_metrics,
+    select_cotton_metric,
+    load_weather_data,
+    load_station_metadata,
+    attach_station_uf,
+    aggregate_weather_by_safra,
+    filter_cotton_metrics,
+    filter_station_frame,
+    safra_period,
+    station_partitions,
+)
+from fingerprint import (
+    combine_fingerprints,
+    file_signature,
+    fingerprint_dependencies,
+    fingerprint_file,
+    fingerprint_object,
+    fingerprint_params,
+)
+from features import (
+    aggregate_features_by_safra,
+    build_station_features,
+    load_features,
+)
+from interpolation import interpolate_uf_climate
+from provenance_store import (
+    STORE_PATH,
+    append_records,
+    node,
+    read_records,
+    relation,
+)
+from resampling import regularize_weather_data
+from shared_cache import cached_call
+from sketches import build_weather_sketches, filter_sketches
+from trends import analyze_cotton_trends
+from visualization import save_summary_figures
+from weather_store import build_weather_store, ensure_weather_store, store_grid
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_DIR = os.path.join(BASE_DIR, "data", "raw")
+PIPELINE_DIR = os.path.join(BASE_DIR, "data", "processed", "pipeline")
+FIGURES_DIR = os.path.join(BASE_DIR, "data", "outputs", "figures")
+
+PIPE_AGENT = "pipe:pipeline.py"
+
+# Etapas carregadas pelo painel e arquivos brutos que as determinam
+DASHBOARD_TARGETS = (
+    "cotton_metrics",
+    "weather_data",
+    "stations",
+    "weather_regular",
+    "safra_climate",
+    "safra_features",
+    "cotton_trends",
+    "station_indices",
+    "safra_indices",
+    "weather_sketches",
+)
+DASHBOARD_FILES = (
+    "AlgodoSerieHist.xlsx",
+    "weather_sum_all.csv",
+    "weather_stations_codes.csv",
+)
+
+# Tabelas das estações ordenadas por (estação, data), filtradas por blocos
+STATION_FRAMES = ("weather_data", "weather_regular")
+
+# Agregados do painel por métrica: função e entradas (parâmetro → dado do
+# painel); a métrica é passada como ``metric``
+DASHBOARD_AGGREGATES = {
+    "seasonal_trends": (
+        analyze_seasonal_trends,
+        {"cotton_data": "cotton_data", "weather_data": "weather_regular"},
+    ),
+    "regional_potential": (
+        analyze_regional_potential,
+        {"cotton_data": "cotton_data", "weather_data": "weather_data"},
+    ),
+    "climatic_influences": (
+        analyze_climatic_influences,
+        {
+            "cotton_data": "cotton_data",
+            "weather_data": "weather_data",
+            "safra_climate": "safra_climate",
+            "safra_features": "safra_features",
+            "safra_indices": "safra_indices",
+        },
+    ),
+    "historical_trends": (analyze_historical_trends, {"cotton_data": "cotton_data"}),
+}
+
+
+def stage(func, deps=(), files=None, params=None) -> dict:
+    """
+    Declara uma etapa do pipeline.
+
+    A função recebe, nesta ordem, as saídas das etapas em ``deps``, os caminhos
+    de ``files`` (como argumentos nomeados) e os parâmetros de ``params``.
+    """
+    return {
+        "func": func,
+        "deps": tuple(deps),
+        "files": dict(files or {}),
+        "params": dict(params or {}),
+    }
+
+
+def _regular_weather(weather_data, weather_store, stations=None, **params):
+    """
+    Associa as estações às UFs (quando há cadastro) e regulariza as séries,
+    partindo da grade lida da matriz das estações (memória mapeada), conferida
+    contra a versão gravada pela etapa ``weather_store``.
+    """
+    store = ensure_weather_store(weather_data, weather_store)
+    if stations is not None:
+        weather_data = attach_station_uf(weather_data.copy(deep=False), stations)
+    grid = store_grid(store, params.get("freq", "daily"))
+    return regularize_weather_data(weather_data, stations=stations, grid=grid, **params)
+
+
+def default_stages(data_dir: str = DATA_DIR) -> dict:
+    """
+    DAG padrão do projeto: carga → limpeza → análise → visualização.
+    """
+    stations_path = os.path.join(data_dir, "weather_stations_codes.csv")
+
+    stages = {
+        # Todas as métricas da Conab em uma leitura; as análises usam a área
+        "cotton_metrics": stage(
+            load_cotton_metrics,
+            files={"filepath": os.path.join(data_dir, "AlgodoSerieHist.xlsx")},
+        ),
+        # Tendência e quebras estruturais de todas as séries (UF, métrica)
+        "cotton_trends": stage(analyze_cotton_trends, deps=("cotton_metrics",)),
+        "cotton_data": stage(
+            select_cotton_metric,
+            deps=("cotton_metrics",),
+            params={"metrics": "Area_Plantada"},
+        ),
+        "weather_data": stage(
+            load_weather_data,
+            files={"filepath": os.path.join(data_dir, "weather_sum_all.csv")},
+        ),
+        # Matriz estação × instante por variável, em arquivos de memória mapeada
+        "weather_store": stage(build_weather_store, deps=("weather_data",)),
+    }
+
+    # Séries regularizadas: lacunas curtas interpoladas, depois estações vizinhas
+    # (se houver cadastro com coordenadas) e, por fim, climatologia da estação
+    regular_params = {"freq": "daily", "max_gap": 3}
+    climatic_deps = ("cotton_data", "weather_data")
+    if os.path.exists(stations_path):
+        stages["stations"] = stage(
+            load_station_metadata, files={"filepath": stations_path}
+        )
+        stages["weather_regular"] = stage(
+            _regular_weather,
+            deps=("weather_data", "weather_store", "stations"),
+            params={
+                **regular_params,
+                "methods": ["linear", "neighbours", "climatology"],
+            },
+        )
+        # Clima de cada UF ponderado pela área (interpolação das estações)
+        stages["uf_climate"] = stage(
+            interpolate_uf_climate,
+            deps=("weather_regular", "stations"),
+            params={"method": "idw", "resolution": 0.5},
+        )
+        stages["safra_climate"] = stage(
+            aggregate_weather_by_safra, deps=("uf_climate",)
+        )
+        climatic_deps += ("safra_climate",)
+
+        # Atributos diários das estações (chuva acumulada, graus-dia, estresse
+        # térmico), persistidos por estação/ano, e seus resumos por (UF, safra)
+        stages["station_features"] = stage(
+            build_station_features, deps=("weather_regular",)
+        )
+        stages["safra_features"] = stage(
+            aggregate_features_by_safra, deps=("station_features",)
+        )
+
+        # Índices de extremos (dias secos consecutivos, chuva máxima em 5 dias,
+        # dias acima de 35 °C...) por estação e janela da safra da sua UF
+        stages["station_indices"] = stage(
+            compute_climate_indices,
+            deps=("weather_regular",),
+            params={"period": "safra"},
+        )
+        stages["safra_indices"] = stage(
+            aggregate_indices_by_safra, deps=("station_indices",)
+        )
+
+        # Resumos de quantis por (estação, ano, mês, variável) das medições
+        # originais, mescláveis para qualquer UF, estação do ano ou período
+        stages["weather_sketches"] = stage(
+            build_weather_sketches, deps=("weather_data", "stations")
+        )
+    else:
+        stages["weather_regular"] = stage(
+            _regular_weather,
+            deps=("weather_data", "weather_store"),
+            params={**regular_params, "methods": ["linear", "climatology"]},
+        )
+        stages["weather_sketches"] = stage(
+            build_weather_sketches, deps=("weather_data",)
+        )
+
+    stages.update(
+        {
+            "seasonal_trends": stage(
+                analyze_seasonal_trends, deps=("cotton_data", "weather_regular")
+            ),
+            "regional_potential": stage(
+                analyze_regional_potential, deps=("cotton_data", "weather_data")
+            ),
+            "climatic_influences": stage(
+                analyze_climatic_influences, deps=climatic_deps
+            ),
+            "historical_trends": stage(
+                analyze_historical_trends, deps=("cotton_data",)
+            ),
+            "predicted_areas": stage(
+                predict_planted_area,
+                deps=("historical_trends",),
+                params={"years_to_consider": 10, "forecast_until": 2030},
+            ),
+            "figures": stage(
+                save_summary_figures,
+                deps=("historical_trends", "climatic_influences", "predicted_areas"),
+                params={"output_dir": FIGURES_DIR},
+            ),
+        }
+    )
+    return stages
+
+
+def _resolve_order(stages: dict, targets) -> list:
+    """
+    Ordena topologicamente as etapas necessárias para produzir os alvos.
+    """
+    order, visiting = [], set()
+
+    def visit(name):
+        if name in order:
+            return
+        if name not in stages:
+            raise ValueError(f"Etapa desconhecida: {name}")
+        if name in visiting:
+            raise ValueError(f"Ciclo no pipeline envolvendo a etapa {name}")
+        visiting.add(name)
+        for dep in stages[name]["deps"]:
+            visit(dep)
+        visiting.discard(name)
+        order.append(name)
+
+    for name in targets:
+        visit(name)
+    return order
+
+
+def _provenance_index(records):
+    """
+    Indexa as entidades registradas: saídas por chave de entrada e arquivos por
+    (caminho, assinatura).
+    """
+    outputs, files, agents = {}, {}, set()
+    for record in records:
+        if record["type"] == "agent":
+            agents.add(record["id"])
+        if record["type"] != "entity":
+            continue
+        attrs = record["attrs"]
+        if "pipe:inputsKey" in attrs:
+            outputs[attrs["pipe:inputsKey"]] = {
+                "id": record["id"],
+                "hash": attrs["pipe:outputHash"],
+                "location": attrs["prov:location"],
+            }
+        elif "pipe:sha256" in attrs:
+            key = (attrs["prov:location"], attrs["pipe:signature"])
+            files[key] = {"id": record["id"], "sha": attrs["pipe:sha256"]}
+    return outputs, files, agents
+
+
+def _record_file(records: list, path: str, known_files: dict) -> dict:
+    """
+    Identifica um arquivo de entrada, reaproveitando o hash já registrado quando
+    tamanho e data de modificação não mudaram.
+    """
+    signature = file_signature(path)
+    known = known_files.get((path, signature))
+    if known:
+        return known
+
+    sha = fingerprint_file(path)
+    info = {"id": f"pipe:arquivo-{sha[:16]}", "sha": sha}
+    records.append(
+        node(
+            "entity",
+            info["id"],
+            {
+                "prov:label": os.path.basename(path),
+                "prov:location": path,
+                "pipe:sha256": sha,
+                "pipe:signature": signature,
+            },
+        )
+    )
+    known_files[(path, signature)] = info
+    return info
+
+
+def run_pipeline(
+    stages: dict,
+    targets=None,
+    force: bool = False,
+    store_dir: str = PIPELINE_DIR,
+    provenance_path: str = STORE_PATH,
+):
+    """
+    Executa o DAG de forma incremental, registrando a proveniência de cada etapa.
+
+    A chave de cada etapa combina o código da função e das funções e constantes
+    do projeto que ela usa, os parâmetros, os hashes dos arquivos de entrada e
+    os hashes das saídas das etapas anteriores. Quando o
+    armazenamento de proveniência já contém uma saída gerada com a mesma chave, a
+    etapa é pulada e o artefato persistido é reutilizado (carregado apenas se
+    necessário). Os registros novos são acrescentados em lote ao final da execução.
+
+    Retorna as saídas dos alvos e um relatório da execução.
+    """
+    try:
+        if targets is None:
+            needed = {dep for spec in stages.values() for dep in spec["deps"]}
+            targets = [name for name in stages if name not in needed]
+        order = _resolve_order(stages, targets)
+
+        known_outputs, known_files, agents = _provenance_index(
+            read_records(provenance_path)
+        )
+        records = []
+        if PIPE_AGENT not in agents:
+            records.append(
+                node("agent", PIPE_AGENT, {"prov:type": "prov:SoftwareAgent"})
+            )
+        run_id = datetime.datetime.now().strftime("%Y%m%dT%H%M%S%f")
+        os.makedirs(store_dir, exist_ok=True)
+
+        outputs, locations, hashes, entities, report = {}, {}, {}, {}, []
+
+        def get_output(name):
+            if name not in outputs:
+                outputs[name] = load(locations[name])
+            return outputs[name]
+
+        for name in order:
+            spec = stages[name]
+            files = {
+                param: _record_file(records, path, known_files)
+                for param, path in spec["files"].items()
+            }
+            key = combine_fingerprints(
+                name,
+                fingerprint_dependencies(spec["func"]),
+                fingerprint_params(spec["params"]),
+                *[f"{param}={files[param]['sha']}" for param in sorted(files)],
+                *[hashes[dep] for dep in spec["deps"]],
+            )
+
+            cached = None if force else known_outputs.get(key)
+            if cached and os.path.exists(cached["location"]):
+                hashes[name], locations[name] = cached["hash"], cached["location"]
+                entities[name] = cached["id"]
+                report.append(
+                    {
+                        "Etapa": name,
+                        "Status": "reutilizada",
+                        "Chave": key,
+                        "Segundos": 0.0,
+                    }
+                )
+                continue
+
+            started_at = datetime.datetime.now()
+            start = time.perf_counter()
+            result = spec["func"](
+                *[get_output(dep) for dep in spec["deps"]],
+                **spec["files"],
+                **spec["params"],
+            )
+            elapsed = time.perf_counter() - start
+            ended_at = datetime.datetime.now()
+
+            output_hash = fingerprint_object(result)
+            location = os.path.join(store_dir, f"{name}-{key}.joblib")
+            dump(result, location)
+            outputs[name], hashes[name], locations[name] = result, output_hash, location
+
+            # Registro PROV: atividade, entradas usadas e saída gerada
+            activity = f"pipe:{name}-{run_id}"
+            entity_id = f"pipe:{name}-{key}"
+            records += [
+                node(
+                    "activity",
+                    activity,
+                    {
+                        "prov:label": name,
+                        "pipe:run": run_id,
+                        "pipe:params": json.dumps(spec["params"], default=str),
+                    },
+                    start=started_at,
+                    end=ended_at,
+                ),
+                relation("wasAssociatedWith", activity, PIPE_AGENT),
+                node(
+                    "entity",
+                    entity_id,
+                    {
+                        "prov:label": name,
+                        "pipe:stage": name,
+                        "pipe:inputsKey": key,
+                        "pipe:outputHash": output_hash,
+                        "prov:location": location,
+                    },
+                ),
+                relation("wasGeneratedBy", entity_id, activity, ended_at),
+            ]
+            sources = [info["id"] for info in files.values()]
+            sources += [entities[dep] for dep in spec["deps"]]
+            for source in sources:
+                records.append(relation("used", activity, source, started_at))
+                records.append(relation("wasDerivedFrom", entity_id, source))
+
+            entities[name] = entity_id
+            known_outputs[key] = {
+                "id": entity_id,
+                "hash": output_hash,
+                "location": location,
+            }
+            report.append(
+                {
+                    "Etapa": name,
+                    "Status": "executada",
+                    "Chave": key,
+                    "Segundos": elapsed,
+                }
+            )
+
+        append_records(records, provenance_path)
+
+        return {name: get_output(name) for name in targets}, pd.DataFrame(report)
+    except Exception as e:
+        raise RuntimeError(f"Erro ao executar o pipeline: {e}")
+
+
+def dashboard_key(data_dir: str = DATA_DIR) -> str:
+    """
+    Chave dos dados do painel: hash do conteúdo dos arquivos brutos, igual em
+    todas as réplicas (independe de caminho e data de modificação).
+    """
+    return combine_fingerprints(
+        *[
+            fingerprint_file(os.path.join(data_dir, name))
+            for name in DASHBOARD_FILES
+            if os.path.exists(os.path.join(data_dir, name))
+        ]
+    )
+
+
+def _dashboard_data(data_dir: str) -> dict:
+    """
+    Executa as etapas de carga do pipeline e associa as estações às UFs.
+    """
+    stages = default_stages(data_dir)
+    targets = [name for name in DASHBOARD_TARGETS if name in stages]
+    outputs, _ = run_pipeline(stages, targets=targets)
+
+    if "stations" in outputs:
+        outputs["weather_data"] = attach_station_uf(
+            outputs["weather_data"], outputs["stations"]
+        )
+    data = {name: outputs.get(name) for name in DASHBOARD_TARGETS}
+
+    # Blocos de cada estação, para filtrar estações e períodos sem varreduras
+    data["partitions"] = {
+        name: station_partitions(data[name]) for name in STATION_FRAMES
+    }
+    return data
+
+
+def dashboard_data_key(data_dir: str = DATA_DIR) -> str:
+    """
+    Chave dos dados do painel: conteúdo dos arquivos brutos, código das etapas
+    (e das funções e módulos de que dependem) e alvos carregados.
+    """
+    return combine_fingerprints(
+        dashboard_key(data_dir),
+        fingerprint_dependencies(default_stages),
+        fingerprint_dependencies(_dashboard_data),
+        fingerprint_params(DASHBOARD_TARGETS),
+    )
+
+
+def load_dashboard_data(data_dir: str = DATA_DIR) -> dict:
+    """
+    Dados do painel, lidos do cache compartilhado (calculados por uma única
+    réplica quando ausentes). Inclui a chave ``key`` dos dados.
+    """
+    key = dashboard_data_key(data_dir)
+    data = cached_call("dashboard_data", _dashboard_data, data_dir, key_parts=[key])
+    return {**data, "key": key}
+
+
+def _filter_safra_index(frame, ufs=None, safras=None):
+    """
+    Recorta uma tabela indexada por (Região/UF, Safra).
+    """
+    if frame is None or frame.empty:
+        return frame
+    mask = np.ones(len(frame), dtype=bool)
+    if ufs is not None:
+        mask &= frame.index.get_level_values("Região/UF").isin(ufs)
+    if safras is not None:
+        safra = frame.index.get_level_values("Safra").to_numpy()
+        mask &= (safra >= safras[0]) & (safra <= safras[1])
+    return frame[mask]
+
+
+def filter_dashboard_data(data: dict, ufs=None, stations=None, safras=None) -> dict:
+    """
+    Restringe os dados do painel às UFs, estações e safras [primeira, última].
+
+    Os filtros são aplicados na camada de dados, antes das análises: as tabelas
+    das estações são lidas só nos blocos das estações e no período pedidos, os
+    atributos de estações escolhidas vêm apenas das suas partições
+    (estação, ano) e as tabelas por (UF, safra) são recortadas pelo índice. A
+    chave ``key`` passa a incluir os filtros.
+    """
+    filters = {
+        "ufs": sorted(ufs) if ufs else None,
+        "stations": sorted(map(str, stations)) if stations else None,
+        "safras": [int(safras[0]), int(safras[1])] if safras else None,
+    }
+    if not any(filters.values()):
+        return data
+    try:
+        ufs, stations, safras = filters["ufs"], filters["stations"], filters["safras"]
+        start, end = safra_period(safras) if safras else (None, None)
+
+        # UFs sem estações escolhidas: todas as estações cadastradas nas UFs
+        station_meta = data["stations"]
+        if ufs and not stations and station_meta is not None:
+            in_ufs = station_meta["Região/UF"].isin(ufs)
+            stations = station_meta.index[in_ufs].astype(str).tolist()
+
+        view = {
+            **data,
+            "key": combine_fingerprints(data["key"], fingerprint_params(filters)),
+            "cotton_metrics": filter_cotton_metrics(
+                data["cotton_metrics"], ufs, safras
+            ),
+            "safra_climate": _filter_safra_index(data["safra_climate"], ufs, safras),
+            "safra_features": _filter_safra_index(data["safra_features"], ufs, safras),
+            "safra_indices": _filter_safra_index(data["safra_indices"], ufs, safras),
+        }
+        if data["weather_sketches"] is not None:
+            view["weather_sketches"] = filter_sketches(
+                data["weather_sketches"], stations, start, end
+            )
+        if ufs or safras:
+            view["cotton_trends"] = analyze_cotton_trends(view["cotton_metrics"])
+        for name in STATION_FRAMES:
+            view[name] = filter_station_frame(
+                data[name], stations, start, end, data["partitions"][name]
+            )
+
+        # Estações escolhidas: resumos por safra só com os atributos delas
+        if filters["stations"] and data["safra_features"] is not None:
+            features = load_features(
+                stations=stations,
+                years=range(start.year, end.year + 1) if safras else None,
+            )
+            view["safra_features"] = (
+                _filter_safra_index(aggregate_features_by_safra(features), ufs, safras)
+                if not features.empty
+                else None
+            )
+        if filters["stations"] and data["station_indices"] is not None:
+            indices = data["station_indices"]
+            indices = indices[indices.index.get_level_values("ESTACAO").isin(stations)]
+            view["station_indices"] = indices
+            view["safra_indices"] = (
+                _filter_safra_index(aggregate_indices_by_safra(indices), ufs, safras)
+                if not indices.empty
+                else None
+            )
+        return view
+    except Exception as e:
+        raise RuntimeError(f"Erro ao filtrar os dados do painel: {e}")
+
+
+def dashboard_aggregate(name: str, data: dict, cotton_data, metric: str):
+    """
+    Agregado do painel para a métrica, compartilhado entre as réplicas. A chave
+    inclui o código da função de agregação e das suas dependências.
+    """
+    func, deps = DASHBOARD_AGGREGATES[name]
+    inputs = {**data, "cotton_data": cotton_data}
+    return cached_call(
+        name,
+        func,
+        **{param: inputs[dep] for param, dep in deps.items()},
+        metric=metric,
+        key_parts=[data["key"], fingerprint_dependencies(func), metric],
+    )
+
+
+def warm_start(data_dir: str = DATA_DIR, metrics=None) -> dict:
+    """
+    Preenche o cache compartilhado na inicialização do contêiner: dados do painel
+    e agregados das métricas informadas. Réplicas que sobem juntas aguardam a
+    primeira em vez de repetir o cálculo.
+    """
+    data = load_dashboard_data(data_dir)
+    for metric in metrics or ["Area_Plantada"]:
+        cotton_data = select_cotton_metric(data["cotton_metrics"], metric)
+        for name in DASHBOARD_AGGREGATES:
+            dashboard_aggregate(name, data, cotton_data, metric)
+    return data
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pipeline de análise do algodão")
+    parser.add_argument(
+        "--warm",
+        nargs="*",
+        metavar="METRICA",
+        help="apenas preenche o cache compartilhado do painel (métricas opcionais)",
+    )
+    args = parser.parse_args()
+
+    if args.warm is not None:
+        warm_start(metrics=args.warm)
+        print(f"Cache do painel preenchido para: {args.warm or ['Area_Plantada']}")
+    else:
+        stages = default_stages()
+        results, run_report = run_pipeline(stages, targets=list(stages))
+        print(run_report)
+        # Relatórios gerados pelas etapas de carga e atualização
+        for name, attr in (
+            ("weather_data", "validation"),
+            ("station_features", "store_report"),
+        ):
+            report = pd.DataFrame(results.get(name, pd.DataFrame()).attrs.get(attr, []))
+            if not report.empty:
+                print(f"Relatório de {name}:")
+                print(report.drop(columns="Exemplos", errors="ignore"))
+        print(f"Proveniência registrada em: {STORE_PATH}")
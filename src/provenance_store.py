@@ -0,0 +1,183 @@
+import datetime
+import json
+import os
+from collections import defaultdict, deque
+
+from prov.model import ProvDocument
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+STORE_PATH = os.path.join(BASE_DIR, "data", "outputs", "pipeline_provenance.jsonl")
+GRAPH_PATH = os.path.join(BASE_DIR, "data", "outputs", "pipeline_provenance.png")
+
+PIPE_NAMESPACE = "https://www.ufrj.br/algodao/pipeline#"
+
+# Tipos de registro: nós e relações (origem → destino aponta sempre "para trás"
+# na linhagem, da coisa derivada para aquilo de que ela depende)
+NODE_TYPES = ("entity", "activity", "agent")
+RELATION_TYPES = ("used", "wasGeneratedBy", "wasDerivedFrom", "wasAssociatedWith")
+
+
+def node(kind: str, identifier: str, attrs=None, start=None, end=None) -> dict:
+    """
+    Cria um registro de nó PROV (entidade, atividade ou agente).
+    """
+    record = {"type": kind, "id": identifier, "attrs": attrs or {}}
+    if start is not None:
+        record["start"] = _isoformat(start)
+    if end is not None:
+        record["end"] = _isoformat(end)
+    return record
+
+
+def relation(kind: str, source: str, target: str, time=None) -> dict:
+    """
+    Cria um registro de relação PROV entre dois nós.
+    """
+    record = {"type": kind, "source": source, "target": target}
+    if time is not None:
+        record["time"] = _isoformat(time)
+    return record
+
+
+def _isoformat(value) -> str:
+    """
+    Converte datas para texto ISO 8601 (comparável como string).
+    """
+    return value.isoformat() if isinstance(value, datetime.datetime) else str(value)
+
+
+def append_records(records, path: str = STORE_PATH):
+    """
+    Acrescenta registros ao final do armazenamento (uma linha JSON por registro),
+    em uma única escrita.
+    """
+    if not records:
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    lines = [
+        json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+        for record in records
+    ]
+    with open(path, "a", encoding="utf-8") as file:
+        file.write("\n".join(lines) + "\n")
+
+
+def read_records(path: str = STORE_PATH) -> list:
+    """
+    Lê todos os registros do armazenamento.
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def select_subgraph(
+    records, roots=None, direction: str = "ancestors", start=None, end=None
+) -> list:
+    """
+    Seleciona parte do grafo de proveniência.
+
+    ``roots`` limita o grafo à linhagem (ancestrais ou descendentes) dos nós
+    informados; ``start``/``end`` limitam às atividades da janela de tempo e aos
+    nós ligados a elas.
+    """
+    nodes = {}
+    for record in records:
+        if record["type"] in NODE_TYPES:
+            nodes.setdefault(record["id"], record)
+    relations = [record for record in records if record["type"] in RELATION_TYPES]
+
+    selected = set(nodes)
+    if start is not None or end is not None:
+        start, end = _isoformat(start or ""), _isoformat(end or "9999")
+        in_window = {
+            identifier
+            for identifier, record in nodes.items()
+            if record["type"] == "activity" and start <= record.get("start", "") <= end
+        }
+        selected = set(in_window)
+        for record in relations:
+            if record["source"] in in_window or record["target"] in in_window:
+                selected.update((record["source"], record["target"]))
+
+    if roots is not None:
+        adjacency = defaultdict(list)
+        for record in relations:
+            if direction == "ancestors":
+                adjacency[record["source"]].append(record["target"])
+            else:
+                adjacency[record["target"]].append(record["source"])
+
+        reached, queue = set(roots), deque(roots)
+        while queue:
+            for neighbour in adjacency[queue.popleft()]:
+                if neighbour not in reached:
+                    reached.add(neighbour)
+                    queue.append(neighbour)
+        selected &= reached
+
+    return [nodes[identifier] for identifier in nodes if identifier in selected] + [
+        record
+        for record in relations
+        if record["source"] in selected and record["target"] in selected
+    ]
+
+
+def to_prov_document(records) -> ProvDocument:
+    """
+    Converte registros do armazenamento em um documento PROV (para exportar em
+    PROV-N/PROV-JSON ou desenhar o grafo).
+    """
+    doc = ProvDocument()
+    doc.add_namespace("pipe", PIPE_NAMESPACE)
+
+    for record in records:
+        kind = record["type"]
+        if kind == "entity":
+            doc.entity(record["id"], record["attrs"])
+        elif kind == "activity":
+            doc.activity(
+                record["id"], record.get("start"), record.get("end"), record["attrs"]
+            )
+        elif kind == "agent":
+            doc.agent(record["id"], record["attrs"])
+        elif kind == "used":
+            doc.used(record["source"], record["target"], record.get("time"))
+        elif kind == "wasGeneratedBy":
+            doc.wasGeneratedBy(record["source"], record["target"], record.get("time"))
+        elif kind == "wasDerivedFrom":
+            doc.wasDerivedFrom(record["source"], record["target"])
+        elif kind == "wasAssociatedWith":
+            doc.wasAssociatedWith(record["source"], record["target"])
+    return doc
+
+
+def render_subgraph(records, output_path: str = GRAPH_PATH, **selection) -> str:
+    """
+    Desenha (PNG) apenas o subgrafo selecionado, evitando renderizar todo o
+    histórico de execuções com o Graphviz.
+    """
+    try:
+        from prov.dot import prov_to_dot  # requer pydot e Graphviz
+
+        subgraph = select_subgraph(records, **selection)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        prov_to_dot(to_prov_document(subgraph)).write_png(output_path)
+        return output_path
+    except Exception as e:
+        raise RuntimeError(f"Erro ao gerar gráfico de proveniência: {e}")
+
+
+if __name__ == "__main__":
+    all_records = read_records()
+    activities = [record for record in all_records if record["type"] == "activity"]
+    if activities:
+        # Desenhar apenas a última execução do pipeline
+        last_run = activities[-1]["attrs"].get("pipe:run")
+        run_start = min(
+            record["start"]
+            for record in activities
+            if record["attrs"].get("pipe:run") == last_run
+        )
+        print(f"Gráfico gerado em: {render_subgraph(all_records, start=run_start)}")
@@ -0,0 +1,185 @@
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+# Safras mais recentes consideradas no ranking, peso da tendência no escore e
+# tamanho dos blocos de safras reamostrados
+RANKING_WINDOW = 10
+TREND_WEIGHT = 1.0
+BLOCK_SIZE = 3
+
+# Reamostragens, reamostragens por lote e posições consideradas "topo"
+N_RESAMPLES = 2000
+BATCH_SIZE = 250
+TOP_K = 5
+
+# Abaixo deste número de reamostragens os lotes rodam em série: cada lote leva
+# poucos milissegundos, menos que o custo de distribuí-los
+PARALLEL_MIN_RESAMPLES = 20_000
+
+
+def ranking_matrix(cotton_data: pd.DataFrame, metric: str, window=None):
+    """
+    Matriz UF × safra da métrica na janela [primeira, última] (padrão: as
+    ``RANKING_WINDOW`` safras mais recentes). Os agregados regionais da Conab
+    ficam de fora: apenas siglas de UF competem no ranking.
+    """
+    data = cotton_data[cotton_data["Região/UF"].astype(str).str.len() == 2]
+    safras = data["Ano"].to_numpy()
+    if window is None:
+        window = (int(safras.max()) - RANKING_WINDOW + 1, int(safras.max()))
+    data = data[(safras >= window[0]) & (safras <= window[1])]
+    matrix = data.pivot_table(
+        index="Região/UF", columns="Ano", values=metric, aggfunc="first"
+    )
+    return matrix.reindex(columns=range(window[0], window[1] + 1)).astype(float)
+
+
+def regional_scores(values, years, end, trend_weight: float = TREND_WEIGHT):
+    """
+    Escore de cada UF: média da janela mais ``trend_weight`` vezes a tendência
+    (mínimos quadrados) projetada até a última safra. Com peso 1 é o valor da
+    reta ajustada na última safra; com peso 0, a média da janela.
+
+    Aceita lotes (``values`` e ``years`` com dimensões iniciais extras, anos no
+    último eixo); ausentes são ignorados.
+    """
+    valid = ~np.isnan(values)
+    count = valid.sum(axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_y = np.where(valid, values, 0.0).sum(axis=-1) / count
+        mean_t = np.where(valid, years, 0.0).sum(axis=-1) / count
+        dt = np.where(valid, years - mean_t[..., None], 0.0)
+        dy = np.where(valid, values - mean_y[..., None], 0.0)
+        slope = (dt * dy).sum(axis=-1) / (dt**2).sum(axis=-1)
+    slope = np.where(count >= 2, slope, 0.0)
+    return mean_y + trend_weight * slope * (end - mean_t)
+
+
+def _ranks(scores: np.ndarray) -> np.ndarray:
+    """
+    Posição (1 = maior escore) de cada UF no último eixo; UFs sem escore
+    ficam no fim.
+    """
+    order = np.argsort(np.where(np.isnan(scores), np.inf, -scores), axis=-1)
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(1, scores.shape[-1] + 1), axis=-1)
+    return ranks
+
+
+def _block_indices(rng, n_samples: int, n_years: int, block_size: int):
+    """
+    Posições das safras de cada reamostragem por blocos móveis: blocos de
+    ``block_size`` safras consecutivas, com inícios sorteados, até completar
+    a janela.
+    """
+    block_size = min(block_size, n_years)
+    n_blocks = -(-n_years // block_size)
+    starts = rng.integers(0, n_years - block_size + 1, size=(n_samples, n_blocks))
+    positions = starts[:, :, None] + np.arange(block_size)
+    return positions.reshape(n_samples, -1)[:, :n_years]
+
+
+def _bootstrap_batch(values, years, end, n_samples, block_size, trend_weight, seed):
+    """
+    Contagem de posições (UF × posição) de um lote de reamostragens, calculado
+    de uma vez com indexação em bloco.
+    """
+    rng = np.random.default_rng(seed)
+    positions = _block_indices(rng, n_samples, values.shape[1], block_size)
+    # As mesmas safras para todas as UFs: preserva a correlação entre elas
+    sampled = values[:, positions].transpose(1, 0, 2)
+    scores = regional_scores(sampled, years[positions][:, None, :], end, trend_weight)
+    ranks = _ranks(scores)
+    n_ufs = values.shape[0]
+    counts = np.zeros((n_ufs, n_ufs), dtype=np.int64)
+    np.add.at(counts, (np.broadcast_to(np.arange(n_ufs), ranks.shape), ranks - 1), 1)
+    return counts
+
+
+def bootstrap_rankings(
+    cotton_data: pd.DataFrame,
+    metric: str = "Area_Plantada",
+    window=None,
+    n_resamples: int = N_RESAMPLES,
+    block_size: int = BLOCK_SIZE,
+    trend_weight: float = TREND_WEIGHT,
+    top_k: int = TOP_K,
+    n_jobs: int = -1,
+    seed: int = 0,
+) -> dict:
+    """
+    Ranking das UFs na janela de safras com a sua estabilidade por bootstrap
+    em blocos móveis.
+
+    O escore combina nível e tendência (``regional_scores``). As safras da
+    janela são reamostradas em blocos (preservando a autocorrelação) e as
+    reamostragens são processadas em lotes vetorizados; a partir de
+    ``PARALLEL_MIN_RESAMPLES`` os lotes são distribuídos entre threads (o
+    NumPy libera o GIL). Cada lote tem sua semente, de modo que o resultado não
+    depende do número de threads.
+
+    Retorna o resumo por UF (escore, posição, posição mediana, intervalo de 95%
+    e probabilidades de ficar em primeiro e entre as ``top_k``) e a
+    distribuição UF × posição.
+    """
+    try:
+        start = time.perf_counter()
+        matrix = ranking_matrix(cotton_data, metric, window)
+        matrix = matrix[matrix.notna().any(axis=1)]
+        values = matrix.to_numpy()
+        years = matrix.columns.to_numpy(dtype=float)
+        end = years[-1]
+
+        scores = regional_scores(values, years, end, trend_weight)
+        batches = [
+            min(BATCH_SIZE, n_resamples - first)
+            for first in range(0, n_resamples, BATCH_SIZE)
+        ]
+        seeds = np.random.SeedSequence(seed).spawn(len(batches))
+        if n_resamples < PARALLEL_MIN_RESAMPLES:
+            n_jobs = 1
+        counts = Parallel(
+            n_jobs=min(n_jobs, len(batches)) if n_jobs > 0 else n_jobs,
+            prefer="threads",
+        )(
+            delayed(_bootstrap_batch)(
+                values, years, end, size, block_size, trend_weight, batch_seed
+            )
+            for size, batch_seed in zip(batches, seeds)
+        )
+        counts = np.sum(counts, axis=0)
+
+        # Quantis da posição a partir da distribuição acumulada
+        positions = np.arange(1, len(matrix) + 1)
+        cumulative = np.cumsum(counts, axis=1) / n_resamples
+
+        def quantile(q):
+            return positions[np.argmax(cumulative >= q - 1e-12, axis=1)]
+
+        summary = pd.DataFrame(
+            {
+                "Escore": scores,
+                "Posição": _ranks(scores),
+                "Posição mediana": quantile(0.5),
+                "IC 2,5%": quantile(0.025),
+                "IC 97,5%": quantile(0.975),
+                "P(1º)": counts[:, 0] / n_resamples,
+                f"P(top {top_k})": counts[:, :top_k].sum(axis=1) / n_resamples,
+            },
+            index=matrix.index,
+        ).sort_values("Posição")
+        distribution = pd.DataFrame(
+            counts / n_resamples, index=matrix.index, columns=positions
+        ).loc[summary.index]
+        return {
+            "summary": summary,
+            "distribution": distribution,
+            "window": (int(matrix.columns[0]), int(matrix.columns[-1])),
+            "n_resamples": n_resamples,
+            "seconds": time.perf_counter() - start,
+        }
+    except Exception as e:
+        raise RuntimeError(f"Erro ao avaliar a estabilidade do ranking: {e}")
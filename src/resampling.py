@@ -0,0 +1,383 @@
+import numpy as np
+import pandas as pd
+
+from data_cleaning import COVERAGE_COLUMN, derive_calendar
+from startup import lazy_import
+
+spatial = lazy_import("scipy.spatial")
+
+# Unidade numpy (datetime64) de cada grade regular
+FREQUENCIES = {"hourly": "h", "daily": "D", "monthly": "M"}
+
+FILL_METHODS = ("linear", "neighbours", "climatology")
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def station_timestamps(weather_data: pd.DataFrame):
+    """
+    Instante de cada registro (data e, quando existir, hora UTC) e a unidade da
+    medição original ("h" para dados horários, "D" para diários).
+    """
+    if "DATA" in weather_data.columns:
+        timestamps = weather_data["DATA"].to_numpy(dtype="datetime64[ns]")
+    else:
+        timestamps = pd.to_datetime(
+            weather_data["DATA (YYYY-MM-DD)"], format="%Y-%m-%d"
+        ).to_numpy()
+
+    if "HORA (UTC)" not in weather_data.columns:
+        return timestamps, "D"
+
+    # Horas no formato do INMET ("0000 UTC" ou "00:00"): os dois primeiros dígitos
+    hours = pd.to_numeric(
+        weather_data["HORA (UTC)"].astype(str).str[:2], errors="coerce"
+    )
+    hours = hours.fillna(0).to_numpy(dtype=np.int64)
+    return timestamps + hours.astype("timedelta64[h]"), "h"
+
+
+def resample_stations(
+    weather_data: pd.DataFrame, freq: str = "daily", climate_vars=None
+) -> dict:
+    """
+    Regulariza as séries de todas as estações em uma grade estação × período.
+
+    Os registros são acumulados em uma única passada (``np.bincount`` sobre o
+    índice achatado estação × período) e a cobertura de cada célula é a fração
+    das medições esperadas no período que de fato existem (ex.: 20 de 31 dias).
+    """
+    try:
+        if freq not in FREQUENCIES:
+            raise ValueError(f"Frequência desconhecida: {freq}")
+        unit = FREQUENCIES[freq]
+        if climate_vars is None:
+            climate_vars = [
+                col
+                for col in weather_data.select_dtypes(include="float").columns
+                if col != COVERAGE_COLUMN
+            ]
+
+        timestamps, base_unit = station_timestamps(weather_data)
+        if unit == "h" and base_unit != "h":
+            raise ValueError("Dados diários não podem ser regularizados por hora.")
+
+        periods_raw = timestamps.astype(f"datetime64[{unit}]")
+        valid = ~np.isnat(periods_raw)
+        station_codes, stations = pd.factorize(weather_data["ESTACAO"])
+        valid &= station_codes >= 0
+
+        first, last = periods_raw[valid].min(), periods_raw[valid].max()
+        periods = np.arange(first, last + 1)
+        n_stations, n_periods = len(stations), len(periods)
+
+        flat = station_codes[valid] * n_periods + (periods_raw[valid] - first).astype(
+            np.int64
+        )
+        raw_values = weather_data[climate_vars].to_numpy(dtype=float)[valid]
+
+        # Medições esperadas por período na unidade original (ex.: dias do mês)
+        edges = np.append(periods, periods[-1] + 1).astype(f"datetime64[{base_unit}]")
+        expected = np.diff(edges).astype(np.int64)
+
+        shape = (n_stations, n_periods, len(climate_vars))
+        values = np.empty(shape, dtype=np.float32)
+        coverage = np.empty(shape, dtype=np.float32)
+        for j in range(len(climate_vars)):
+            observed = ~np.isnan(raw_values[:, j])
+            counts = np.bincount(
+                flat, weights=observed, minlength=n_stations * n_periods
+            )
+            sums = np.bincount(
+                flat,
+                weights=np.where(observed, raw_values[:, j], 0.0),
+                minlength=n_stations * n_periods,
+            )
+            with np.errstate(invalid="ignore", divide="ignore"):
+                values[:, :, j] = (sums / counts).reshape(n_stations, n_periods)
+            coverage[:, :, j] = np.minimum(
+                counts.reshape(n_stations, n_periods) / expected, 1.0
+            )
+
+        return {
+            "values": values,
+            "coverage": coverage,
+            "filled": np.zeros(shape, dtype=bool),
+            "stations": pd.Index(stations, name="ESTACAO"),
+            "periods": pd.DatetimeIndex(periods.astype("datetime64[ns]")),
+            "vars": list(climate_vars),
+            "freq": freq,
+        }
+    except Exception as e:
+        raise RuntimeError(f"Erro ao regularizar séries das estações: {e}")
+
+
+def _active_span(coverage: np.ndarray) -> np.ndarray:
+    """
+    Máscara estação × período entre a primeira e a última medição de cada
+    estação (lacunas antes da instalação ou após a desativação não são
+    preenchidas).
+    """
+    observed = (coverage > 0).any(axis=2)
+    started = np.maximum.accumulate(observed, axis=1)
+    not_ended = np.maximum.accumulate(observed[:, ::-1], axis=1)[:, ::-1]
+    return started & not_ended
+
+
+def _fill_linear(series: np.ndarray, max_gap=None):
+    """
+    Interpolação linear no tempo de uma matriz estação × período, vetorizada
+    sobre todas as estações. Só preenche lacunas internas de até ``max_gap``
+    períodos.
+    """
+    n_periods = series.shape[1]
+    positions = np.arange(n_periods, dtype=np.int32)[None, :]
+    valid = ~np.isnan(series)
+
+    previous = np.maximum.accumulate(np.where(valid, positions, -1), axis=1)
+    following = np.minimum.accumulate(
+        np.where(valid, positions, n_periods)[:, ::-1], axis=1
+    )[:, ::-1]
+
+    gap = ~valid & (previous >= 0) & (following < n_periods)
+    if max_gap is not None:
+        gap &= following - previous - 1 <= max_gap
+
+    previous = np.where(gap, previous, 0)
+    following = np.where(gap, following, 1)
+    before = np.take_along_axis(series, previous, axis=1)
+    after = np.take_along_axis(series, following, axis=1)
+    weight = (positions - previous) / (following - previous)
+    return np.where(gap, before + (after - before) * weight, series), gap
+
+
+def _fill_climatology(series: np.ndarray, season_keys: np.ndarray):
+    """
+    Preenche com a média da própria estação no mesmo período do ano (mês, ou
+    mês e hora para dados horários).
+    """
+    n_stations, n_periods = series.shape
+    n_keys = season_keys.max() + 1
+    flat = (np.arange(n_stations)[:, None] * n_keys + season_keys[None, :]).ravel()
+
+    observed = ~np.isnan(series).ravel()
+    sums = np.bincount(
+        flat,
+        weights=np.where(observed, series.ravel(), 0.0),
+        minlength=n_stations * n_keys,
+    )
+    counts = np.bincount(flat, weights=observed, minlength=n_stations * n_keys)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        climatology = (sums / counts).reshape(n_stations, n_keys)
+
+    expected = climatology[:, season_keys]
+    gap = np.isnan(series) & ~np.isnan(expected)
+    return np.where(gap, expected, series), gap
+
+
+def station_coordinates(stations: pd.DataFrame, station_index) -> np.ndarray:
+    """
+    Coordenadas (latitude, longitude) das estações na ordem de ``station_index``;
+    estações sem cadastro ficam com NaN.
+    """
+    coordinates = stations.reindex(station_index)[["LATITUDE", "LONGITUDE"]]
+    return coordinates.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+
+
+def unit_vectors(coordinates: np.ndarray) -> np.ndarray:
+    """
+    Converte (latitude, longitude) em vetores unitários 3D, de modo que a
+    distância euclidiana (corda) cresça com a distância sobre a esfera.
+    """
+    lat, lon = np.radians(coordinates[:, 0]), np.radians(coordinates[:, 1])
+    return np.column_stack(
+        [np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)]
+    )
+
+
+def _neighbour_weights(coordinates: np.ndarray, k: int, max_distance_km: float):
+    """
+    Vizinhos mais próximos de cada estação (consulta em KD-tree) e pesos pelo
+    inverso do quadrado da distância.
+    """
+    n_stations = len(coordinates)
+    located = np.flatnonzero(~np.isnan(coordinates).any(axis=1))
+    neighbours = np.zeros((n_stations, k), dtype=np.int64)
+    weights = np.zeros((n_stations, k))
+    if len(located) < 2:
+        return neighbours, weights
+
+    points = unit_vectors(coordinates[located])
+    chord = 2 * np.sin(max_distance_km / (2 * EARTH_RADIUS_KM))
+    k_query = min(k + 1, len(located))
+    distances, positions = spatial.cKDTree(points).query(
+        points, k=k_query, distance_upper_bound=chord
+    )
+
+    # A primeira resposta é a própria estação
+    distances, positions = distances[:, 1:], positions[:, 1:]
+    found = np.isfinite(distances)
+    neighbours[located, : k_query - 1] = located[np.where(found, positions, 0)]
+    weights[located, : k_query - 1] = np.where(
+        found, 1.0 / np.maximum(distances, 1e-9) ** 2, 0.0
+    )
+    return neighbours, weights
+
+
+def _fill_neighbours(series: np.ndarray, neighbours, weights):
+    """
+    Preenche com a média ponderada pela distância das estações vizinhas que
+    têm medição no mesmo período.
+    """
+    total = np.zeros(series.shape)
+    weight_sum = np.zeros(series.shape)
+    for j in range(neighbours.shape[1]):
+        values = series[neighbours[:, j]]
+        available = ~np.isnan(values) & (weights[:, j, None] > 0)
+        total += np.where(available, values, 0.0) * weights[:, j, None]
+        weight_sum += available * weights[:, j, None]
+
+    gap = np.isnan(series) & (weight_sum > 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(gap, total / weight_sum, series), gap
+
+
+def fill_gaps(
+    grid: dict,
+    methods=("linear",),
+    coordinates=None,
+    max_gap=None,
+    k: int = 4,
+    max_distance_km: float = 150.0,
+) -> dict:
+    """
+    Preenche as lacunas da grade aplicando os métodos na ordem informada:
+    ``linear`` (interpolação no tempo), ``neighbours`` (estações vizinhas via
+    KD-tree, requer ``coordinates``) e ``climatology`` (média da estação no
+    mesmo período do ano).
+
+    Apenas o intervalo de operação de cada estação é preenchido; a cobertura
+    continua refletindo só as medições originais e a máscara ``filled`` indica
+    os valores imputados.
+    """
+    try:
+        methods = [methods] if isinstance(methods, str) else list(methods)
+        unknown = set(methods) - set(FILL_METHODS)
+        if unknown:
+            raise ValueError(f"Métodos de preenchimento desconhecidos: {unknown}")
+        if "neighbours" in methods and coordinates is None:
+            raise ValueError(
+                "O método 'neighbours' requer as coordenadas das estações."
+            )
+
+        values = grid["values"].copy()
+        filled = grid["filled"].copy()
+        active = _active_span(grid["coverage"])
+
+        periods = grid["periods"]
+        season_keys = periods.month.to_numpy() - 1
+        if grid["freq"] == "hourly":
+            season_keys = season_keys * 24 + periods.hour.to_numpy()
+
+        if "neighbours" in methods:
+            neighbours, weights = _neighbour_weights(coordinates, k, max_distance_km)
+
+        for j in range(values.shape[2]):
+            series = values[:, :, j].astype(float)
+            for method in methods:
+                if method == "linear":
+                    series, gap = _fill_linear(series, max_gap)
+                elif method == "neighbours":
+                    series, gap = _fill_neighbours(series, neighbours, weights)
+                else:
+                    series, gap = _fill_climatology(series, season_keys)
+
+                # Desfazer o que foi preenchido fora do período de operação
+                series[gap & ~active] = np.nan
+                filled[:, :, j] |= gap & active
+
+            values[:, :, j] = series
+
+        return {**grid, "values": values, "filled": filled}
+    except Exception as e:
+        raise RuntimeError(f"Erro ao preencher lacunas: {e}")
+
+
+def coverage_report(grid: dict) -> pd.DataFrame:
+    """
+    Cobertura observada e fração imputada de cada variável por estação, no
+    período de operação da estação.
+    """
+    active = _active_span(grid["coverage"])[:, :, None]
+    n_active = np.maximum(active.sum(axis=1), 1)
+    coverage = (grid["coverage"] * active).sum(axis=1) / n_active
+    filled = (grid["filled"] & active).sum(axis=1) / n_active
+    return pd.concat(
+        [
+            pd.DataFrame(coverage, index=grid["stations"], columns=grid["vars"]),
+            pd.DataFrame(filled, index=grid["stations"], columns=grid["vars"]),
+        ],
+        axis=1,
+        keys=["Cobertura", "Preenchido"],
+    )
+
+
+def grid_to_frame(grid: dict) -> pd.DataFrame:
+    """
+    Converte a grade em tabela longa (uma linha por estação e período de
+    operação), com as colunas de calendário e a cobertura média das variáveis.
+    """
+    n_stations, n_periods, n_vars = grid["values"].shape
+    active = _active_span(grid["coverage"]).ravel()
+
+    frame = pd.DataFrame(
+        grid["values"].reshape(-1, n_vars)[active].astype(float),
+        columns=grid["vars"],
+    )
+    frame.insert(
+        0, "ESTACAO", np.repeat(grid["stations"].to_numpy(), n_periods)[active]
+    )
+    frame.insert(1, "DATA", np.tile(grid["periods"].to_numpy(), n_stations)[active])
+    frame[COVERAGE_COLUMN] = grid["coverage"].mean(axis=2).ravel()[active].astype(float)
+
+    calendar = derive_calendar(frame["DATA"])
+    for col in calendar.columns:
+        frame[col] = calendar[col]
+    return frame
+
+
+def regularize_weather_data(
+    weather_data: pd.DataFrame,
+    freq: str = "daily",
+    methods=("linear", "climatology"),
+    stations=None,
+    max_gap=None,
+    grid=None,
+) -> pd.DataFrame:
+    """
+    Regulariza e preenche as séries de todas as estações e retorna a tabela
+    longa com a coluna de cobertura, pronta para as agregações por safra.
+
+    ``grid`` permite partir de uma grade já montada (ex.: ``store_grid`` da
+    matriz das estações) em vez de reagrupar ``weather_data``.
+    """
+    if grid is None:
+        grid = resample_stations(weather_data, freq)
+
+    coordinates = None
+    if stations is not None and {"LATITUDE", "LONGITUDE"} <= set(stations.columns):
+        coordinates = station_coordinates(stations, grid["stations"])
+    elif "neighbours" in methods:
+        methods = [method for method in methods if method != "neighbours"]
+
+    frame = grid_to_frame(
+        fill_gaps(grid, methods, coordinates=coordinates, max_gap=max_gap)
+    )
+
+    # Manter a UF de cada estação, quando já associada
+    if "Região/UF" in weather_data.columns:
+        station_uf = weather_data.drop_duplicates("ESTACAO").set_index("ESTACAO")[
+            "Região/UF"
+        ]
+        frame["Região/UF"] = frame["ESTACAO"].map(station_uf)
+    return frame
@@ -0,0 +1,166 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from data_cleaning import COVERAGE_COLUMN, join_safra_climate
+
+# Variáveis afetadas por cada tipo de perturbação
+TEMPERATURE_VARS = ["temp_max", "temp_avg", "temp_min"]
+RAIN_VARS = ["rain_max"]
+
+
+def fit_climate_response(
+    cotton_data: pd.DataFrame,
+    safra_climate: pd.DataFrame,
+    target: str = "Area_Plantada",
+    climate_vars=None,
+    alpha: float = 1.0,
+) -> dict:
+    """
+    Ajusta a relação clima → área plantada com efeitos fixos por UF.
+
+    O modelo é linear (regressão Ridge sobre variáveis padronizadas e centradas
+    dentro de cada UF), o que permite avaliar qualquer número de cenários com
+    operações matriciais sobre o clima de referência.
+    """
+    try:
+        climate_vars = climate_vars or [
+            col for col in safra_climate.columns if col != COVERAGE_COLUMN
+        ]
+        combined = join_safra_climate(cotton_data, safra_climate).dropna(
+            subset=climate_vars + [target]
+        )
+        if combined.empty:
+            raise ValueError("Sem safras em comum entre algodão e clima.")
+
+        uf = combined["Região/UF"]
+        X = combined[climate_vars]
+        y = combined[target]
+
+        # Centralizar dentro de cada UF (efeitos fixos) e padronizar
+        X_within = X - X.groupby(uf).transform("mean")
+        y_within = y - y.groupby(uf).transform("mean")
+        scale = X_within.std(ddof=0).replace(0, 1).to_numpy()
+        Xs = X_within.to_numpy() / scale
+
+        gram = Xs.T @ Xs + alpha * np.eye(len(climate_vars))
+        coef = np.linalg.solve(gram, Xs.T @ y_within.to_numpy()) / scale
+
+        intercepts = y.groupby(uf).mean() - X.groupby(uf).mean().to_numpy() @ coef
+
+        # Clima de referência em formato de cubo (UF × safra × variável)
+        ufs = intercepts.index.tolist()
+        baseline = safra_climate.loc[
+            safra_climate.index.isin(ufs, level=0), climate_vars
+        ]
+        safras = sorted(baseline.index.get_level_values("Safra").unique())
+        full_index = pd.MultiIndex.from_product(
+            [ufs, safras], names=baseline.index.names
+        )
+        climate_cube = (
+            baseline.reindex(full_index)
+            .to_numpy()
+            .reshape(len(ufs), len(safras), len(climate_vars))
+        )
+
+        return {
+            "target": target,
+            "vars": climate_vars,
+            "coef": pd.Series(coef, index=climate_vars),
+            "intercepts": intercepts,
+            "ufs": ufs,
+            "safras": safras,
+            "climate_cube": climate_cube,
+        }
+    except Exception as e:
+        raise RuntimeError(f"Erro ao ajustar resposta climática: {e}")
+
+
+def build_scenario_grid(ufs, temp_deltas=(0.0,), rain_factors=(1.0,)) -> pd.DataFrame:
+    """
+    Cria a grade de cenários: cada combinação (variação de temperatura em °C,
+    fator multiplicativo da chuva) aplicada às UFs informadas.
+    """
+    combinations = list(itertools.product(temp_deltas, rain_factors))
+    grid = pd.DataFrame(combinations, columns=["temp_delta", "rain_factor"])
+    grid.insert(0, "Cenario", np.arange(len(grid)))
+
+    rows = grid.loc[grid.index.repeat(len(ufs))].reset_index(drop=True)
+    rows.insert(1, "Região/UF", np.tile(list(ufs), len(grid)))
+    return rows
+
+
+def simulate_scenarios(response: dict, scenarios: pd.DataFrame) -> dict:
+    """
+    Avalia todos os cenários de uma vez e retorna o cubo cenário × UF × safra.
+
+    Como o modelo é linear, a previsão de cada cenário é a previsão de referência
+    somada ao efeito das perturbações, calculado com um produto matricial em lote.
+    """
+    try:
+        climate_vars = response["vars"]
+        coef = response["coef"].to_numpy()
+        ufs = response["ufs"]
+        climate_cube = response["climate_cube"]
+        scenario_ids = np.sort(scenarios["Cenario"].unique())
+
+        n_scenarios, n_ufs, n_vars = len(scenario_ids), len(ufs), len(climate_vars)
+        additive = np.zeros((n_scenarios, n_ufs, n_vars))
+        multiplicative = np.ones((n_scenarios, n_ufs, n_vars))
+
+        # Posições (cenário, UF) de cada linha da grade; UFs sem modelo são ignoradas
+        s_idx = np.searchsorted(scenario_ids, scenarios["Cenario"].to_numpy())
+        u_idx = pd.Index(ufs).get_indexer(scenarios["Região/UF"])
+        known = u_idx >= 0
+        s_idx, u_idx = s_idx[known], u_idx[known]
+
+        temp_cols = [i for i, var in enumerate(climate_vars) if var in TEMPERATURE_VARS]
+        rain_cols = [i for i, var in enumerate(climate_vars) if var in RAIN_VARS]
+        for col in temp_cols:
+            additive[s_idx, u_idx, col] = scenarios["temp_delta"].to_numpy()[known]
+        for col in rain_cols:
+            multiplicative[s_idx, u_idx, col] = scenarios["rain_factor"].to_numpy()[
+                known
+            ]
+
+        # Previsão de referência (UF × safra)
+        baseline = response["intercepts"].to_numpy()[:, None] + climate_cube @ coef
+
+        # Efeito das perturbações: X' = X * M + A  =>  Δ = X (M - 1) β + A β
+        weights = (multiplicative - 1.0) * coef  # (S, U, V)
+        scaled = np.matmul(climate_cube, weights.transpose(1, 2, 0))  # (U, Y, S)
+        shift = additive @ coef  # (S, U)
+        values = baseline[None] + scaled.transpose(2, 0, 1) + shift[:, :, None]
+
+        return {
+            "values": values,
+            "baseline": baseline,
+            "scenarios": scenarios.drop_duplicates("Cenario").set_index("Cenario")[
+                ["temp_delta", "rain_factor"]
+            ],
+            "ufs": ufs,
+            "safras": response["safras"],
+        }
+    except Exception as e:
+        raise RuntimeError(f"Erro ao simular cenários: {e}")
+
+
+def scenario_cube_to_frame(cube: dict, scenario_ids=None) -> pd.DataFrame:
+    """
+    Converte (parte do) cubo de cenários em uma tabela longa.
+    """
+    scenario_ids = (
+        cube["scenarios"].index if scenario_ids is None else pd.Index(scenario_ids)
+    )
+    positions = cube["scenarios"].index.get_indexer(scenario_ids)
+    values = cube["values"][positions]
+
+    index = pd.MultiIndex.from_product(
+        [scenario_ids, cube["ufs"], cube["safras"]],
+        names=["Cenario", "Região/UF", "Safra"],
+    )
+    frame = pd.DataFrame({"Area_Prevista": values.ravel()}, index=index)
+    frame["Area_Referencia"] = np.tile(cube["baseline"].ravel(), len(scenario_ids))
+    frame["Variacao"] = frame["Area_Prevista"] - frame["Area_Referencia"]
+    return frame.reset_index()
@@ -0,0 +1,293 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+import time
+from urllib.parse import urlparse
+
+from fingerprint import (
+    combine_fingerprints,
+    fingerprint_dependencies,
+    fingerprint_object,
+)
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+CACHE_DIR = os.path.join(BASE_DIR, "data", "processed", "cache")
+
+# Armazenamento compartilhado entre as réplicas do painel:
+#   file:///caminho          diretório (ex.: volume montado por todas as réplicas)
+#   sqlite:///caminho.db     banco SQLite local
+#   redis://host:6379/0      Redis ou serviço compatível (requer o pacote redis)
+#   none                     sem cache compartilhado
+CACHE_URL = os.environ.get("ALGODAO_CACHE_URL", f"file://{CACHE_DIR}")
+
+# Versão global das chaves: incrementar invalida todo o cache de uma vez
+CACHE_VERSION = os.environ.get("ALGODAO_CACHE_VERSION", "1")
+
+# Tempo máximo (s) de uma trava de cálculo; passado esse prazo ela é ignorada
+LOCK_TTL = 600
+LOCK_POLL = 0.5
+
+# Tamanho máximo (MB) do cache em arquivos; acima dele os valores usados há
+# mais tempo são removidos
+FILE_CACHE_MAX_MB = float(os.environ.get("ALGODAO_CACHE_MAX_MB", "2048"))
+
+
+class NullCache:
+    """
+    Cache desativado: nada é guardado e todas as travas são concedidas.
+    """
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def add(self, key, value, ttl):
+        return True
+
+    def delete(self, key):
+        pass
+
+
+class FileCache:
+    """
+    Um arquivo por chave; gravações atômicas (arquivo temporário + rename).
+    Cada leitura renova a data de modificação do arquivo, e ao passar de
+    ``max_mb`` os valores lidos há mais tempo são removidos (as travas não).
+    """
+
+    def __init__(self, directory: str, max_mb: float = FILE_CACHE_MAX_MB):
+        self.directory = directory
+        self.max_bytes = max_mb * 1024**2
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        name = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        extension = "lock" if key.endswith(":lock") else "bin"
+        return os.path.join(self.directory, f"{name}.{extension}")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                value = file.read()
+            os.utime(path)
+            return value
+        except FileNotFoundError:
+            return None
+
+    def set(self, key, value):
+        path = self._path(key)
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, "wb") as file:
+            file.write(value)
+        os.replace(temp, path)
+        self._evict()
+
+    def _evict(self):
+        """
+        Remove os valores menos usados até o cache caber em ``max_bytes``.
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".bin"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue  # removido por outra réplica
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def add(self, key, value, ttl):
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > ttl:
+                os.remove(path)  # trava abandonada
+        except FileNotFoundError:
+            pass
+        try:
+            descriptor = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(value)
+        return True
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+class SQLiteCache:
+    """
+    Tabela chave → valor em um banco SQLite (modo WAL, leituras concorrentes).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache "
+                "(key TEXT PRIMARY KEY, value BLOB, expires REAL)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key):
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT value FROM cache WHERE key = ? "
+                "AND (expires IS NULL OR expires > ?)",
+                (key, time.time()),
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value):
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO cache VALUES (?, ?, NULL)", (key, value)
+            )
+
+    def add(self, key, value, ttl):
+        with self._connect() as connection:
+            connection.execute(
+                "DELETE FROM cache WHERE key = ? AND expires <= ?", (key, time.time())
+            )
+            cursor = connection.execute(
+                "INSERT OR IGNORE INTO cache VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl),
+            )
+        return cursor.rowcount == 1
+
+    def delete(self, key):
+        with self._connect() as connection:
+            connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+
+class RedisCache:
+    """
+    Redis ou serviço compatível (KeyDB, Dragonfly, Valkey).
+    """
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("Instale o pacote redis para usar um cache Redis.")
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, value):
+        self.client.set(key, value)
+
+    def add(self, key, value, ttl):
+        return bool(self.client.set(key, value, nx=True, ex=int(ttl)))
+
+    def delete(self, key):
+        self.client.delete(key)
+
+
+def open_cache(url: str = CACHE_URL):
+    """
+    Abre o armazenamento indicado pela URL (veja ``CACHE_URL``).
+    """
+    try:
+        if not url or url == "none":
+            return NullCache()
+        parsed = urlparse(url)
+        if parsed.scheme == "file":
+            return FileCache(parsed.path)
+        if parsed.scheme == "sqlite":
+            return SQLiteCache(parsed.path)
+        if parsed.scheme in ("redis", "rediss", "unix"):
+            return RedisCache(url)
+        raise ValueError(f"Esquema de cache desconhecido: {parsed.scheme}")
+    except Exception as e:
+        raise RuntimeError(f"Erro ao abrir o cache compartilhado: {e}")
+
+
+_caches = {}
+
+
+def get_cache(url: str = CACHE_URL):
+    """
+    Armazenamento compartilhado do processo (aberto uma única vez por URL).
+    """
+    if url not in _caches:
+        _caches[url] = open_cache(url)
+    return _caches[url]
+
+
+def cache_key(namespace: str, *parts: str) -> str:
+    """
+    Chave versionada: ``algodao:v<versão>:<espaço>:<hash das partes>``.
+    """
+    return f"algodao:v{CACHE_VERSION}:{namespace}:{combine_fingerprints(*parts)}"
+
+
+def call_key(namespace: str, func, *args, key_parts=None, **kwargs) -> str:
+    """
+    Chave de ``cached_call``: código de ``func`` (e das funções, constantes e
+    módulos do projeto de que ela depende) mais ``key_parts`` (ou, se omitido,
+    os hashes dos argumentos).
+    """
+    if key_parts is None:
+        key_parts = [fingerprint_object(arg) for arg in args]
+        key_parts += [f"{name}={fingerprint_object(kwargs[name])}" for name in kwargs]
+    return cache_key(namespace, fingerprint_dependencies(func), *map(str, key_parts))
+
+
+def cached_call(namespace: str, func, *args, key_parts=None, cache=None, **kwargs):
+    """
+    Executa ``func(*args, **kwargs)`` uma única vez entre todas as réplicas.
+
+    A chave vem de ``call_key``. Enquanto uma réplica calcula um valor
+    ausente, as demais aguardam a trava e reutilizam o resultado em vez de
+    recalculá-lo.
+    """
+    cache = cache or get_cache()
+    key = call_key(namespace, func, *args, key_parts=key_parts, **kwargs)
+
+    # Passado o prazo sem obter a trava, calcula sem ela (e não a remove, pois
+    # pertence a outra réplica)
+    deadline = time.time() + LOCK_TTL
+    while True:
+        value = cache.get(key)
+        if value is not None:
+            return pickle.loads(value)
+        locked = cache.add(f"{key}:lock", b"1", LOCK_TTL)
+        if locked or time.time() > deadline:
+            break
+        time.sleep(LOCK_POLL)
+
+    try:
+        # Outra réplica pode ter gravado o valor e liberado a trava entre a
+        # leitura e a obtenção da trava
+        value = cache.get(key)
+        if value is not None:
+            return pickle.loads(value)
+        result = func(*args, **kwargs)
+        cache.set(key, pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+        return result
+    finally:
+        if locked:
+            cache.delete(f"{key}:lock")
@@ -0,0 +1,211 @@
+import numpy as np
+import pandas as pd
+
+from data_cleaning import COVERAGE_COLUMN, SEASON_CODE_BY_MONTH, SEASONS
+
+# Compressão dos resumos: limita o número de centroides de cada resumo (mais
+# centroides = quantis mais precisos, principalmente nas caudas). Um mês de
+# dados diários tem cerca de 30 medições: com 50 centroides nada seria
+# comprimido, então os resumos diários usam uma compressão menor
+SKETCH_COMPRESSION = 50
+DAILY_SKETCH_COMPRESSION = 10
+
+# Chave de cada resumo e percentis padrão das consultas
+SKETCH_KEYS = ["ESTACAO", "Ano", "Mes", "Variavel"]
+DEFAULT_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+
+def _midpoint_quantiles(group, weights):
+    """
+    Início de cada grupo (linhas ordenadas por grupo) e quantil do ponto médio
+    de cada ponto dentro do seu grupo.
+    """
+    starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+    sizes = np.diff(np.r_[starts, len(group)])
+    cumulative = np.cumsum(weights)
+    offset = np.repeat(cumulative[starts] - weights[starts], sizes)
+    totals = np.repeat(np.add.reduceat(weights, starts), sizes)
+    return starts, (cumulative - offset - weights / 2) / totals
+
+
+def _compress(group, values, weights, compression: int = SKETCH_COMPRESSION):
+    """
+    Agrupa valores (ou centroides) em centroides, todos os resumos de uma vez
+    (estilo t-digest): cada grupo é ordenado e seus pontos se juntam enquanto
+    o quantil não muda de faixa na escala ``arcsen``, que deixa centroides
+    pequenos nas caudas e maiores no centro.
+
+    Retorna, por centroide, o grupo, a média e o peso.
+    """
+    keep = ~np.isnan(values) & (weights > 0)
+    group, values, weights = group[keep], values[keep], weights[keep]
+    if not len(group):
+        return group, values, weights
+    order = np.lexsort((values, group))
+    group, values, weights = group[order], values[order], weights[order]
+
+    _, q = _midpoint_quantiles(group, weights)
+    scale = np.floor(compression * (np.arcsin(2 * q - 1) / np.pi + 0.5))
+
+    # Centroide = (grupo, faixa da escala)
+    new = np.r_[True, (group[1:] != group[:-1]) | (scale[1:] != scale[:-1])]
+    ids = np.cumsum(new) - 1
+    total = np.bincount(ids, weights=weights)
+    means = np.bincount(ids, weights=values * weights) / total
+    return group[new], means, total
+
+
+def build_weather_sketches(
+    weather_data: pd.DataFrame,
+    stations: pd.DataFrame = None,
+    climate_vars=None,
+    compression: int = None,
+) -> pd.DataFrame:
+    """
+    Resumos de quantis mescláveis de cada (estação, ano, mês, variável),
+    calculados na carga a partir das medições originais (hora ou dia).
+
+    Cada resumo guarda no máximo cerca de ``compression`` centroides (média e
+    peso); por padrão, ``SKETCH_COMPRESSION`` para dados horários e
+    ``DAILY_SKETCH_COMPRESSION`` para diários. Qualquer percentil de qualquer
+    combinação de estações, UFs, anos e meses é obtido mesclando os resumos
+    (``sketch_quantiles``), sem voltar às séries.
+    """
+    try:
+        if compression is None:
+            compression = (
+                SKETCH_COMPRESSION
+                if "HORA (UTC)" in weather_data.columns
+                else DAILY_SKETCH_COMPRESSION
+            )
+        if climate_vars is None:
+            climate_vars = [
+                col
+                for col in weather_data.select_dtypes(include="float").columns
+                if col != COVERAGE_COLUMN
+            ]
+        station_codes, station_index = pd.factorize(weather_data["ESTACAO"], sort=True)
+        period = (
+            weather_data["Ano"].to_numpy(dtype=np.int64) * 12
+            + weather_data["Mes"].to_numpy(dtype=np.int64)
+            - 1
+        )
+        first = period.min()
+        n_periods = period.max() - first + 1
+        base = station_codes.astype(np.int64) * n_periods + (period - first)
+
+        # Uma única compressão para todas as variáveis: o grupo inclui a variável
+        n_keys = len(station_index) * n_periods
+        groups = np.concatenate([base + k * n_keys for k in range(len(climate_vars))])
+        values = np.concatenate(
+            [weather_data[var].to_numpy(dtype=float) for var in climate_vars]
+        )
+        valid = np.concatenate([station_codes >= 0] * len(climate_vars))
+        group, means, weights = _compress(
+            groups[valid], values[valid], np.ones(valid.sum()), compression
+        )
+
+        variable, rest = np.divmod(group, n_keys)
+        station, month = np.divmod(rest, n_periods)
+        year, month = np.divmod(month + first, 12)
+        sketches = pd.DataFrame(
+            {
+                "ESTACAO": pd.Categorical.from_codes(
+                    station, categories=station_index.astype(str)
+                ),
+                "Ano": year.astype(np.int16),
+                "Mes": (month + 1).astype(np.int8),
+                "Variavel": pd.Categorical.from_codes(
+                    variable, categories=list(climate_vars)
+                ),
+                "Media": means.astype(np.float32),
+                "Peso": weights.astype(np.float32),
+            }
+        )
+        if stations is not None:
+            uf = stations["Região/UF"].reindex(sketches["ESTACAO"].cat.categories)
+            sketches.insert(
+                1,
+                "Região/UF",
+                pd.Categorical(sketches["ESTACAO"].map(dict(zip(uf.index, uf.values)))),
+            )
+        return sketches
+    except Exception as e:
+        raise RuntimeError(f"Erro ao calcular os resumos de quantis: {e}")
+
+
+def filter_sketches(sketches: pd.DataFrame, stations=None, start=None, end=None):
+    """
+    Resumos das estações e dos meses do período [start, end].
+    """
+    mask = np.ones(len(sketches), dtype=bool)
+    if stations is not None:
+        mask &= sketches["ESTACAO"].isin([str(s) for s in stations]).to_numpy()
+    month = sketches["Ano"].to_numpy(dtype=np.int64) * 12 + sketches["Mes"].to_numpy()
+    if start is not None:
+        start = pd.Timestamp(start)
+        mask &= month >= start.year * 12 + start.month
+    if end is not None:
+        end = pd.Timestamp(end)
+        mask &= month <= end.year * 12 + end.month
+    return sketches[mask]
+
+
+def sketch_quantiles(
+    sketches: pd.DataFrame,
+    by=("Região/UF",),
+    quantiles=DEFAULT_QUANTILES,
+    variables=None,
+    compression: int = SKETCH_COMPRESSION,
+) -> pd.DataFrame:
+    """
+    Percentis de cada variável por agrupamento (colunas dos resumos, mais
+    ``Estacao`` do ano derivada do mês), mesclando os resumos de cada grupo.
+
+    A mesclagem ordena e recomprime de uma vez os centroides de todos os
+    resumos selecionados: a memória é proporcional ao número de centroides
+    lidos (bem menor que o de medições), e o resultado tem cerca de
+    ``compression`` centroides por grupo. Os quantis são interpolados entre os
+    centroides.
+    """
+    try:
+        if variables is not None:
+            sketches = sketches[sketches["Variavel"].isin(variables)]
+        if "Estacao" in by:
+            sketches = sketches.assign(
+                Estacao=pd.Categorical.from_codes(
+                    SEASON_CODE_BY_MONTH[sketches["Mes"].to_numpy() - 1],
+                    categories=SEASONS,
+                )
+            )
+        keys = [*by, "Variavel"]
+        sketches = sketches.dropna(subset=keys)
+        grouped = sketches.groupby(keys, observed=True, sort=True)
+        codes, labels = grouped.ngroup().to_numpy(), grouped.size().index
+        group, means, weights = _compress(
+            codes,
+            sketches["Media"].to_numpy(dtype=float),
+            sketches["Peso"].to_numpy(dtype=float),
+            compression,
+        )
+
+        # Posição normalizada do ponto médio de cada centroide; os grupos ficam
+        # separados no eixo (grupo g ocupa [2g, 2g + 1]) para uma única interpolação
+        starts, within = _midpoint_quantiles(group, weights)
+        position = 2 * group + within
+
+        # Extremos de cada grupo: a média do primeiro e do último centroide
+        lasts = np.r_[starts[1:], len(group)] - 1
+        x = np.concatenate([position, 2 * group[starts], 2 * group[lasts] + 1])
+        y = np.concatenate([means, means[starts], means[lasts]])
+        order = np.argsort(x, kind="stable")
+        x, y = x[order], y[order]
+
+        present = group[starts]
+        result = {
+            f"P{round(q * 100):02d}": np.interp(2 * present + q, x, y)
+            for q in quantiles
+        }
+        return pd.DataFrame(result, index=labels[present])
+    except Exception as e:
+        raise RuntimeError(f"Erro ao consultar os resumos de quantis: {e}")
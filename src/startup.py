@@ -0,0 +1,93 @@
+import importlib
+import os
+import re
+import subprocess
+import sys
+import time
+import types
+
+import pandas as pd
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Módulos do projeto importados pelo painel (usados no perfil de inicialização)
+STARTUP_MODULES = (
+    "data_cleaning",
+    "data_grid",
+    "interpolation",
+    "pipeline",
+    "analysis",
+    "modeling",
+    "scenarios",
+    "visualization",
+)
+
+# Tempo (s) da importação de cada módulo preguiçoso, registrado no primeiro uso
+LAZY_IMPORT_TIMES = {}
+
+
+class LazyModule(types.ModuleType):
+    """
+    Módulo importado apenas no primeiro acesso a um de seus atributos.
+    """
+
+    def __getattr__(self, attr):
+        module = self.__dict__.get("_target")
+        if module is None:
+            start = time.perf_counter()
+            module = importlib.import_module(self.__name__)
+            LAZY_IMPORT_TIMES[self.__name__] = time.perf_counter() - start
+            self.__dict__["_target"] = module
+        return getattr(module, attr)
+
+
+def lazy_import(name: str):
+    """
+    Retorna o módulo (se já importado) ou um substituto que o importa no primeiro
+    uso, para que bibliotecas pesadas só sejam carregadas pelas abas que as usam.
+    """
+    return sys.modules.get(name) or LazyModule(name)
+
+
+def import_profile(modules=STARTUP_MODULES, top=20) -> pd.DataFrame:
+    """
+    Mede, em um processo novo (``python -X importtime``), o tempo de importação
+    dos módulos do painel, agregado por pacote de primeiro nível (``top=None``
+    retorna todos os pacotes).
+    """
+    try:
+        command = [sys.executable, "-X", "importtime", "-c"]
+        command.append("; ".join(f"import {module}" for module in modules))
+        result = subprocess.run(
+            command, cwd=SRC_DIR, capture_output=True, text=True, check=True
+        )
+
+        rows = []
+        pattern = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+        for line in result.stderr.splitlines():
+            match = pattern.match(line)
+            if match:
+                own, cumulative, indent, name = match.groups()
+                rows.append((name, int(own), int(cumulative), len(indent)))
+        profile = pd.DataFrame(rows, columns=["Modulo", "Proprio", "Total", "Nivel"])
+
+        # Por pacote de primeiro nível: tempo próprio de todos os seus módulos e
+        # tempo acumulado da importação do pacote (com suas dependências)
+        profile["Pacote"] = profile["Modulo"].str.split(".").str[0]
+        packages = profile[profile["Modulo"] == profile["Pacote"]]
+        summary = pd.DataFrame(
+            {
+                "Proprio (s)": profile.groupby("Pacote")["Proprio"].sum() / 1e6,
+                "Acumulado (s)": packages.groupby("Pacote")["Total"].max() / 1e6,
+            }
+        ).fillna(0.0)
+        summary = summary.sort_values("Proprio (s)", ascending=False)
+        return summary if top is None else summary.head(top)
+    except Exception as e:
+        raise RuntimeError(f"Erro ao medir o tempo de importação: {e}")
+
+
+if __name__ == "__main__":
+    report = import_profile(top=None)
+    print(report.head(20))
+    print(f"Total: {report['Proprio (s)'].sum():.2f} s")
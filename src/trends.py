@@ -0,0 +1,258 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from startup import lazy_import
+
+special = lazy_import("scipy.special")
+
+# Nível de significância do teste de Mann-Kendall
+TREND_ALPHA = 0.05
+
+# Menor segmento (em safras) entre duas quebras estruturais e número máximo
+# de quebras por série
+MIN_SEGMENT = 5
+MAX_BREAKS = 3
+
+
+def series_matrix(store: pd.DataFrame, metrics=None) -> pd.DataFrame:
+    """
+    Matriz (Metrica, Região/UF) × Safra com todas as séries da Conab, com NaN
+    nas safras sem dado.
+    """
+    metrics = list(metrics or store["Metrica"].cat.categories)
+    selected = store[store["Metrica"].isin(metrics)]
+    matrix = selected.pivot_table(
+        index=["Metrica", "Região/UF"],
+        columns="Safra",
+        values="Valor",
+        aggfunc="first",
+        observed=True,
+    )
+    return matrix.reindex(
+        columns=range(int(store["Safra"].min()), int(store["Safra"].max()) + 1)
+    ).astype(float)
+
+
+def mann_kendall(values: np.ndarray) -> dict:
+    """
+    Teste de Mann-Kendall e inclinação de Sen de cada linha da matriz
+    (séries × anos), calculados juntos sobre todos os pares de anos.
+
+    A variância de S é corrigida para empates e anos ausentes são ignorados. A
+    inclinação de Sen é a mediana das inclinações entre todos os pares.
+    """
+    n_series, n_years = values.shape
+    valid = ~np.isnan(values)
+
+    # diff[k, i, j] = x_j - x_i, apenas para i < j com os dois anos observados
+    diff = values[:, None, :] - values[:, :, None]
+    both = valid[:, :, None] & valid[:, None, :]
+    pairs = both & np.triu(np.ones((n_years, n_years), dtype=bool), 1)
+
+    s = np.where(pairs, np.sign(diff), 0.0).sum(axis=(1, 2))
+    n = valid.sum(axis=1)
+
+    # Empates: cada valor de um grupo de t iguais contribui (t - 1)(2t + 5)
+    ties = ((diff == 0) & both).sum(axis=2)
+    tie_term = np.where(valid, (ties - 1) * (2 * ties + 5), 0).sum(axis=1)
+    variance = (n * (n - 1) * (2 * n + 5) - tie_term) / 18.0
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = np.where(variance > 0, (s - np.sign(s)) / np.sqrt(variance), 0.0)
+        lags = np.arange(n_years)[None, :] - np.arange(n_years)[:, None]
+        slopes = np.where(pairs, diff / np.where(lags > 0, lags, 1), np.nan)
+    p_value = 2 * special.ndtr(-np.abs(z))
+
+    enough = n >= 3
+    return {
+        "n": n,
+        "S": np.where(enough, s, np.nan),
+        "Z": np.where(enough, z, np.nan),
+        "p_valor": np.where(enough, p_value, np.nan),
+        "Sen": np.where(
+            enough,
+            np.nanmedian(
+                np.where(enough[:, None, None], slopes, 0.0).reshape(n_series, -1),
+                axis=1,
+            ),
+            np.nan,
+        ),
+    }
+
+
+def _segment_costs(values: np.ndarray, min_size: int) -> np.ndarray:
+    """
+    Custo de cada segmento [início, fim) de cada série: log-verossimilhança
+    normal com média e variância próprias (segmentos com menos de ``min_size``
+    safras têm custo infinito). Calculado por somas de prefixo, ignorando
+    ausentes.
+    """
+    n_series, n_years = values.shape
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    zeros = np.zeros((n_series, 1))
+    sums = np.hstack([zeros, np.cumsum(filled, axis=1)])
+    squares = np.hstack([zeros, np.cumsum(filled**2, axis=1)])
+    counts = np.hstack([zeros, np.cumsum(valid, axis=1)])
+
+    # Piso da variância: segmentos constantes (ex.: safras sem plantio) não
+    # têm custo infinitamente negativo
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        floor = (1e-3 * np.nanstd(values, axis=1)) ** 2
+    floor = np.where(floor > 0, floor, 1e-12)[:, None]
+
+    costs = np.full((n_series, n_years + 1, n_years + 1), np.inf)
+    for start in range(n_years - min_size + 1):
+        ends = np.arange(start + min_size, n_years + 1)
+        count = counts[:, ends] - counts[:, [start]]
+        total = sums[:, ends] - sums[:, [start]]
+        spread = (
+            squares[:, ends] - squares[:, [start]] - total**2 / np.maximum(count, 1)
+        )
+        costs[:, start, ends] = count * np.log(
+            np.maximum(spread, 0) / np.maximum(count, 1) + floor
+        )
+    return costs
+
+
+def detect_change_points(
+    values: np.ndarray,
+    min_size: int = MIN_SEGMENT,
+    max_breaks: int = MAX_BREAKS,
+    penalty=None,
+) -> list:
+    """
+    Quebras estruturais (mudanças de nível e de variabilidade) de cada linha da
+    matriz (séries × anos), resolvidas de uma vez para todas as séries.
+
+    Para cada número de quebras até ``max_breaks`` a segmentação ótima é obtida
+    por programação dinâmica sobre os custos dos segmentos; o número escolhido
+    minimiza custo + ``penalty`` por quebra (padrão: 3·ln n, critério BIC para
+    média, variância e posição). Retorna, para cada série, as posições em que
+    começam os novos segmentos.
+    """
+    n_series, n_years = values.shape
+    costs = _segment_costs(values, min_size)
+    if penalty is None:
+        penalty = 3 * np.log(np.maximum((~np.isnan(values)).sum(axis=1), 2))
+
+    # best[:, fim]: menor custo de [0, fim) com k quebras; choices[k - 1]
+    # guarda o início do último segmento de cada solução
+    best = costs[:, 0, :]
+    totals, choices = [best[:, n_years]], []
+    for _ in range(max_breaks):
+        candidates = best[:, :, None] + costs
+        choices.append(np.argmin(candidates, axis=1))
+        best = np.min(candidates, axis=1)
+        totals.append(best[:, n_years])
+    totals = np.vstack(totals) + np.arange(max_breaks + 1)[:, None] * penalty
+    n_breaks = np.argmin(totals, axis=0)
+
+    breaks = []
+    for row in range(n_series):
+        points, end = [], n_years
+        for k in range(n_breaks[row], 0, -1):
+            end = int(choices[k - 1][row, end])
+            points.append(end)
+        breaks.append(sorted(points))
+    return breaks
+
+
+def _segment_means(values: np.ndarray, points: list) -> np.ndarray:
+    """
+    Média de cada segmento entre as quebras.
+    """
+    bounds = [0, *points, len(values)]
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return np.array(
+            [np.nanmean(values[start:stop]) for start, stop in zip(bounds, bounds[1:])]
+        )
+
+
+def analyze_cotton_trends(
+    store: pd.DataFrame,
+    min_size: int = MIN_SEGMENT,
+    max_breaks: int = MAX_BREAKS,
+    alpha: float = TREND_ALPHA,
+) -> pd.DataFrame:
+    """
+    Tendência (Mann-Kendall e inclinação de Sen) e quebras estruturais de todas
+    as séries (Metrica, Região/UF) da Conab, em uma única passada vetorizada.
+
+    Cada linha traz a inclinação por safra, a significância, as safras em que
+    começam novos níveis e a maior mudança de nível (diferença entre as médias
+    dos segmentos vizinhos).
+    """
+    try:
+        matrix = series_matrix(store)
+        values = matrix.to_numpy()
+        safras = matrix.columns.to_numpy()
+
+        trends = pd.DataFrame(mann_kendall(values), index=matrix.index)
+        trends["Tendência"] = np.select(
+            [
+                (trends["p_valor"] < alpha) & (trends["Sen"] > 0),
+                (trends["p_valor"] < alpha) & (trends["Sen"] < 0),
+            ],
+            ["alta", "queda"],
+            default="sem tendência",
+        )
+
+        breaks, largest, change = [], [], []
+        for row, points in zip(
+            values, detect_change_points(values, min_size, max_breaks)
+        ):
+            breaks.append(tuple(int(safras[point]) for point in points))
+            if not points:
+                largest.append(np.nan)
+                change.append(np.nan)
+                continue
+            shifts = np.diff(_segment_means(row, points))
+            position = int(np.nanargmax(np.abs(shifts)))
+            largest.append(int(safras[points[position]]))
+            change.append(float(shifts[position]))
+
+        trends["Quebras"] = breaks
+        trends["Maior quebra"] = pd.array(largest, dtype="Int64")
+        trends["Mudança de nível"] = change
+        return trends
+    except Exception as e:
+        raise RuntimeError(f"Erro ao analisar tendências por UF: {e}")
+
+
+def trend_segments(
+    cotton_data: pd.DataFrame, trends: pd.DataFrame, metric: str, ufs
+) -> pd.DataFrame:
+    """
+    Série de cada UF com a média do segmento (entre quebras) de cada safra e
+    a marcação das safras em que começa um novo segmento.
+    """
+    frames = []
+    for uf in ufs:
+        series = cotton_data[cotton_data["Região/UF"] == uf].sort_values("Safra")
+        safras = series["Safra"].to_numpy()
+        values = series[metric].to_numpy(dtype=float)
+        breaks = (
+            trends.loc[(metric, uf), "Quebras"] if (metric, uf) in trends.index else ()
+        )
+        points = list(np.searchsorted(safras, breaks))
+        means = _segment_means(values, points)
+        segment = np.searchsorted(points, np.arange(len(safras)), side="right")
+        frames.append(
+            pd.DataFrame(
+                {
+                    "Região/UF": uf,
+                    "Safra": safras,
+                    metric: values,
+                    "Nível": means[segment],
+                    "Quebra": np.isin(safras, breaks),
+                }
+            )
+        )
+    if not frames:
+        return pd.DataFrame(columns=["Região/UF", "Safra", metric, "Nível", "Quebra"])
+    return pd.concat(frames, ignore_index=True)
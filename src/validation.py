@@ -0,0 +1,237 @@
+import numpy as np
+import pandas as pd
+
+# Valor usado pelo INMET para indicar medição ausente
+INMET_SENTINELS = [-9999, -9999.0]
+
+# Textos tratados como ausência de valor (não são violações)
+MISSING_TOKENS = ["", "-", "nan", "NaN", "None", "null"]
+
+# Dias de cada mês em anos não bissextos
+DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+# Faixas fisicamente plausíveis por variável climática
+WEATHER_RANGES = {
+    "temp_max": (-10.0, 50.0),
+    "temp_avg": (-10.0, 45.0),
+    "temp_min": (-15.0, 40.0),
+    "hum_max": (0.0, 100.0),
+    "hum_min": (0.0, 100.0),
+    "rain_max": (0.0, 200.0),
+    "rad_max": (0.0, 6000.0),
+    "wind_avg": (0.0, 50.0),
+    "wind_max": (0.0, 80.0),
+}
+
+# Regras declarativas: cada regra é aplicada como operação vetorizada de coluna
+WEATHER_RULES = (
+    [{"rule": "date", "column": "DATA (YYYY-MM-DD)"}]
+    + [
+        {"rule": "number", "column": col, "decimal": ",", "thousands": None}
+        for col in WEATHER_RANGES
+    ]
+    + [
+        {"rule": "sentinel", "column": col, "values": INMET_SENTINELS}
+        for col in WEATHER_RANGES
+    ]
+    + [
+        {"rule": "range", "column": col, "min": low, "max": high}
+        for col, (low, high) in WEATHER_RANGES.items()
+    ]
+    + [{"rule": "duplicate", "columns": ["ESTACAO", "DATA (YYYY-MM-DD)", "HORA (UTC)"]}]
+)
+
+# Aplicadas a cada aba da Conab em formato longo (coluna "Valor")
+COTTON_RULES = [
+    {"rule": "number", "column": "Valor", "decimal": ",", "thousands": "."},
+    {"rule": "range", "column": "Valor", "min": 0.0, "max": None},
+    {"rule": "duplicate", "columns": ["Região/UF", "Ano"]},
+]
+
+
+def parse_locale_number(series: pd.Series, decimal=",", thousands=".") -> pd.Series:
+    """
+    Converte textos numéricos em formato local (ex.: "1.234,5") para float.
+
+    O separador de milhar é removido antes de o separador decimal ser trocado
+    por ponto, preservando o valor. Valores já numéricos (inclusive em colunas
+    mistas) não são alterados.
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float)
+
+    # Colunas lidas do Excel podem misturar números e textos: só os textos são
+    # reinterpretados no formato local
+    if pd.api.types.infer_dtype(series, skipna=True) == "string":
+        is_text = series.notna()
+    else:
+        is_text = series.map(lambda value: isinstance(value, str)).astype(bool)
+    text = series[is_text].str.strip()
+    if thousands:
+        text = text.str.replace(thousands, "", regex=False)
+    if decimal and decimal != ".":
+        text = text.str.replace(decimal, ".", regex=False)
+
+    parsed = pd.to_numeric(series.where(~is_text), errors="coerce")
+    parsed[is_text] = pd.to_numeric(text, errors="coerce")
+    return parsed.astype(float)
+
+
+def parse_iso_dates(dates: pd.Series):
+    """
+    Extrai ano, mês e dia de datas no formato fixo YYYY-MM-DD sem inferência de
+    formato.
+
+    As strings são lidas como bytes e os dígitos são decodificados diretamente,
+    o que evita a criação de objetos datetime linha a linha. Retorna também a
+    máscara das datas válidas (separadores, mês e dia dentro do mês, com anos
+    bissextos). Textos com caracteres fora do ASCII são datas inválidas.
+    """
+    # Um byte a mais para detectar textos mais longos que o formato
+    try:
+        raw = dates.to_numpy().astype("S11")
+    except UnicodeEncodeError:
+        text = dates.astype(str)
+        raw = text.where(text.str.isascii(), "").to_numpy().astype("S11")
+    raw = raw.view(np.uint8).reshape(len(dates), 11)
+
+    # Apenas as posições dos dígitos: YYYY-MM-DD -> Y Y Y Y M M D D
+    digits = raw[:, [0, 1, 2, 3, 5, 6, 8, 9]].astype(np.int16) - ord("0")
+
+    year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+    month = digits[:, 4] * 10 + digits[:, 5]
+    day = digits[:, 6] * 10 + digits[:, 7]
+
+    valid = ((digits >= 0) & (digits <= 9)).all(axis=1)
+    valid &= (raw[:, 4] == ord("-")) & (raw[:, 7] == ord("-")) & (raw[:, 10] == 0)
+    valid &= (month >= 1) & (month <= 12)
+
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    last_day = DAYS_IN_MONTH[np.clip(month, 1, 12) - 1] + (leap & (month == 2))
+    valid &= (day >= 1) & (day <= last_day)
+    return year, month, day, valid
+
+
+def _violation(rule, column, mask, values, action) -> dict:
+    """
+    Resume as violações de uma regra (contagem e alguns exemplos).
+    """
+    positions = np.flatnonzero(mask)
+    return {
+        "Regra": rule,
+        "Coluna": column,
+        "Violacoes": len(positions),
+        "Acao": action,
+        "Exemplos": [str(values[i]) for i in positions[:3]],
+    }
+
+
+def apply_rules(data: pd.DataFrame, rules) -> tuple:
+    """
+    Aplica as regras de validação e retorna os dados tratados e o relatório.
+
+    Valores inválidos de uma coluna viram NaN (a linha é mantida); apenas linhas
+    com data inválida ou duplicadas são removidas, e tudo é contabilizado no
+    relatório em vez de ser descartado silenciosamente.
+    """
+    report = []
+    drop = np.zeros(len(data), dtype=bool)
+
+    # Agrupar as regras por coluna para ler e escrever cada coluna uma única vez
+    by_column = {}
+    for rule in rules:
+        if "column" in rule and rule["column"] in data.columns:
+            by_column.setdefault(rule["column"], []).append(rule)
+
+    for column, column_rules in by_column.items():
+        original = data[column]
+        values = None
+        invalid = np.zeros(len(data), dtype=bool)
+
+        for rule in column_rules:
+            kind = rule["rule"]
+            if kind == "date":
+                *_, valid = parse_iso_dates(original)
+                report.append(
+                    _violation(
+                        kind, column, ~valid, original.to_numpy(), "linha removida"
+                    )
+                )
+                drop |= ~valid
+                continue
+
+            if values is None:
+                if kind == "number" and not pd.api.types.is_numeric_dtype(original):
+                    parsed = parse_locale_number(
+                        original, rule.get("decimal", ","), rule.get("thousands")
+                    )
+                    text = original.astype(str).str.strip()
+                    missing = original.isna() | text.isin(MISSING_TOKENS)
+                    unparsed = (parsed.isna() & ~missing).to_numpy()
+                    report.append(
+                        _violation(
+                            kind, column, unparsed, original.to_numpy(), "valor anulado"
+                        )
+                    )
+                    values = parsed.to_numpy(dtype=float, copy=True)
+                    continue
+                values = pd.to_numeric(original, errors="coerce").to_numpy(
+                    dtype=float, copy=True
+                )
+
+            if kind == "sentinel":
+                mask = np.isin(values, rule["values"])
+            elif kind == "range":
+                low = -np.inf if rule.get("min") is None else rule["min"]
+                high = np.inf if rule.get("max") is None else rule["max"]
+                mask = ((values < low) | (values > high)) & ~invalid
+            else:
+                continue
+
+            report.append(_violation(kind, column, mask, values, "valor anulado"))
+            invalid |= mask
+
+        if values is not None:
+            values[invalid] = np.nan
+            data[column] = values
+
+    for rule in rules:
+        if rule["rule"] != "duplicate":
+            continue
+        columns = [col for col in rule["columns"] if col in data.columns]
+        if not columns:
+            continue
+        duplicated = data.duplicated(subset=columns, keep="first").to_numpy() & ~drop
+        report.append(
+            _violation(
+                "duplicate",
+                "+".join(columns),
+                duplicated,
+                data.index.to_numpy(),
+                "linha removida",
+            )
+        )
+        drop |= duplicated
+
+    if drop.any():
+        data = data.loc[~drop]
+
+    report = pd.DataFrame(
+        report, columns=["Regra", "Coluna", "Violacoes", "Acao", "Exemplos"]
+    )
+    return data, report[report["Violacoes"] > 0].reset_index(drop=True)
+
+
+def validate_weather_data(data: pd.DataFrame, rules=WEATHER_RULES) -> tuple:
+    """
+    Valida os dados do INMET: datas, números, sentinelas, faixas e duplicatas.
+    """
+    return apply_rules(data, rules)
+
+
+def validate_cotton_data(data: pd.DataFrame, rules=COTTON_RULES) -> tuple:
+    """
+    Valida a série da Conab: números em formato local, valores negativos e
+    duplicatas de (UF, ano).
+    """
+    return apply_rules(data, rules)
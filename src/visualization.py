@@ -1,11 +1,156 @@
-import matplotlib.pyplot as plt
-import seaborn as sns
+import io
+import os
+import numpy as np
 import pandas as pd
 import streamlit as st
-import geopandas as gpd
-import plotly.express as px
-import folium
-from streamlit_folium import st_folium
+
+from climate_indices import CLIMATE_INDICES
+from data_cleaning import (
+    COTTON_METRICS,
+    COVERAGE_COLUMN,
+    aggregate_weather_by_safra,
+    join_safra_climate,
+    metric_label,
+)
+from fingerprint import fingerprint_code
+from shared_cache import cached_call
+from startup import lazy_import
+
+# Bibliotecas de gráficos e mapas, importadas apenas pelas abas que as usam
+plt = lazy_import("matplotlib.pyplot")
+sns = lazy_import("seaborn")
+gpd = lazy_import("geopandas")
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objects")
+folium = lazy_import("folium")
+folium_plugins = lazy_import("folium.plugins")
+streamlit_folium = lazy_import("streamlit_folium")
+
+# "plotly": gráficos interativos (zoom, pan e hover no navegador, sem reexecutar
+# o script); "matplotlib": imagens estáticas
+CHART_BACKENDS = ("plotly", "matplotlib")
+
+# Acima destes limites as séries são reduzidas e os pontos desenhados via WebGL
+MAX_TRACE_POINTS = 2000
+WEBGL_MIN_POINTS = 1000
+
+CLIMATE_LABELS = {
+    "temp_max": "Temperatura Máxima (°C)",
+    "temp_avg": "Temperatura Média (°C)",
+    "temp_min": "Temperatura Mínima (°C)",
+    "hum_max": "Umidade Máxima (%)",
+    "hum_min": "Umidade Mínima (%)",
+    "rain_max": "Precipitação Máxima (mm)",
+    "rad_max": "Radiação Máxima (W/m²)",
+    "wind_avg": "Velocidade Média do Vento (m/s)",
+    "wind_max": "Velocidade Máxima do Vento (m/s)",
+    "gdd": "Graus-dia na Safra (°C·dia)",
+    "heat_hours": "Horas de Estresse Térmico na Safra (h)",
+    "rain_30d": "Menor Chuva Acumulada em 30 Dias (mm)",
+    "rain_60d": "Menor Chuva Acumulada em 60 Dias (mm)",
+    "rain_90d": "Menor Chuva Acumulada em 90 Dias (mm)",
+    **CLIMATE_INDICES,
+    "Ano": "Ano",
+}
+
+
+def downsample_trace(x, y, max_points: int = MAX_TRACE_POINTS):
+    """
+    Reduz uma série ordenada em x mantendo, em cada faixa, o mínimo e o máximo
+    de y (picos continuam visíveis no gráfico). Retorna os índices mantidos.
+    """
+    x, y = np.asarray(x), np.asarray(y, dtype=float)
+    valid = np.flatnonzero(~np.isnan(y))
+    if len(valid) <= max_points:
+        return valid
+
+    # Faixas de tamanho igual (a última completada com NaN), uma por linha
+    width = -(-len(valid) // (max_points // 2))
+    rows = np.full(width * -(-len(valid) // width), np.nan)
+    rows[: len(valid)] = y[valid]
+    rows = rows.reshape(-1, width)
+
+    offsets = np.arange(len(rows)) * width
+    keep = np.union1d(
+        offsets + np.nanargmin(rows, axis=1), offsets + np.nanargmax(rows, axis=1)
+    )
+    return valid[keep]
+
+
+def _scatter_trace(x, y, **kwargs):
+    """
+    Traço de pontos/linhas, em WebGL quando há muitos pontos.
+    """
+    trace = go.Scattergl if len(x) >= WEBGL_MIN_POINTS else go.Scatter
+    return trace(x=x, y=y, **kwargs)
+
+
+def _show_plotly(fig):
+    """
+    Exibe uma figura Plotly no Streamlit (interação feita no navegador).
+    """
+    fig.update_layout(margin=dict(l=10, r=10, t=50, b=10))
+    st.plotly_chart(fig, use_container_width=True)
+
+
+def _render_png(draw) -> bytes:
+    """
+    Desenha um gráfico matplotlib e retorna o PNG.
+    """
+    draw()
+    buffer = io.BytesIO()
+    plt.savefig(buffer, format="png", bbox_inches="tight")
+    plt.close()
+    return buffer.getvalue()
+
+
+def _show_matplotlib(draw, cache_key=None):
+    """
+    Exibe um gráfico matplotlib. Com ``cache_key`` (partes que identificam os
+    dados do gráfico), o PNG vem do cache compartilhado e é desenhado por uma
+    única réplica.
+    """
+    if cache_key is None:
+        draw()
+        st.pyplot(plt)
+        plt.close()
+        return
+    st.image(
+        cached_call(
+            "figure", _render_png, draw, key_parts=[fingerprint_code(draw), *cache_key]
+        )
+    )
+
+
+@st.cache_data(show_spinner=False)
+def _process_cached(namespace, cache_key, _func, _args):
+    """
+    Cache do processo sobre o cache compartilhado: a chave é só ``cache_key``
+    (os dados não são hasheados a cada execução do script).
+    """
+    return cached_call(namespace, _func, *_args, key_parts=list(cache_key))
+
+
+def _shared(namespace, func, *args, cache_key=None):
+    """
+    Agregado de gráfico, compartilhado entre réplicas quando há ``cache_key``.
+    """
+    if cache_key is None:
+        return func(*args)
+    return _process_cached(namespace, tuple(cache_key), func, args)
+
+
+def seasonal_trace_data(seasonal_data: pd.DataFrame, variable="temp_avg"):
+    """
+    Média de uma variável por (estação do ano, ano), já agregada para o gráfico
+    (a tabela sazonal repete o clima para cada UF).
+    """
+    return (
+        seasonal_data.groupby(["Estacao", "Ano"], observed=True)[variable]
+        .mean()
+        .reset_index()
+    )
+
 
 @st.cache_data
 def prepare_combined_data(cotton_data, weather_data):
@@ -25,21 +170,118 @@ def prepare_combined_data(cotton_data, weather_data):
     return combined_data
 
 
-def plot_seasonal_trends(seasonal_data: pd.DataFrame):
+def plot_seasonal_trends(
+    seasonal_data: pd.DataFrame, backend="matplotlib", cache_key=None
+):
     """
     Plota tendências sazonais.
     """
-    plt.figure(figsize=(10, 6))
-    sns.lineplot(data=seasonal_data, x="Ano", y="temp_avg", hue="Estacao")
-    plt.title("Tendências Sazonais de Temperatura Média")
-    plt.xlabel("Ano")
-    plt.ylabel("Temperatura Média (°C)")
-    st.pyplot(plt)
+    if backend == "plotly":
+        traces = _shared(
+            "seasonal_traces", seasonal_trace_data, seasonal_data, cache_key=cache_key
+        )
+        fig = go.Figure()
+        for season, group in traces.groupby("Estacao", observed=True, sort=False):
+            fig.add_traces(
+                _line_traces(
+                    group["Ano"], group["temp_avg"], str(season), mode="lines+markers"
+                )
+            )
+        fig.update_layout(
+            title="Tendências Sazonais de Temperatura Média",
+            xaxis_title="Ano",
+            yaxis_title="Temperatura Média (°C)",
+            hovermode="x unified",
+        )
+        _show_plotly(fig)
+        return
+
+    def draw():
+        plt.figure(figsize=(10, 6))
+        sns.lineplot(data=seasonal_data, x="Ano", y="temp_avg", hue="Estacao")
+        plt.title("Tendências Sazonais de Temperatura Média")
+        plt.xlabel("Ano")
+        plt.ylabel("Temperatura Média (°C)")
+
+    _show_matplotlib(draw, cache_key)
 
 
-def plot_regional_map(regional_data, geojson_path):
+def plot_percentile_bands(
+    bands: pd.DataFrame, variable: str, backend="matplotlib", cache_key=None
+):
+    """
+    Faixas de percentis (P10–P90 e P25–P75) e mediana de uma variável por mês,
+    a partir dos quantis dos resumos mesclados (índice = mês).
+    """
+    label = CLIMATE_LABELS.get(variable, variable)
+    title = f"Distribuição Mensal: {label}"
+    months = bands.index.to_numpy()
+    if backend == "plotly":
+        fig = go.Figure()
+        for low, high, opacity in (("P10", "P90", 0.2), ("P25", "P75", 0.35)):
+            fig.add_trace(
+                go.Scatter(x=months, y=bands[high], mode="lines", line=dict(width=0))
+            )
+            fig.add_trace(
+                go.Scatter(
+                    x=months,
+                    y=bands[low],
+                    mode="lines",
+                    line=dict(width=0),
+                    fill="tonexty",
+                    fillcolor=f"rgba(31, 119, 180, {opacity})",
+                    name=f"{low}–{high}",
+                )
+            )
+        fig.add_trace(
+            go.Scatter(x=months, y=bands["P50"], mode="lines+markers", name="Mediana")
+        )
+        fig.update_layout(title=title, xaxis_title="Mês", yaxis_title=label)
+        _show_plotly(fig)
+        return
+
+    def draw():
+        plt.figure(figsize=(10, 6))
+        for low, high, opacity in (("P10", "P90", 0.2), ("P25", "P75", 0.35)):
+            plt.fill_between(
+                months,
+                bands[low],
+                bands[high],
+                alpha=opacity,
+                color="tab:blue",
+                label=f"{low}–{high}",
+            )
+        plt.plot(months, bands["P50"], marker="o", color="tab:blue", label="Mediana")
+        plt.title(title)
+        plt.xlabel("Mês")
+        plt.ylabel(label)
+        plt.legend()
+
+    _show_matplotlib(draw, cache_key)
+
+
+def climate_heat_points(surface: pd.DataFrame, variable: str) -> list:
     """
-    Plota o mapa das melhores regiões para plantio de algodão, focado no Brasil.
+    Converte uma superfície interpolada em pontos [lat, lon, peso] para a camada
+    de calor do folium (peso normalizado entre 0 e 1).
+    """
+    surface = surface.dropna(subset=[variable])
+    values = surface[variable]
+    span = values.max() - values.min()
+    weights = (values - values.min()) / span if span > 0 else values * 0 + 1.0
+    return surface[["lat", "lon"]].assign(weight=weights).to_numpy().tolist()
+
+
+def plot_regional_map(
+    regional_data,
+    geojson_path,
+    heat_points=None,
+    heat_name=None,
+    metric="Area_Plantada",
+):
+    """
+    Plota o mapa das melhores regiões para plantio de algodão, focado no Brasil,
+    com uma camada de calor opcional da superfície climática interpolada.
     """
     try:
         # Renomear colunas no regional_data para corresponder ao GeoJSON
@@ -49,35 +291,45 @@ def plot_regional_map(regional_data, geojson_path):
         # Verificar as colunas após o rename
         print("Colunas no regional_data após ajuste:", regional_data.columns)
 
-        # Carregar o GeoJSON
-        brazil_geo = gpd.read_file(geojson_path)
-        print("Colunas no GeoJSON:", brazil_geo.columns)
-
-        # Verificar se as chaves do merge correspondem
-        print("IDs no GeoJSON:", brazil_geo["id"].unique())
-        print("IDs no regional_data:", regional_data["id"].unique())
-
         # Criar o mapa centrado no Brasil
         m = folium.Map(location=[-14.235, -51.9253], zoom_start=4)
 
-        # Adicionar o mapa coroplético
-        folium.Choropleth(
-            geo_data=geojson_path,
-            name="choropleth",
-            data=regional_data,
-            columns=["id", "Area_Plantada"],  # Usar a coluna 'id' e 'Area_Plantada'
-            key_on="feature.id",  # Ajustar para usar o campo 'id' do GeoJSON
-            fill_color="YlGn",
-            fill_opacity=0.7,
-            line_opacity=0.2,
-            legend_name="Área Plantada (ha)",
-        ).add_to(m)
+        if os.path.exists(geojson_path):
+            # Carregar o GeoJSON
+            brazil_geo = gpd.read_file(geojson_path)
+            print("Colunas no GeoJSON:", brazil_geo.columns)
+
+            # Verificar se as chaves do merge correspondem
+            print("IDs no GeoJSON:", brazil_geo["id"].unique())
+            print("IDs no regional_data:", regional_data["id"].unique())
+
+            # Adicionar o mapa coroplético
+            folium.Choropleth(
+                geo_data=geojson_path,
+                name="choropleth",
+                data=regional_data,
+                columns=["id", metric],  # Usar a coluna 'id' e a métrica
+                key_on="feature.id",  # Ajustar para usar o campo 'id' do GeoJSON
+                fill_color="YlGn",
+                fill_opacity=0.7,
+                line_opacity=0.2,
+                legend_name=metric_label(metric),
+            ).add_to(m)
+        else:
+            st.warning(f"GeoJSON das UFs não encontrado: {geojson_path}")
+
+        # Camada de calor com a superfície climática interpolada
+        if heat_points:
+            heat_layer = folium_plugins.HeatMap(
+                heat_points, name=heat_name or "Clima", radius=12
+            )
+            heat_layer.add_to(m)
 
         # Adicionar controle de camadas
         folium.LayerControl().add_to(m)
 
         # Exibir o mapa no Streamlit
-        st_folium(m, width=800, height=600)
+        streamlit_folium.st_folium(m, width=800, height=600)
 
     except Exception as e:
         st.error(f"Erro ao plotar o mapa interativo: {e}")
@@ -143,86 +395,97 @@ def add_coordinates_to_regions(regional_data):
     return regional_data
 
 
-def plot_correlation_heatmap(cotton_data, weather_data):
+def correlation_matrix(
+    cotton_data, weather_data, safra_climate=None, metric="Area_Plantada"
+) -> pd.DataFrame:
+    """
+    Matriz de correlação entre as variáveis climáticas da safra e a métrica, com
+    nomes descritivos (calculada uma vez para os dois backends).
+    """
+    # Combinar os dados pela chave (UF, safra)
+    if safra_climate is None:
+        safra_climate = aggregate_weather_by_safra(weather_data)
+    combined_data = join_safra_climate(cotton_data, safra_climate)
+
+    # Selecionar apenas colunas numéricas
+    other_metrics = [col for col in COTTON_METRICS if col != metric]
+    numeric_data = combined_data.drop(
+        columns=["Safra", COVERAGE_COLUMN] + other_metrics, errors="ignore"
+    ).select_dtypes(include=["float64", "int64"])
+
+    # Renomear variáveis para maior clareza
+    rename_dict = {**CLIMATE_LABELS, metric: metric_label(metric)}
+    return numeric_data.corr().rename(index=rename_dict, columns=rename_dict)
+
+
+def plot_correlation_heatmap(
+    cotton_data,
+    weather_data,
+    safra_climate=None,
+    metric="Area_Plantada",
+    backend="matplotlib",
+    cache_key=None,
+):
     """
     Plota um mapa de calor de correlação com melhorias de nomeclatura e design.
     """
     try:
-        # Combinar os dados
-        combined_data = cotton_data.merge(
-            weather_data, on=["Ano", "Região/UF"], how="inner"
+        corr_matrix = _shared(
+            "correlation_matrix",
+            correlation_matrix,
+            cotton_data,
+            weather_data,
+            safra_climate,
+            metric,
+            cache_key=cache_key,
+        )
+        title = (
+            "Mapa de Calor da Correlação entre Variáveis Climáticas e "
+            f"{metric_label(metric, unit=False)}"
         )
 
-        # Selecionar apenas colunas numéricas
-        numeric_data = combined_data.select_dtypes(include=["float64", "int64"])
-
-        # Calcular a matriz de correlação
-        corr_matrix = numeric_data.corr()
-
-        # Renomear variáveis para maior clareza
-        rename_dict = {
-            "temp_max": "Temperatura Máxima (°C)",
-            "temp_avg": "Temperatura Média (°C)",
-            "temp_min": "Temperatura Mínima (°C)",
-            "hum_max": "Umidade Máxima (%)",
-            "hum_min": "Umidade Mínima (%)",
-            "rain_max": "Precipitação Máxima (mm)",
-            "rad_max": "Radiação Máxima (W/m²)",
-            "wind_avg": "Velocidade Média do Vento (m/s)",
-            "wind_max": "Velocidade Máxima do Vento (m/s)",
-            "Area_Plantada": "Área Plantada (ha)",
-            "Ano": "Ano",
-        }
-        corr_matrix = corr_matrix.rename(index=rename_dict, columns=rename_dict)
+        if backend == "plotly":
+            fig = px.imshow(
+                corr_matrix,
+                text_auto=".2f",
+                color_continuous_scale="RdBu_r",
+                zmin=-1,
+                zmax=1,
+                aspect="auto",
+                title=title,
+            )
+            fig.update_layout(height=700)
+            _show_plotly(fig)
+            return
 
         # Plotar o mapa de calor
-        plt.figure(figsize=(12, 10))
-        sns.heatmap(
-            corr_matrix,
-            annot=True,  # Exibe os valores nas células
-            fmt=".2f",
-            cmap="coolwarm",  # Paleta de cores
-            cbar=True,
-            square=True,  # Células quadradas
-            linewidths=0.5,
-        )
-        plt.title(
-            "Mapa de Calor da Correlação entre Variáveis Climáticas e Área Plantada",
-            fontsize=14,
-        )
-        plt.xticks(rotation=45, ha="right")
-        plt.tight_layout()
+        def draw():
+            plt.figure(figsize=(12, 10))
+            sns.heatmap(
+                corr_matrix,
+                annot=True,  # Exibe os valores nas células
+                fmt=".2f",
+                cmap="coolwarm",  # Paleta de cores
+                cbar=True,
+                square=True,  # Células quadradas
+                linewidths=0.5,
+            )
+            plt.title(title, fontsize=14)
+            plt.xticks(rotation=45, ha="right")
+            plt.tight_layout()
 
         # Exibir o gráfico no Streamlit
-        st.pyplot(plt)
-        plt.close()
+        _show_matplotlib(draw, cache_key)
     except Exception as e:
         st.error(f"Erro ao gerar mapa de calor: {e}")
 
 
-def plot_climatic_influence(correlations: pd.Series):
+def plot_climatic_influence(correlations: pd.Series, metric="Area_Plantada"):
     """
     Plota as variáveis climáticas mais influentes com nomes mais descritivos.
     """
-    # Renomear variáveis para facilitar a leitura
-    rename_dict = {
-        "temp_max": "Temperatura Máxima (°C)",
-        "temp_avg": "Temperatura Média (°C)",
-        "temp_min": "Temperatura Mínima (°C)",
-        "hum_max": "Umidade Máxima (%)",
-        "rain_max": "Precipitação Máxima (mm)",
-        "rad_max": "Radiação Máxima (W/m²)",
-        "wind_avg": "Velocidade Média do Vento (m/s)",
-        "wind_max": "Velocidade Máxima do Vento (m/s)",
-        "hum_min": "Umidade Mínima (%)",
-        "Ano": "Ano",
-        "Area_Plantada": "Área Plantada",
-    }
-
-    correlations = correlations.drop(
-        "Area_Plantada", errors="ignore"
-    )  # Remover redundância
-    correlations = correlations.rename(index=rename_dict)  # Renomear variáveis
+    correlations = correlations.drop(metric, errors="ignore")  # Remover redundância
+    correlations = correlations.rename(index=CLIMATE_LABELS)  # Renomear variáveis
     correlations = correlations.sort_values(ascending=False)  # Ordenar por correlação
 
     # Criar o gráfico
@@ -230,7 +493,10 @@ def plot_climatic_influence(correlations: pd.Series):
     sns.barplot(
         x=correlations.values, y=correlations.index, hue=correlations.index, dodge=False
     )
-    plt.title("Correlação entre Variáveis Climáticas e Área Plantada de Algodão")
+    plt.title(
+        "Correlação entre Variáveis Climáticas e "
+        f"{metric_label(metric, unit=False)} de Algodão"
+    )
     plt.xlabel("Correlação")
     plt.ylabel("Variáveis Climáticas")
     plt.grid(axis="x", linestyle="--", alpha=0.7)
@@ -240,16 +506,189 @@ def plot_climatic_influence(correlations: pd.Series):
     st.pyplot(plt)
 
 
-def plot_historical_trends(historical_trends: pd.DataFrame):
+def plot_historical_trends(
+    historical_trends: pd.DataFrame,
+    metric="Area_Plantada",
+    backend="matplotlib",
+    cache_key=None,
+):
     """
-    Plota as tendências históricas na área plantada.
+    Plota as tendências históricas da métrica (por padrão, a área plantada).
     """
-    plt.figure(figsize=(10, 6))
-    sns.lineplot(data=historical_trends, x="Ano", y="Area_Planted")
-    plt.title("Tendências Históricas da Área Plantada")
-    plt.xlabel("Ano")
-    plt.ylabel("Área Plantada (ha)")
-    st.pyplot(plt)
+    if backend == "plotly":
+        fig = go.Figure(
+            _line_traces(historical_trends["Ano"], historical_trends[metric], metric)
+        )
+        fig.update_layout(
+            title=f"Tendências Históricas: {metric_label(metric, unit=False)}",
+            xaxis_title="Ano",
+            yaxis_title=metric_label(metric),
+            hovermode="x unified",
+        )
+        _show_plotly(fig)
+        return
+
+    def draw():
+        plt.figure(figsize=(10, 6))
+        sns.lineplot(data=historical_trends, x="Ano", y=metric)
+        plt.title(f"Tendências Históricas: {metric_label(metric, unit=False)}")
+        plt.xlabel("Ano")
+        plt.ylabel(metric_label(metric))
+
+    _show_matplotlib(draw, cache_key)
+
+
+# Cor de cada classe de tendência (Mann-Kendall)
+TREND_COLORS = {"alta": "#2ca02c", "queda": "#d62728", "sem tendência": "#7f7f7f"}
+
+
+def plot_trend_slopes(
+    trends: pd.DataFrame, metric="Area_Plantada", backend="matplotlib", cache_key=None
+):
+    """
+    Inclinação de Sen (variação por safra) de cada UF, colorida pela
+    significância do teste de Mann-Kendall.
+    """
+    data = trends.sort_values("Sen")
+    title = f"Tendência por UF: {metric_label(metric, unit=False)}"
+    if backend == "plotly":
+        fig = go.Figure(
+            go.Bar(
+                x=data["Sen"],
+                y=data["Região/UF"],
+                orientation="h",
+                marker_color=data["Tendência"].map(TREND_COLORS),
+                customdata=data[["p_valor", "Tendência"]],
+                hovertemplate="%{y}: %{x:.2f} por safra<br>p = %{customdata[0]:.3g}"
+                " (%{customdata[1]})<extra></extra>",
+            )
+        )
+        fig.update_layout(
+            title=title,
+            xaxis_title="Inclinação de Sen (por safra)",
+            height=max(400, 18 * len(data)),
+        )
+        _show_plotly(fig)
+        return
+
+    def draw():
+        plt.figure(figsize=(8, max(4, 0.25 * len(data))))
+        plt.barh(
+            data["Região/UF"], data["Sen"], color=data["Tendência"].map(TREND_COLORS)
+        )
+        plt.title(title)
+        plt.xlabel("Inclinação de Sen (por safra)")
+        plt.grid(axis="x", linestyle="--", alpha=0.7)
+
+    _show_matplotlib(draw, cache_key)
+
+
+def plot_rank_stability(
+    summary: pd.DataFrame, metric="Area_Plantada", backend="matplotlib", cache_key=None
+):
+    """
+    Posição de cada UF no ranking com o intervalo de 95% das posições nas
+    reamostragens (UFs com intervalos longos têm posição pouco estável).
+    """
+    data = summary.iloc[::-1]
+    ufs = data.index.astype(str)
+    title = f"Estabilidade do Ranking: {metric_label(metric, unit=False)}"
+    low = data["Posição mediana"] - data["IC 2,5%"]
+    high = data["IC 97,5%"] - data["Posição mediana"]
+    if backend == "plotly":
+        fig = go.Figure(
+            go.Scatter(
+                x=data["Posição mediana"],
+                y=ufs,
+                mode="markers",
+                error_x=dict(type="data", array=high, arrayminus=low),
+                customdata=data[["Posição", "IC 2,5%", "IC 97,5%"]],
+                hovertemplate="%{y}: posição %{customdata[0]} (mediana %{x}, "
+                "IC %{customdata[1]}–%{customdata[2]})<extra></extra>",
+            )
+        )
+        fig.update_layout(
+            title=title,
+            xaxis_title="Posição no ranking (mediana e IC 95%)",
+            height=max(400, 18 * len(data)),
+        )
+        _show_plotly(fig)
+        return
+
+    def draw():
+        plt.figure(figsize=(8, max(4, 0.25 * len(data))))
+        plt.errorbar(data["Posição mediana"], ufs, xerr=[low, high], fmt="o", capsize=3)
+        plt.title(title)
+        plt.xlabel("Posição no ranking (mediana e IC 95%)")
+        plt.grid(axis="x", linestyle="--", alpha=0.7)
+
+    _show_matplotlib(draw, cache_key)
+
+
+def plot_change_points(
+    segments: pd.DataFrame, metric="Area_Plantada", backend="matplotlib", cache_key=None
+):
+    """
+    Série de cada UF com os níveis entre as quebras estruturais (linha em
+    degraus) e as safras de quebra marcadas.
+    """
+    title = f"Quebras Estruturais: {metric_label(metric, unit=False)}"
+    groups = list(segments.groupby("Região/UF", sort=False))
+    if backend == "plotly":
+        fig = go.Figure()
+        for index, (uf, series) in enumerate(groups):
+            color = px.colors.qualitative.Plotly[index % 10]
+            fig.add_trace(
+                go.Scatter(
+                    x=series["Safra"],
+                    y=series[metric],
+                    name=uf,
+                    mode="lines+markers",
+                    line=dict(color=color),
+                )
+            )
+            fig.add_trace(
+                go.Scatter(
+                    x=series["Safra"],
+                    y=series["Nível"],
+                    name=f"{uf} (nível)",
+                    mode="lines",
+                    line=dict(color=color, dash="dash", shape="hvh"),
+                )
+            )
+            breaks = series.loc[series["Quebra"], "Safra"]
+            for safra in breaks:
+                fig.add_vline(x=safra - 0.5, line=dict(color=color, dash="dot"))
+        fig.update_layout(
+            title=title,
+            xaxis_title="Safra",
+            yaxis_title=metric_label(metric),
+            hovermode="x unified",
+        )
+        _show_plotly(fig)
+        return
+
+    def draw():
+        plt.figure(figsize=(10, 6))
+        for uf, series in groups:
+            (line,) = plt.plot(series["Safra"], series[metric], marker="o", label=uf)
+            plt.step(
+                series["Safra"],
+                series["Nível"],
+                where="mid",
+                linestyle="--",
+                color=line.get_color(),
+            )
+            breaks = series.loc[series["Quebra"], "Safra"]
+            for safra in breaks:
+                plt.axvline(safra - 0.5, linestyle=":", color=line.get_color())
+        plt.title(title)
+        plt.xlabel("Safra")
+        plt.ylabel(metric_label(metric))
+        plt.legend()
+        plt.grid()
+
+    _show_matplotlib(draw, cache_key)
 
 
 def plot_scatter(cotton_data: pd.DataFrame, weather_data: pd.DataFrame):
@@ -294,42 +733,139 @@ def plot_scatter(cotton_data: pd.DataFrame, weather_data: pd.DataFrame):
     st.pyplot(plt)
 
 
-def plot_interactive_scatter(data):
+def plot_interactive_scatter(data, metric="Area_Plantada", max_points=50000):
     """
-    Gera um gráfico interativo usando Plotly.
+    Gera um gráfico interativo usando Plotly (WebGL, com amostra determinística
+    quando há pontos demais para o navegador).
     """
+    data = data.dropna(subset=["temp_avg", metric])
+    if len(data) > max_points:
+        data = data.sample(n=max_points, random_state=42)
+
     fig = px.scatter(
         data,
         x="temp_avg",
-        y="Area_Plantada",
-        title="Dispersão: Temperatura Média vs Área Plantada",
-        labels={"temp_avg": "Temperatura Média", "Area_Plantada": "Área Plantada"},
+        y=metric,
+        title=f"Dispersão: Temperatura Média vs {metric_label(metric, unit=False)}",
+        labels={"temp_avg": "Temperatura Média", metric: metric_label(metric)},
+        render_mode="webgl" if len(data) >= WEBGL_MIN_POINTS else "svg",
     )
     fig.update_traces(marker=dict(size=5, opacity=0.7))
+    _show_plotly(fig)
 
-    st.pyplot(plt)
 
+def _line_traces(x, y, name, **kwargs) -> list:
+    """
+    Traço de linha reduzido (mínimos e máximos por faixa) de uma série por ano.
+    """
+    x, y = pd.Series(x).to_numpy(), pd.Series(y).to_numpy(dtype=float)
+    order = np.argsort(x, kind="mergesort")
+    x, y = x[order], y[order]
+    keep = downsample_trace(x, y)
+    return [_scatter_trace(x[keep], y[keep], name=name, **kwargs)]
+
+
+def plot_historical_trends_with_prediction(
+    historical_trends,
+    predicted_areas,
+    metric="Area_Plantada",
+    backend="matplotlib",
+    cache_key=None,
+):
+    if backend == "plotly":
+        fig = go.Figure(
+            _line_traces(
+                historical_trends["Ano"],
+                historical_trends[metric],
+                "Histórico",
+                mode="lines+markers",
+                line=dict(color="blue"),
+            )
+            + _line_traces(
+                predicted_areas["Ano"],
+                predicted_areas[f"{metric}_Predicted"],
+                "Previsão",
+                mode="lines",
+                line=dict(color="orange", dash="dash"),
+            )
+        )
+        fig.update_layout(
+            title="Tendências Históricas e Previsão",
+            xaxis_title="Ano",
+            yaxis_title=metric_label(metric),
+            hovermode="x unified",
+        )
+        _show_plotly(fig)
+        return
+
+    def draw():
+        plt.figure(figsize=(10, 6))
+        plt.plot(
+            historical_trends["Ano"],
+            historical_trends[metric],
+            label="Histórico",
+            marker="o",
+            color="blue",
+        )
+        plt.plot(
+            predicted_areas["Ano"],
+            predicted_areas[f"{metric}_Predicted"],
+            label="Previsão",
+            linestyle="--",
+            color="orange",
+        )
+        plt.title("Tendências Históricas e Previsão")
+        plt.xlabel("Ano")
+        plt.ylabel(metric_label(metric))
+        plt.legend()
+        plt.grid()
+
+    _show_matplotlib(draw, cache_key)
+
+
+def save_summary_figures(
+    historical_trends,
+    climatic_influences,
+    predicted_areas,
+    output_dir,
+    metric="Area_Plantada",
+):
+    """
+    Salva em PNG os gráficos de resumo, fora do Streamlit (usado pelo pipeline).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
 
-def plot_historical_trends_with_prediction(historical_trends, predicted_areas):
-    plt.figure(figsize=(10, 6))
-    plt.plot(
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.plot(
         historical_trends["Ano"],
-        historical_trends["Area_Planted"],
+        historical_trends[metric],
         label="Histórico",
         marker="o",
-        color="blue",
     )
-    plt.plot(
+    ax.plot(
         predicted_areas["Ano"],
-        predicted_areas["Area_Planted_Predicted"],
+        predicted_areas[f"{metric}_Predicted"],
         label="Previsão",
         linestyle="--",
-        color="orange",
     )
-    plt.title("Tendências Históricas e Previsão da Área Plantada")
-    plt.xlabel("Ano")
-    plt.ylabel("Área Plantada (ha)")
-    plt.legend()
-    plt.grid()
-    st.pyplot(plt)
-    plt.close()
+    ax.set_title("Tendências Históricas e Previsão")
+    ax.set_xlabel("Ano")
+    ax.set_ylabel(metric_label(metric))
+    ax.legend()
+    ax.grid()
+    paths.append(os.path.join(output_dir, "tendencias_historicas.png"))
+    fig.savefig(paths[-1], bbox_inches="tight")
+    plt.close(fig)
+
+    correlations = climatic_influences.drop(metric, errors="ignore")
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.barh(correlations.index, correlations.values)
+    ax.set_title("Correlação entre Variáveis Climáticas e Área Plantada de Algodão")
+    ax.set_xlabel("Correlação")
+    ax.grid(axis="x", linestyle="--", alpha=0.7)
+    paths.append(os.path.join(output_dir, "influencia_climatica.png"))
+    fig.savefig(paths[-1], bbox_inches="tight")
+    plt.close(fig)
+
+    return paths
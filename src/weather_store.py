@@ -0,0 +1,284 @@
+import json
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from data_cleaning import COVERAGE_COLUMN
+from fingerprint import combine_fingerprints, fingerprint_frame, fingerprint_params
+from resampling import FREQUENCIES, station_timestamps
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+STORE_DIR = os.path.join(BASE_DIR, "data", "processed", "weather_store")
+INDEX_NAME = "index.json"
+
+# Reduções disponíveis (ignoram as ausências)
+REDUCTIONS = {
+    "mean": np.nanmean,
+    "sum": np.nansum,
+    "min": np.nanmin,
+    "max": np.nanmax,
+    "std": np.nanstd,
+    "count": lambda values, axis: (~np.isnan(values)).sum(axis=axis),
+}
+
+
+def _read_index(store_dir: str) -> dict:
+    path = os.path.join(store_dir, INDEX_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def _write_index(store_dir: str, index: dict):
+    path = os.path.join(store_dir, INDEX_NAME)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as file:
+        json.dump(index, file)
+    os.replace(f"{path}.tmp", path)
+
+
+def build_weather_store(
+    weather_data: pd.DataFrame, store_dir: str = STORE_DIR, climate_vars=None
+) -> dict:
+    """
+    Grava uma matriz densa estação × instante por variável (``<variável>.npy``,
+    float32), na resolução original dos dados (hora, se houver ``HORA (UTC)``,
+    ou dia), com as estações em ordem e um índice ``index.json``.
+
+    Ausências ficam como NaN, que servem de máscara nas reduções. Se os dados
+    não mudaram desde a última gravação, os arquivos existentes são mantidos.
+    Retorna o índice (metadados sem os valores).
+    """
+    try:
+        if climate_vars is None:
+            climate_vars = [
+                col
+                for col in weather_data.select_dtypes(include="float").columns
+                if col != COVERAGE_COLUMN
+            ]
+        columns = ["ESTACAO", "DATA (YYYY-MM-DD)", "HORA (UTC)", *climate_vars]
+        version = combine_fingerprints(
+            fingerprint_frame(weather_data[[c for c in columns if c in weather_data]]),
+            fingerprint_params({"vars": list(climate_vars)}),
+        )
+        index = _read_index(store_dir)
+        if index.get("fingerprint") == version and all(
+            os.path.exists(os.path.join(store_dir, f"{var}.npy"))
+            for var in climate_vars
+        ):
+            return index
+
+        timestamps, unit = station_timestamps(weather_data)
+        instants = timestamps.astype(f"datetime64[{unit}]")
+        codes, stations = pd.factorize(weather_data["ESTACAO"], sort=True)
+        valid = (codes >= 0) & ~np.isnat(instants)
+        first, last = instants[valid].min(), instants[valid].max()
+        rows = codes[valid]
+        offsets = (instants[valid] - first).astype(np.int64)
+        shape = (len(stations), int((last - first).astype(np.int64)) + 1)
+
+        # Cada variável é escrita diretamente no arquivo mapeado, sem montar a
+        # matriz completa na memória; o arquivo final substitui o anterior de
+        # forma atômica (leitores com o arquivo antigo aberto não são afetados)
+        os.makedirs(store_dir, exist_ok=True)
+        for var in climate_vars:
+            path = os.path.join(store_dir, f"{var}.npy")
+            array = np.lib.format.open_memmap(
+                f"{path}.tmp", mode="w+", dtype=np.float32, shape=shape
+            )
+            array[:] = np.nan
+            array[rows, offsets] = weather_data[var].to_numpy(dtype=float)[valid]
+            array.flush()
+            del array
+            os.replace(f"{path}.tmp", path)
+
+        index = {
+            "fingerprint": version,
+            "vars": list(climate_vars),
+            "stations": [str(station) for station in stations],
+            "start": str(first),
+            "unit": unit,
+            "n_periods": shape[1],
+            "store_dir": store_dir,
+        }
+        _write_index(store_dir, index)
+        return index
+    except Exception as e:
+        raise RuntimeError(f"Erro ao gravar a matriz das estações: {e}")
+
+
+def open_weather_store(store_dir: str = STORE_DIR) -> dict:
+    """
+    Abre a matriz das estações em modo somente leitura (memória mapeada): nada
+    é lido do disco até ser acessado, e processos diferentes compartilham as
+    mesmas páginas do cache do sistema operacional.
+    """
+    try:
+        index = _read_index(store_dir)
+        if not index:
+            raise FileNotFoundError(f"Índice não encontrado em {store_dir}")
+        start = np.datetime64(index["start"], index["unit"])
+        return {
+            "values": {
+                var: np.load(os.path.join(store_dir, f"{var}.npy"), mmap_mode="r")
+                for var in index["vars"]
+            },
+            "stations": pd.Index(index["stations"], name="ESTACAO"),
+            "periods": pd.DatetimeIndex(
+                (start + np.arange(index["n_periods"])).astype("datetime64[ns]"),
+                name="DATA",
+            ),
+            "vars": index["vars"],
+            "unit": index["unit"],
+        }
+    except Exception as e:
+        raise RuntimeError(f"Erro ao abrir a matriz das estações: {e}")
+
+
+def ensure_weather_store(weather_data: pd.DataFrame, index: dict) -> dict:
+    """
+    Abre a matriz descrita por ``index`` (retorno de ``build_weather_store``).
+    Se o diretório foi apagado ou regravado com outros dados (outra execução
+    ou réplica), a matriz é regravada a partir de ``weather_data`` antes.
+    """
+    try:
+        store_dir = index["store_dir"]
+        if _read_index(store_dir).get("fingerprint") != index["fingerprint"]:
+            build_weather_store(weather_data, store_dir, index["vars"])
+        return open_weather_store(store_dir)
+    except Exception as e:
+        raise RuntimeError(f"Erro ao abrir a matriz das estações: {e}")
+
+
+def _period_slice(store: dict, start=None, end=None) -> slice:
+    """
+    Colunas do intervalo [start, end] (datas inclusivas).
+    """
+    periods = store["periods"]
+    left = 0 if start is None else periods.searchsorted(pd.Timestamp(start), "left")
+    right = (
+        len(periods)
+        if end is None
+        else periods.searchsorted(pd.Timestamp(end), "right")
+    )
+    return slice(left, right)
+
+
+def _station_rows(store: dict, stations):
+    """
+    Linhas das estações pedidas: uma fatia quando elas são contíguas (visão sem
+    cópia) ou a lista de posições.
+    """
+    if stations is None:
+        return slice(None)
+    if np.isscalar(stations):
+        return store["stations"].get_loc(str(stations))
+    positions = np.sort(store["stations"].get_indexer([str(s) for s in stations]))
+    positions = positions[positions >= 0]
+    if len(positions) and positions[-1] - positions[0] + 1 == len(positions):
+        return slice(int(positions[0]), int(positions[-1]) + 1)
+    return positions
+
+
+def store_slice(store: dict, var: str, stations=None, start=None, end=None):
+    """
+    Valores de uma variável para as estações e o período pedidos.
+
+    Uma estação ou um conjunto contíguo de estações com uma janela de datas é
+    uma visão do arquivo mapeado (sem cópia); estações esparsas são copiadas.
+    Retorna a matriz (ou vetor, para uma estação), as estações e os instantes.
+    """
+    try:
+        rows = _station_rows(store, stations)
+        columns = _period_slice(store, start, end)
+        values = store["values"][var][rows, columns]
+        station_index = store["stations"][rows]
+        if np.isscalar(station_index):
+            station_index = pd.Index([station_index], name="ESTACAO")
+        return values, station_index, store["periods"][columns]
+    except Exception as e:
+        raise RuntimeError(f"Erro ao selecionar a matriz das estações: {e}")
+
+
+def store_reduce(
+    store: dict,
+    var: str,
+    how: str = "mean",
+    over: str = "time",
+    stations=None,
+    start=None,
+    end=None,
+) -> pd.Series:
+    """
+    Redução vetorizada de uma variável: ao longo do tempo (uma linha por
+    estação, ``over="time"``) ou entre as estações (uma linha por instante,
+    ``over="stations"``).
+    """
+    try:
+        if how not in REDUCTIONS:
+            raise ValueError(f"Redução desconhecida: {how}")
+        values, station_index, periods = store_slice(store, var, stations, start, end)
+        values = np.atleast_2d(values)
+        axis = 1 if over == "time" else 0
+        # Estações ou instantes sem nenhuma medição resultam em NaN
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            result = REDUCTIONS[how](values, axis=axis)
+        index = station_index if over == "time" else periods
+        return pd.Series(np.asarray(result, dtype=float), index=index, name=var)
+    except Exception as e:
+        raise RuntimeError(f"Erro ao reduzir a matriz das estações: {e}")
+
+
+def store_grid(store: dict, freq: str = "daily") -> dict:
+    """
+    Grade estação × período (mesmo formato de ``resample_stations``) lida da
+    matriz das estações: cada período é uma faixa contígua de colunas, somada
+    com ``np.add.reduceat`` em vez de reagrupar a tabela longa.
+    """
+    try:
+        if freq not in FREQUENCIES:
+            raise ValueError(f"Frequência desconhecida: {freq}")
+        unit, base_unit = FREQUENCIES[freq], store["unit"]
+        if unit == "h" and base_unit != "h":
+            raise ValueError("Dados diários não podem ser regularizados por hora.")
+
+        instants = store["periods"].to_numpy().astype(f"datetime64[{base_unit}]")
+        periods_raw = instants.astype(f"datetime64[{unit}]")
+        starts = np.flatnonzero(np.r_[True, periods_raw[1:] != periods_raw[:-1]])
+        periods = periods_raw[starts]
+
+        # Medições esperadas por período na unidade original (ex.: dias do mês)
+        edges = np.append(periods, periods[-1] + 1).astype(f"datetime64[{base_unit}]")
+        expected = np.diff(edges).astype(np.int64)
+
+        shape = (len(store["stations"]), len(periods), len(store["vars"]))
+        values = np.empty(shape, dtype=np.float32)
+        coverage = np.empty(shape, dtype=np.float32)
+        for j, var in enumerate(store["vars"]):
+            matrix = store["values"][var]
+            observed = ~np.isnan(matrix)
+            if len(starts) == matrix.shape[1]:
+                counts, sums = observed.astype(float), np.where(observed, matrix, 0.0)
+            else:
+                counts = np.add.reduceat(observed, starts, axis=1, dtype=float)
+                sums = np.add.reduceat(
+                    np.where(observed, matrix, 0.0), starts, axis=1, dtype=float
+                )
+            with np.errstate(invalid="ignore", divide="ignore"):
+                values[:, :, j] = sums / counts
+            coverage[:, :, j] = np.minimum(counts / expected, 1.0)
+
+        return {
+            "values": values,
+            "coverage": coverage,
+            "filled": np.zeros(shape, dtype=bool),
+            "stations": store["stations"],
+            "periods": pd.DatetimeIndex(periods.astype("datetime64[ns]")),
+            "vars": list(store["vars"]),
+            "freq": freq,
+        }
+    except Exception as e:
+        raise RuntimeError(f"Erro ao montar a grade a partir da matriz: {e}")
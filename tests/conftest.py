@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Os módulos do projeto são importados pelo nome (como em src/app.py)
+SRC_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"
+)
+sys.path.insert(0, SRC_DIR)
@@ -0,0 +1,132 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import api
+from api import DashboardState, make_handler
+
+from .conftest import SRC_DIR
+
+
+class StaticState:
+    """
+    Estado com dados fixos: só a versão (``key``) importa para as rotas usadas.
+    """
+
+    def __init__(self, key):
+        self.data = {"key": key}
+        self.responses = {}
+
+    def current(self):
+        return self.data
+
+    def cached(self, etag):
+        return self.responses.get(etag)
+
+    def store(self, etag, response):
+        self.responses[etag] = response
+
+
+@pytest.fixture
+def server():
+    state = StaticState("v1")
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(state))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}", state
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _get(url, etag=None):
+    request = urllib.request.Request(url)
+    if etag:
+        request.add_header("If-None-Match", etag)
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def test_etag_revalidation(server):
+    base, state = server
+    status, headers, body = _get(f"{base}/metrics")
+    assert status == 200
+    etag = headers["ETag"]
+    assert any(row["metric"] == "Area_Plantada" for row in json.loads(body))
+
+    status, headers, body = _get(f"{base}/metrics", etag)
+    assert status == 304 and body == b"" and headers["ETag"] == etag
+
+    # Outra consulta ou outra versão dos dados: nova ETag
+    assert _get(f"{base}/metrics?format=arrow")[1]["ETag"] != etag
+    state.data = {"key": "v2"}
+    status, headers, _ = _get(f"{base}/metrics", etag)
+    assert status == 200 and headers["ETag"] != etag
+
+
+def test_unknown_route(server):
+    base, _ = server
+    status, _, body = _get(f"{base}/desconhecida")
+    assert status == 404 and "Rota desconhecida" in json.loads(body)["erro"]
+
+
+def test_reload_does_not_block_requests(tmp_path, monkeypatch):
+    (tmp_path / "weather_stations_codes.csv").write_text("A001;MT\n")
+    loading, release = threading.Event(), threading.Event()
+
+    def slow_load(data_dir):
+        if loading.is_set():
+            release.wait(5)
+        loading.set()
+        return {"key": f"v{time.monotonic()}"}
+
+    monkeypatch.setattr(api, "load_dashboard_data", slow_load)
+    monkeypatch.setattr(api, "DATA_CHECK_INTERVAL", 0.0)
+    state = DashboardState(str(tmp_path))
+    old = state.current()
+
+    # Arquivo alterado: uma requisição recarrega e as demais seguem com a
+    # versão anterior, sem esperar a carga
+    (tmp_path / "weather_stations_codes.csv").write_text("A001;MT\nA002;BA\n")
+    reload = threading.Thread(target=state.current)
+    reload.start()
+    time.sleep(0.1)
+    assert state.current() is old
+    assert state.cached("x") is None
+    release.set()
+    reload.join()
+    assert state.current() is not old
+
+
+ETAG_SCRIPT = """
+import sys
+from api import request_etag
+from pipeline import dashboard_data_key
+
+print(request_etag(dashboard_data_key(sys.argv[1]), "/metrics", "b=2&a=1", False))
+"""
+
+
+def test_etag_is_stable_across_restarts(tmp_path):
+    (tmp_path / "weather_stations_codes.csv").write_text("A001;MT\n")
+    etags = [
+        subprocess.run(
+            [sys.executable, "-c", ETAG_SCRIPT, str(tmp_path)],
+            capture_output=True,
+            text=True,
+            env={**os.environ, "PYTHONPATH": SRC_DIR, "PYTHONHASHSEED": seed},
+            check=True,
+        ).stdout.split()[-1]
+        for seed in ("1", "2")
+    ]
+    assert etags[0] == etags[1]
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+from climate_indices import _longest_runs, _window_sums, compute_climate_indices
+
+
+def _chained(n, breaks):
+    continues = np.ones(n, dtype=bool)
+    continues[[0, *breaks]] = False
+    return continues
+
+
+def test_window_sums_match_pandas_rolling():
+    rng = np.random.default_rng(0)
+    values = rng.gamma(1.0, 5.0, 200)
+    values[rng.choice(200, 15, replace=False)] = np.nan
+    continues = _chained(200, [40, 41, 120])
+
+    for days in (1, 3, 5):
+        expected = (
+            pd.Series(values)
+            .groupby(np.cumsum(~continues))
+            .rolling(days, min_periods=days)
+            .sum()
+            .to_numpy()
+        )
+        np.testing.assert_allclose(
+            _window_sums(values, continues, days), expected, equal_nan=True
+        )
+
+
+def test_longest_runs_match_loop():
+    rng = np.random.default_rng(1)
+    condition = rng.random(300) < 0.6
+    group = np.repeat([0, 1, 2], 100)
+    continues = _chained(300, [100, 200, 150])
+
+    expected = np.zeros(3)
+    run = 0
+    for i in range(300):
+        if not condition[i]:
+            run = 0
+        else:
+            run = run + 1 if continues[i] else 1
+        expected[group[i]] = max(expected[group[i]], run)
+    np.testing.assert_array_equal(
+        _longest_runs(condition, continues, group, 3), expected
+    )
+
+
+def test_yearly_indices_match_groupby():
+    rng = np.random.default_rng(2)
+    dates = pd.date_range("2001-01-01", "2002-12-31", freq="D")
+    weather = pd.concat(
+        [
+            pd.DataFrame(
+                {
+                    "ESTACAO": station,
+                    "DATA": dates,
+                    "rain_max": np.where(
+                        rng.random(len(dates)) < 0.4, rng.gamma(1.5, 8, len(dates)), 0
+                    ),
+                    "temp_max": rng.normal(32, 3, len(dates)),
+                    "temp_min": rng.normal(19, 2, len(dates)),
+                }
+            )
+            for station in ("A001", "A002")
+        ],
+        ignore_index=True,
+    )
+    weather.loc[rng.choice(len(weather), 20, replace=False), "rain_max"] = np.nan
+    weather["Ano"] = weather["DATA"].dt.year
+
+    indices = compute_climate_indices(weather, period="year", n_jobs=1)
+
+    for (station, year), data in weather.groupby(["ESTACAO", "Ano"]):
+        rain = data["rain_max"].to_numpy()
+        row = indices.loc[(station, year)]
+        wet = rain >= 1.0
+        assert np.isclose(row["PRCPTOT"], rain[wet].sum(), rtol=1e-5)
+        assert row["R10mm"] == (rain >= 10).sum()
+        assert np.isclose(row["Rx1day"], np.nanmax(rain), rtol=1e-5)
+        assert np.isclose(
+            row["Rx5day"],
+            data["rain_max"].rolling(5, min_periods=5).sum().max(),
+            rtol=1e-5,
+        )
+        assert row["SU35"] == (data["temp_max"] > 35).sum()
+        assert np.isclose(row["TNn"], data["temp_min"].min(), rtol=1e-5)
+
+        longest = run = 0
+        for value in rain:
+            run = run + 1 if value < 1.0 else 0
+            longest = max(longest, run)
+        assert row["CDD"] == longest
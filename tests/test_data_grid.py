@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+from data_grid import query_frame
+
+
+def _table():
+    rng = np.random.default_rng(0)
+    n = 1000
+    table = pd.DataFrame(
+        {
+            "ESTACAO": rng.choice(["A001", "A002", "B003"], n),
+            "Ano": rng.integers(2000, 2010, n),
+            "temp": np.round(rng.normal(25, 3, n), 0),
+            "DATA": pd.to_datetime("2000-01-01")
+            + pd.to_timedelta(rng.integers(0, 3000, n), "D"),
+            "UF": pd.Categorical(rng.choice(["MT", "BA", "GO"], n)),
+        },
+        index=pd.RangeIndex(100, 100 + n),
+    )
+    table.loc[table.index[::37], "temp"] = np.nan
+    return table
+
+
+def _expected(table, filters, sort_by, ascending, page, page_size):
+    selected = table
+    for rule in filters:
+        column = selected[rule["column"]]
+        if "values" in rule:
+            selected = selected[column.isin(rule["values"])]
+        elif "contains" in rule:
+            selected = selected[column.str.contains(rule["contains"], case=False)]
+        else:
+            selected = selected[column.between(rule["min"], rule["max"])]
+    ordered = selected.sort_values(
+        sort_by, ascending=ascending, na_position="last", kind="mergesort"
+    )
+    start = page * page_size
+    return ordered.iloc[start : start + page_size], len(selected)
+
+
+def test_pages_match_full_sort():
+    table = _table()
+    filters = [
+        {"column": "ESTACAO", "contains": "a0"},
+        {"column": "Ano", "min": 2002, "max": 2007},
+    ]
+    for sort_by in ("temp", "DATA", "UF", "ESTACAO"):
+        for ascending in (True, False):
+            for page in (0, 3):
+                result, total = query_frame(
+                    table, None, filters, sort_by, ascending, page, page_size=25
+                )
+                expected, expected_total = _expected(
+                    table, filters, sort_by, ascending, page, 25
+                )
+                assert total == expected_total
+                pd.testing.assert_frame_equal(result, expected)
+
+
+def test_page_beyond_the_end_shows_last_page():
+    table = _table()
+    filters = [{"column": "ESTACAO", "values": ["B003"]}]
+    result, total = query_frame(
+        table, ["ESTACAO", "temp"], filters, "temp", page=999, page_size=50
+    )
+    last_page = (total - 1) // 50
+    expected, _ = _expected(table, filters, "temp", True, last_page, 50)
+    pd.testing.assert_frame_equal(result, expected[["ESTACAO", "temp"]])
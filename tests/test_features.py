@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+from features import (
+    build_station_features,
+    compute_station_features,
+    heat_stress_hours,
+)
+
+
+def _weather():
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("2001-01-01", "2003-12-31", freq="D")
+    frames = [
+        pd.DataFrame(
+            {
+                "ESTACAO": station,
+                "DATA": dates,
+                "temp_min": rng.normal(20, 2, len(dates)),
+                "temp_max": rng.normal(33, 3, len(dates)),
+                "rain_max": rng.gamma(0.5, 8.0, len(dates)),
+            }
+        )
+        for station in ("A001", "A002")
+    ]
+    weather = pd.concat(frames, ignore_index=True)
+    weather.loc[[10, 400], "rain_max"] = np.nan
+    return weather
+
+
+def test_rain_windows_match_rolling_sums():
+    weather = _weather()
+    features = compute_station_features(weather, rain_windows=(30,))
+    for station, group in weather.groupby("ESTACAO"):
+        expected = group["rain_max"].rolling(30, min_periods=30).sum().to_numpy()
+        result = features.loc[features["ESTACAO"] == station, "rain_30d"]
+        np.testing.assert_allclose(result.to_numpy(), expected, rtol=1e-5)
+
+
+def test_heat_stress_hours():
+    hours = heat_stress_hours([20.0, 36.0, 20.0, np.nan], [30.0, 40.0, 40.0, 40.0])
+    np.testing.assert_allclose(hours[:3], [0.0, 24.0, 6.0])
+    assert np.isnan(hours[3])
+
+
+def test_store_recomputes_only_changed_partitions(tmp_path):
+    weather = _weather()
+    first = build_station_features(weather, str(tmp_path))
+    assert first.attrs["store_report"] == [{"Particoes": 6, "Recalculadas": 6}]
+
+    # Um dia alterado em 2002: recalcula 2002 e 2003 (que depende do ano anterior)
+    changed = weather.copy()
+    changed.loc[changed["DATA"] == "2002-06-01", "rain_max"] += 50.0
+    changed = changed[changed["ESTACAO"] == "A001"].reset_index(drop=True)
+    again = build_station_features(changed, str(tmp_path))
+    assert again.attrs["store_report"] == [{"Particoes": 3, "Recalculadas": 2}]
+
+    full = compute_station_features(changed)
+    pd.testing.assert_frame_equal(
+        again.reset_index(drop=True), full, check_dtype=False, check_like=True
+    )
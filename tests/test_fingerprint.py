@@ -0,0 +1,103 @@
+import importlib
+import os
+import subprocess
+import sys
+
+import pytest
+
+import fingerprint
+from fingerprint import fingerprint_dependencies
+
+from .conftest import SRC_DIR
+
+MODULE = """
+LIMIAR = {limiar}
+
+
+def _auxiliar(valor):
+    return valor * {fator}
+
+
+def principal(valor):
+    return _auxiliar(valor) > LIMIAR
+"""
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """
+    Gera módulos do "projeto" em um diretório temporário e retorna o hash das
+    dependências de ``principal`` de cada um.
+    """
+    monkeypatch.setattr(fingerprint, "SRC_DIR", str(tmp_path))
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    def fingerprint_of(name, limiar=10, fator=2):
+        (tmp_path / f"{name}.py").write_text(
+            MODULE.format(limiar=limiar, fator=fator), encoding="utf-8"
+        )
+        return fingerprint_dependencies(importlib.import_module(name).principal)
+
+    return fingerprint_of
+
+
+def test_dependencies_follow_helpers_and_constants(project):
+    base = project("modulo_base")
+    assert project("modulo_igual") == base
+    assert project("modulo_fator", fator=3) != base
+    assert project("modulo_limiar", limiar=11) != base
+
+
+def test_code_outside_project_is_ignored(project, monkeypatch):
+    # Fora de SRC_DIR só o código da própria função entra no hash
+    monkeypatch.setattr(fingerprint, "SRC_DIR", "/outro/diretorio")
+    assert project("modulo_externo", fator=2) == project("modulo_externo_2", fator=3)
+
+
+def test_sequential_roots_keep_their_own_digest():
+    from data_cleaning import load_weather_data, safra_year
+
+    first = fingerprint_dependencies(load_weather_data)
+    second = fingerprint_dependencies(safra_year)
+    assert first != second
+
+    # O resultado guardado de cada função é o dela, não o da anterior
+    fingerprint._dependency_cache.clear()
+    assert fingerprint_dependencies(safra_year) == second
+    assert fingerprint_dependencies(load_weather_data) == first
+
+
+# Histórico de chamadas diferente em cada processo: o hash não pode depender
+# do estado interno (caches em memória) nem da semente de hash do Python
+SUBPROCESS_SCRIPT = """
+import sys
+import fingerprint, pipeline
+from shared_cache import NullCache, cached_call
+
+if sys.argv[1] == "com-historico":
+    from data_cleaning import load_weather_data, safra_year
+    fingerprint.fingerprint_dependencies(load_weather_data)
+    fingerprint.fingerprint_dependencies(safra_year)
+    cached_call("teste", safra_year, 2000, 10, cache=NullCache())
+print(
+    fingerprint.fingerprint_dependencies(pipeline.default_stages),
+    fingerprint.fingerprint_dependencies(pipeline.dashboard_aggregate),
+)
+"""
+
+
+def _subprocess_output(*args, hash_seed):
+    env = {**os.environ, "PYTHONPATH": SRC_DIR, "PYTHONHASHSEED": hash_seed}
+    result = subprocess.run(
+        [sys.executable, "-c", SUBPROCESS_SCRIPT, *args],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    return result.stdout.strip().splitlines()[-1]
+
+
+def test_dependencies_are_stable_across_processes():
+    first = _subprocess_output("sem-historico", hash_seed="1")
+    assert _subprocess_output("com-historico", hash_seed="2") == first
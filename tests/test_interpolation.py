@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+import interpolation
+from interpolation import apply_weights, interpolate_uf_climate, interpolation_weights
+
+STATIONS = pd.DataFrame(
+    {
+        "Região/UF": ["MT", "MT", "BA", "BA"],
+        "LATITUDE": [-12.0, -15.0, -12.5, -14.0],
+        "LONGITUDE": [-56.0, -55.0, -41.0, -43.0],
+    },
+    index=pd.Index(["A001", "A002", "A003", "A004"], name="ESTACAO"),
+)
+
+
+def _weather():
+    rng = np.random.default_rng(0)
+    months = pd.date_range("2001-01-01", "2001-12-01", freq="MS")
+    rows = [
+        {
+            "ESTACAO": station,
+            "Região/UF": uf,
+            "Ano": month.year,
+            "Mes": month.month,
+            "temp_avg": rng.normal(25, 2),
+            "rain_max": rng.gamma(1.0, 10.0),
+        }
+        for station, uf in STATIONS["Região/UF"].items()
+        for month in months
+    ]
+    return pd.DataFrame(rows)
+
+
+def test_weights_reproduce_stations_and_constants():
+    coordinates = STATIONS[["LATITUDE", "LONGITUDE"]].to_numpy()
+    targets = np.vstack([coordinates, [[-13.0, -50.0], [-10.0, -45.0]]])
+    for method in ("idw", "kriging"):
+        neighbours, weights = interpolation_weights(coordinates, targets, method)
+        np.testing.assert_allclose(weights.sum(axis=1), 1.0)
+
+        # Nas próprias estações, o valor da estação; um campo constante se mantém
+        values = np.array([[1.0, 5.0], [2.0, 6.0], [3.0, 7.0], [4.0, 8.0]])
+        result = apply_weights(values, neighbours, weights)
+        np.testing.assert_allclose(result[:4], values, atol=1e-6)
+        constant = apply_weights(np.full((4, 1), 7.0), neighbours, weights)
+        np.testing.assert_allclose(constant, 7.0)
+
+
+def test_weights_are_computed_once_for_all_variables(tmp_path, monkeypatch):
+    calls = []
+
+    def counted(*args, **kwargs):
+        calls.append(args[2] if len(args) > 2 else kwargs.get("method"))
+        return interpolation_weights(*args, **kwargs)
+
+    monkeypatch.setattr(interpolation, "interpolation_weights", counted)
+    uf_climate = interpolate_uf_climate(
+        _weather(),
+        STATIONS,
+        climate_vars=["temp_avg", "rain_max"],
+        resolution=1.0,
+        geojson_path=str(tmp_path / "sem_geojson.json"),
+        cache_dir=str(tmp_path / "cache"),
+    )
+    assert calls == ["idw"]
+    assert set(uf_climate["Região/UF"]) == {"MT", "BA"}
+    assert (
+        len(uf_climate) == 24
+        and uf_climate[["temp_avg", "rain_max"]].notna().all().all()
+    )
@@ -0,0 +1,103 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import modeling
+from modeling import (
+    build_feature_table,
+    evict_models,
+    time_series_folds,
+    train_yield_model,
+)
+
+
+def _features():
+    rng = np.random.default_rng(0)
+    rows = []
+    for uf in ("MT", "BA", "GO"):
+        for safra in range(2005, 2020):
+            temp = rng.normal(25, 2)
+            rows.append(
+                {
+                    "Região/UF": uf,
+                    "Safra": safra,
+                    "temp_avg_lag0": temp,
+                    "Area_Plantada": 100 + 5 * temp + rng.normal(0, 1),
+                }
+            )
+    return pd.DataFrame(rows)
+
+
+def test_folds_do_not_leak_future_safras():
+    safras = np.repeat(np.arange(2005, 2020), 3)
+    folds = list(time_series_folds(safras, n_splits=5))
+    assert len(folds) == 5
+    for train_idx, test_idx in folds:
+        # Safras inteiras em cada lado, todas as de treino antes das de teste
+        assert safras[train_idx].max() < safras[test_idx].min()
+        assert not np.isin(safras[test_idx], safras[train_idx]).any()
+
+    # Poucas safras: menos folds
+    assert len(list(time_series_folds(np.array([1, 2, 3]), n_splits=5))) == 2
+
+
+def test_model_cache_hit_and_miss(tmp_path, monkeypatch):
+    built = []
+    factory = modeling.MODEL_FACTORIES["ridge"]
+    monkeypatch.setitem(
+        modeling.MODEL_FACTORIES,
+        "ridge",
+        lambda params: built.append(params) or factory(params),
+    )
+    features = _features()
+    first = train_yield_model(
+        features, model_name="ridge", n_jobs=1, model_dir=str(tmp_path)
+    )
+    again = train_yield_model(
+        features, model_name="ridge", n_jobs=1, model_dir=str(tmp_path)
+    )
+    assert len(built) == 1 and again["key"] == first["key"]
+    pd.testing.assert_frame_equal(again["cv_scores"], first["cv_scores"])
+
+    # Outros hiperparâmetros ou outros dados: novo treino
+    other = train_yield_model(
+        features,
+        model_name="ridge",
+        params={"alpha": 10.0},
+        n_jobs=1,
+        model_dir=str(tmp_path),
+    )
+    assert len(built) == 2 and other["key"] != first["key"]
+    changed = features.assign(Area_Plantada=features["Area_Plantada"] + 1)
+    train_yield_model(changed, model_name="ridge", n_jobs=1, model_dir=str(tmp_path))
+    assert len(built) == 3
+
+
+def test_old_models_are_evicted(tmp_path):
+    for age in range(5):
+        path = tmp_path / f"ridge-{age}.joblib"
+        path.write_bytes(b"")
+        os.utime(path, (1000 + age, 1000 + age))
+    evict_models(str(tmp_path), max_models=2)
+    assert sorted(os.listdir(tmp_path)) == ["ridge-3.joblib", "ridge-4.joblib"]
+
+
+def test_feature_table_uses_uf_safra_windows():
+    # Janela do MT vai de dezembro a setembro do ano seguinte: dezembro de 2010
+    # e julho de 2011 pertencem à safra 2010; outubro de 2010 fica fora
+    weather = pd.DataFrame(
+        {
+            "Região/UF": "MT",
+            "Ano": [2010, 2010, 2011, 2011],
+            "Mes": [10, 12, 7, 12],
+            "temp_avg": [99.0, 20.0, 30.0, 40.0],
+        }
+    )
+    cotton = pd.DataFrame(
+        {"Região/UF": "MT", "Ano": [2010, 2011], "Area_Plantada": [1.0, 2.0]}
+    )
+    table = build_feature_table(cotton, weather, climate_vars=["temp_avg"])
+    assert table["temp_avg_lag0"].tolist() == [25.0, 40.0]
+    assert np.isnan(table["temp_avg_lag1"].iloc[0])
+    assert table["temp_avg_lag1"].iloc[1] == 25.0
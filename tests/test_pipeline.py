@@ -0,0 +1,66 @@
+import os
+
+import pandas as pd
+
+from pipeline import run_pipeline, stage
+
+
+def _read(filepath):
+    return pd.read_csv(filepath)
+
+
+def _double(raw):
+    return raw * 2
+
+
+def _total(doubled, offset=0):
+    return doubled.sum() + offset
+
+
+def _stages(path, offset=0):
+    return {
+        "raw": stage(_read, files={"filepath": path}),
+        "doubled": stage(_double, deps=("raw",)),
+        "total": stage(_total, deps=("doubled",), params={"offset": offset}),
+    }
+
+
+def _run(tmp_path, path, **kwargs):
+    results, report = run_pipeline(
+        _stages(path, **kwargs),
+        store_dir=str(tmp_path / "artefatos"),
+        provenance_path=str(tmp_path / "prov.jsonl"),
+    )
+    return results["total"], report.set_index("Etapa")["Status"].to_dict()
+
+
+def test_stages_are_reused_until_inputs_change(tmp_path):
+    path = tmp_path / "dados.csv"
+    path.write_text("a,b\n1,2\n3,4\n")
+
+    total, status = _run(tmp_path, str(path))
+    assert set(status.values()) == {"executada"}
+    assert total.tolist() == [8, 12]
+
+    total, status = _run(tmp_path, str(path))
+    assert set(status.values()) == {"reutilizada"}
+    assert total.tolist() == [8, 12]
+
+    # Só a data de modificação mudou: o conteúdo é o mesmo e nada é recalculado
+    os.utime(path, (1_000_000, 1_000_000))
+    assert set(_run(tmp_path, str(path))[1].values()) == {"reutilizada"}
+
+    # Parâmetro de uma etapa: só ela e as seguintes são recalculadas
+    total, status = _run(tmp_path, str(path), offset=1)
+    assert status == {
+        "raw": "reutilizada",
+        "doubled": "reutilizada",
+        "total": "executada",
+    }
+    assert total.tolist() == [9, 13]
+
+    # Conteúdo do arquivo: toda a cadeia
+    path.write_text("a,b\n1,2\n3,5\n")
+    total, status = _run(tmp_path, str(path))
+    assert set(status.values()) == {"executada"}
+    assert total.tolist() == [8, 14]
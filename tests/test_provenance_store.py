@@ -0,0 +1,63 @@
+import datetime
+
+from provenance_store import (
+    append_records,
+    node,
+    read_records,
+    relation,
+    select_subgraph,
+    to_prov_document,
+)
+
+
+def _run(day: int, prefix: str) -> list:
+    """
+    Uma execução: arquivo bruto → limpeza → tabela → análise → figura.
+    """
+    start = datetime.datetime(2024, 1, day, 10, 0)
+    return [
+        node("entity", f"pipe:{prefix}_raw", {"pipe:sha256": prefix}),
+        node("activity", f"pipe:{prefix}_clean", start=start, end=start),
+        node("entity", f"pipe:{prefix}_table"),
+        node("activity", f"pipe:{prefix}_analysis", start=start, end=start),
+        node("entity", f"pipe:{prefix}_figure"),
+        relation("used", f"pipe:{prefix}_clean", f"pipe:{prefix}_raw"),
+        relation("wasGeneratedBy", f"pipe:{prefix}_table", f"pipe:{prefix}_clean"),
+        relation("used", f"pipe:{prefix}_analysis", f"pipe:{prefix}_table"),
+        relation("wasGeneratedBy", f"pipe:{prefix}_figure", f"pipe:{prefix}_analysis"),
+    ]
+
+
+def _ids(records):
+    return {record.get("id") for record in records if "id" in record}
+
+
+def test_records_round_trip_and_append(tmp_path):
+    path = str(tmp_path / "prov.jsonl")
+    append_records(_run(1, "a"), path)
+    append_records(_run(2, "b"), path)
+    append_records([], path)
+    records = read_records(path)
+    assert records == _run(1, "a") + _run(2, "b")
+    assert read_records(str(tmp_path / "ausente.jsonl")) == []
+
+
+def test_lineage_selection():
+    records = _run(1, "a") + _run(2, "b")
+    ancestors = select_subgraph(records, roots=["pipe:a_table"])
+    assert _ids(ancestors) == {"pipe:a_table", "pipe:a_clean", "pipe:a_raw"}
+    assert len(ancestors) == 5  # três nós e duas relações entre eles
+
+    descendants = select_subgraph(
+        records, roots=["pipe:b_table"], direction="descendants"
+    )
+    assert _ids(descendants) == {"pipe:b_table", "pipe:b_analysis", "pipe:b_figure"}
+
+
+def test_time_window_selects_one_run():
+    records = _run(1, "a") + _run(2, "b")
+    window = select_subgraph(records, start=datetime.datetime(2024, 1, 2))
+    assert _ids(window) == _ids(_run(2, "b"))
+
+    document = to_prov_document(window)
+    assert len(document.get_records()) == len(window)
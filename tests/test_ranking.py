@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+import ranking
+from ranking import bootstrap_rankings, regional_scores
+
+
+def _cotton_data():
+    rng = np.random.default_rng(0)
+    rows = [
+        {"Região/UF": uf, "Ano": year, "Area_Plantada": level + slope * i + noise}
+        for uf, level, slope in (
+            ("MT", 800, 30),
+            ("BA", 300, 10),
+            ("GO", 100, 2),
+            ("MS", 90, 3),
+        )
+        for i, (year, noise) in enumerate(zip(range(2005, 2021), rng.normal(0, 5, 16)))
+    ]
+    # Agregados regionais ficam fora do ranking
+    rows.append({"Região/UF": "CENTRO-OESTE", "Ano": 2020, "Area_Plantada": 1e6})
+    return pd.DataFrame(rows)
+
+
+def test_regional_scores_match_polyfit():
+    rng = np.random.default_rng(1)
+    values = rng.normal(10, 3, (4, 12))
+    values[0, 3] = np.nan
+    years = np.arange(2009, 2021, dtype=float)
+    scores = regional_scores(values, years, years[-1])
+    for row, series in enumerate(values):
+        valid = ~np.isnan(series)
+        fit = np.polyfit(years[valid], series[valid], 1)
+        assert np.isclose(scores[row], np.polyval(fit, years[-1]))
+
+    means = regional_scores(values, years, years[-1], trend_weight=0.0)
+    np.testing.assert_allclose(means, np.nanmean(values, axis=1))
+
+
+def test_bootstrap_is_deterministic_across_jobs(monkeypatch):
+    data = _cotton_data()
+    serial = bootstrap_rankings(data, n_resamples=1000, n_jobs=1, seed=3)
+    assert list(serial["summary"].index) == ["MT", "BA", "GO", "MS"]
+
+    monkeypatch.setattr(ranking, "PARALLEL_MIN_RESAMPLES", 0)
+    threaded = bootstrap_rankings(data, n_resamples=1000, n_jobs=3, seed=3)
+    pd.testing.assert_frame_equal(serial["distribution"], threaded["distribution"])
+    pd.testing.assert_frame_equal(serial["summary"], threaded["summary"])
+
+    # Cada reamostragem dá uma posição a cada UF
+    np.testing.assert_allclose(serial["distribution"].sum(axis=1), 1.0)
+    assert serial["summary"].loc["MT", "P(1º)"] > 0.99
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+from resampling import fill_gaps, resample_stations
+from weather_store import build_weather_store, open_weather_store, store_grid
+
+
+def _weather():
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("2001-01-01", "2001-06-30", freq="D")
+    weather = pd.concat(
+        [
+            pd.DataFrame(
+                {
+                    "ESTACAO": station,
+                    "DATA (YYYY-MM-DD)": dates.strftime("%Y-%m-%d"),
+                    "temp_avg": rng.normal(25, 3, len(dates)),
+                }
+            )
+            for station in ("A001", "A002")
+        ],
+        ignore_index=True,
+    )
+    # A001 sem fevereiro inteiro; A002 com alguns dias sem medição
+    missing = weather["ESTACAO"].eq("A001") & weather["DATA (YYYY-MM-DD)"].str[5:7].eq(
+        "02"
+    )
+    weather.loc[[200, 201, 250], "temp_avg"] = np.nan
+    return weather[~missing].reset_index(drop=True)
+
+
+def test_monthly_means_and_coverage_match_pandas():
+    weather = _weather()
+    grid = resample_stations(weather, "monthly")
+    month = weather["DATA (YYYY-MM-DD)"].str[:7]
+    expected = weather.groupby(["ESTACAO", month])["temp_avg"].agg(["mean", "count"])
+
+    for i, station in enumerate(grid["stations"]):
+        for t, period in enumerate(grid["periods"]):
+            key = (station, period.strftime("%Y-%m"))
+            if key not in expected.index:
+                assert np.isnan(grid["values"][i, t, 0])
+                assert grid["coverage"][i, t, 0] == 0
+                continue
+            assert np.isclose(grid["values"][i, t, 0], expected.loc[key, "mean"])
+            coverage = expected.loc[key, "count"] / period.days_in_month
+            assert np.isclose(grid["coverage"][i, t, 0], coverage)
+
+
+def test_store_grid_matches_resample_stations(tmp_path):
+    weather = _weather()
+    build_weather_store(weather, str(tmp_path))
+    from_store = store_grid(open_weather_store(str(tmp_path)), "monthly")
+    direct = resample_stations(weather, "monthly")
+    order = direct["stations"].get_indexer(from_store["stations"])
+    np.testing.assert_allclose(from_store["values"], direct["values"][order], rtol=1e-5)
+    np.testing.assert_allclose(from_store["coverage"], direct["coverage"][order])
+
+
+def test_linear_fill_respects_max_gap():
+    weather = _weather()
+    grid = fill_gaps(resample_stations(weather, "daily"), "linear", max_gap=3)
+    row = list(grid["stations"]).index("A001")
+    february = grid["periods"].month == 2
+    # Lacuna de 28 dias fica aberta; os dias isolados da A002 são preenchidos
+    assert np.isnan(grid["values"][row, february, 0]).all()
+    other = 1 - row
+    assert not np.isnan(grid["values"][other, :, 0]).any()
+    assert grid["filled"][other, :, 0].sum() == 3
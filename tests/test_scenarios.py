@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scenarios import (
+    build_scenario_grid,
+    fit_climate_response,
+    scenario_cube_to_frame,
+    simulate_scenarios,
+)
+
+UFS = ["BA", "GO", "MT"]
+SAFRAS = list(range(2005, 2020))
+
+
+def _data():
+    rng = np.random.default_rng(0)
+    index = pd.MultiIndex.from_product([UFS, SAFRAS], names=["Região/UF", "Safra"])
+    climate = pd.DataFrame(
+        {
+            "temp_avg": rng.normal(25, 2, len(index)),
+            "rain_max": rng.gamma(2.0, 20.0, len(index)),
+        },
+        index=index,
+    )
+    # Área linear no clima, com nível próprio de cada UF
+    level = pd.Series({"BA": 300.0, "GO": 100.0, "MT": 800.0})
+    area = (
+        level.reindex(index.get_level_values(0)).to_numpy()
+        - 12.0 * climate["temp_avg"].to_numpy()
+        + 0.5 * climate["rain_max"].to_numpy()
+    )
+    cotton = pd.DataFrame(
+        {
+            "Região/UF": index.get_level_values(0),
+            "Ano": index.get_level_values(1),
+            "Area_Plantada": area,
+        }
+    )
+    return cotton, climate
+
+
+def test_fixed_effects_recover_coefficients():
+    cotton, climate = _data()
+    response = fit_climate_response(cotton, climate, alpha=1e-9)
+    np.testing.assert_allclose(response["coef"], [-12.0, 0.5], rtol=1e-6)
+    assert response["climate_cube"].shape == (3, len(SAFRAS), 2)
+
+
+def test_batched_scenarios_match_one_by_one():
+    cotton, climate = _data()
+    response = fit_climate_response(cotton, climate)
+    grid = build_scenario_grid(
+        ["MT", "BA", "SP"], temp_deltas=(0.0, 1.5), rain_factors=(0.8, 1.0)
+    )
+    frame = scenario_cube_to_frame(simulate_scenarios(response, grid))
+
+    coef = response["coef"]
+    for _, row in frame.sample(40, random_state=0).iterrows():
+        uf, scenario = row["Região/UF"], grid.loc[grid["Cenario"] == row["Cenario"]]
+        weather = climate.loc[(uf, row["Safra"])].copy()
+        # UFs fora da grade do cenário (aqui, GO) ficam no clima de referência
+        if uf in ("MT", "BA"):
+            weather["temp_avg"] += scenario["temp_delta"].iloc[0]
+            weather["rain_max"] *= scenario["rain_factor"].iloc[0]
+        expected = response["intercepts"][uf] + weather @ coef
+        assert np.isclose(row["Area_Prevista"], expected)
+
+
+def test_no_common_safras_is_an_error():
+    cotton, climate = _data()
+    with pytest.raises(RuntimeError, match="Sem safras em comum"):
+        fit_climate_response(cotton.assign(Ano=cotton["Ano"] + 100), climate)
@@ -0,0 +1,124 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import shared_cache
+from shared_cache import FileCache, NullCache, SQLiteCache, cached_call
+
+from .conftest import SRC_DIR
+
+
+def _slow_square(value, calls):
+    calls.append(value)
+    time.sleep(0.2)
+    return value**2
+
+
+def _run_concurrently(cache, n_threads=6):
+    calls, results = [], []
+
+    def worker():
+        results.append(
+            cached_call("teste", _slow_square, 7, calls, key_parts=[7], cache=cache)
+        )
+
+    threads = [threading.Thread(target=worker) for _ in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return calls, results
+
+
+def test_single_computation_under_lock(tmp_path, monkeypatch):
+    monkeypatch.setattr(shared_cache, "LOCK_POLL", 0.01)
+    for cache in (
+        FileCache(str(tmp_path / "files")),
+        SQLiteCache(str(tmp_path / "c.db")),
+    ):
+        calls, results = _run_concurrently(cache)
+        assert calls == [7]
+        assert results == [49] * 6
+        # O valor fica no cache e a trava é liberada
+        assert (
+            cached_call("teste", _slow_square, 7, [], key_parts=[7], cache=cache) == 49
+        )
+
+
+def test_null_cache_always_computes(monkeypatch):
+    monkeypatch.setattr(shared_cache, "LOCK_POLL", 0.01)
+    calls, results = _run_concurrently(NullCache(), n_threads=3)
+    assert calls == [7, 7, 7] and results == [49] * 3
+
+
+def test_stale_file_lock_is_taken_over(tmp_path):
+    cache = FileCache(str(tmp_path))
+    assert cache.add("trava", b"1", ttl=60)
+    assert not cache.add("trava", b"1", ttl=60)
+
+    # Trava abandonada por uma réplica que caiu: vencida pelo TTL
+    old = time.time() - 120
+    os.utime(cache._path("trava"), (old, old))
+    assert cache.add("trava", b"1", ttl=60)
+
+
+
+def test_foreign_lock_is_kept_after_deadline(tmp_path, monkeypatch):
+    # Sem obter a trava no prazo, calcula mas não libera a trava da outra réplica
+    monkeypatch.setattr(shared_cache, "LOCK_TTL", 0.05)
+    monkeypatch.setattr(shared_cache, "LOCK_POLL", 0.01)
+    cache = SQLiteCache(str(tmp_path / "c.db"))
+    key = shared_cache.call_key("teste", _slow_square, key_parts=[3])
+    assert cache.add(f"{key}:lock", b"1", ttl=60)
+
+    assert cached_call("teste", _slow_square, 3, [], key_parts=[3], cache=cache) == 9
+    assert not cache.add(f"{key}:lock", b"1", ttl=60)
+
+
+def test_file_cache_evicts_least_recently_used(tmp_path):
+    cache = FileCache(str(tmp_path), max_mb=3.5 / 1024)
+    assert cache.add("valor:lock", b"1", ttl=60)
+    for age, name in enumerate(("a", "b", "c")):
+        cache.set(name, b"x" * 1024)
+        old = time.time() - 100 + age
+        os.utime(cache._path(name), (old, old))
+
+    cache.get("a")  # lido por último: fica
+    cache.set("d", b"x" * 1024)
+    assert cache.get("b") is None
+    assert all(cache.get(name) is not None for name in ("a", "c", "d"))
+    assert not cache.add("valor:lock", b"1", ttl=60)
+
+
+KEY_SCRIPT = """
+import sys
+import pipeline
+from shared_cache import NullCache, call_key, cached_call
+
+data_dir = sys.argv[1]
+if sys.argv[2] == "com-historico":
+    cached_call("teste", pipeline.dashboard_key, data_dir, cache=NullCache())
+key = pipeline.dashboard_data_key(data_dir)
+print(call_key("dashboard_data", pipeline._dashboard_data, data_dir, key_parts=[key]))
+"""
+
+
+def _dashboard_call_key(data_dir, history, hash_seed):
+    env = {**os.environ, "PYTHONPATH": SRC_DIR, "PYTHONHASHSEED": hash_seed}
+    result = subprocess.run(
+        [sys.executable, "-c", KEY_SCRIPT, data_dir, history],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    return result.stdout.strip().splitlines()[-1]
+
+
+def test_dashboard_key_is_stable_across_processes(tmp_path):
+    # Réplicas diferentes precisam chegar à mesma chave para reutilizar o valor
+    (tmp_path / "weather_stations_codes.csv").write_text("A001;MT\n")
+    first = _dashboard_call_key(str(tmp_path), "sem-historico", hash_seed="1")
+    assert _dashboard_call_key(str(tmp_path), "com-historico", hash_seed="2") == first
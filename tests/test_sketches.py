@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+from sketches import build_weather_sketches, sketch_quantiles
+
+QUANTILES = (0.1, 0.5, 0.9)
+
+
+def _daily_weather():
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("2000-01-01", "2004-12-31", freq="D")
+    frames = []
+    for station, scale in (("A001", 5.0), ("A002", 9.0)):
+        frames.append(
+            pd.DataFrame(
+                {
+                    "ESTACAO": station,
+                    "DATA": dates,
+                    "Ano": dates.year,
+                    "Mes": dates.month,
+                    "rain_max": rng.gamma(0.8, scale, len(dates)),
+                    "temp_avg": rng.normal(25, 3, len(dates)),
+                }
+            )
+        )
+    return pd.concat(frames, ignore_index=True)
+
+
+def _assert_close(result, data, keys):
+    spread = np.subtract(*np.quantile(data, [0.9, 0.1]))
+    expected = np.quantile(data, QUANTILES)
+    np.testing.assert_allclose(
+        result.loc[keys].to_numpy(), expected, atol=0.03 * spread
+    )
+
+
+def test_sketch_quantiles_match_numpy():
+    weather = _daily_weather()
+    sketches = build_weather_sketches(weather)
+    # Dados diários: cerca de 10 centroides por (estação, mês, variável)
+    assert len(sketches) < 0.5 * weather[["rain_max", "temp_avg"]].count().sum()
+
+    result = sketch_quantiles(sketches, by=("ESTACAO",), quantiles=QUANTILES)
+    for (station, var), data in weather.melt(
+        id_vars=["ESTACAO"], value_vars=["rain_max", "temp_avg"], var_name="Variavel"
+    ).groupby(["ESTACAO", "Variavel"]):
+        _assert_close(result, data["value"], (station, var))
+
+
+def test_merged_sketches_match_pooled_data():
+    weather = _daily_weather()
+    sketches = build_weather_sketches(weather, compression=50)
+    pooled = sketch_quantiles(
+        sketches.assign(Todas="todas"), by=("Todas",), quantiles=QUANTILES
+    )
+    _assert_close(pooled, weather["rain_max"], ("todas", "rain_max"))
+
+    summer = sketch_quantiles(sketches, by=("Estacao",), quantiles=QUANTILES)
+    months = weather["Mes"].isin([12, 1, 2])
+    _assert_close(summer, weather.loc[months, "temp_avg"], ("Verão", "temp_avg"))
@@ -0,0 +1,35 @@
+import os
+import subprocess
+import sys
+
+from startup import LAZY_IMPORT_TIMES, lazy_import
+
+from .conftest import SRC_DIR
+
+# Módulos de análise não carregam bibliotecas de gráficos nem o scikit-learn
+IMPORT_SCRIPT = """
+import sys
+import analysis, data_cleaning, modeling, scenarios
+print(",".join(m for m in ("matplotlib", "sklearn", "streamlit") if m in sys.modules))
+"""
+
+
+def test_analysis_modules_import_without_heavy_libraries():
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": SRC_DIR},
+        check=True,
+    )
+    assert result.stdout.strip() == ""
+
+
+def test_lazy_module_imports_on_first_use():
+    module = lazy_import("json.tool")
+    if "json.tool" in sys.modules:
+        assert module is sys.modules["json.tool"]
+        return
+    assert "json.tool" not in sys.modules
+    assert callable(module.main)
+    assert "json.tool" in sys.modules and "json.tool" in LAZY_IMPORT_TIMES
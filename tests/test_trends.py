@@ -0,0 +1,86 @@
+import itertools
+
+import numpy as np
+from scipy import stats
+
+from trends import _segment_costs, detect_change_points, mann_kendall
+
+
+def _series():
+    rng = np.random.default_rng(0)
+    # Valores arredondados para haver empates; alguns anos ausentes
+    values = np.round(rng.normal(size=(5, 24)).cumsum(axis=1), 1)
+    values[1, [3, 10, 11]] = np.nan
+    values[2] = np.round(np.arange(24) * 0.5 + rng.normal(size=24), 0)
+    return values
+
+
+def test_mann_kendall_matches_scipy():
+    values = _series()
+    result = mann_kendall(values)
+    years = np.arange(values.shape[1], dtype=float)
+
+    for row, series in enumerate(values):
+        valid = ~np.isnan(series)
+        x, y = years[valid], series[valid]
+        n = len(y)
+
+        # S a partir do tau-b do scipy (sem empates nos anos)
+        _, counts = np.unique(y, return_counts=True)
+        n0 = n * (n - 1) / 2
+        n2 = (counts * (counts - 1) / 2).sum()
+        tau = stats.kendalltau(x, y).statistic
+        assert np.isclose(result["S"][row], tau * np.sqrt(n0 * (n0 - n2)))
+
+        # Variância com correção de empates e correção de continuidade
+        variance = (
+            n * (n - 1) * (2 * n + 5) - (counts * (counts - 1) * (2 * counts + 5)).sum()
+        ) / 18
+        s = result["S"][row]
+        z = (s - np.sign(s)) / np.sqrt(variance)
+        assert np.isclose(result["p_valor"][row], 2 * stats.norm.sf(abs(z)))
+
+        assert np.isclose(result["Sen"][row], stats.theilslopes(y, x).slope)
+
+
+def test_mann_kendall_short_series():
+    values = np.array([[1.0, 2.0, np.nan, np.nan]])
+    result = mann_kendall(values)
+    assert result["n"][0] == 2
+    assert np.isnan(result["S"][0]) and np.isnan(result["Sen"][0])
+
+
+def _brute_force_breaks(values, min_size, max_breaks, penalty):
+    """
+    Melhor segmentação por busca exaustiva sobre os custos dos segmentos.
+    """
+    costs = _segment_costs(values[None, :], min_size)[0]
+    n = len(values)
+    best, best_points = np.inf, []
+    for k in range(max_breaks + 1):
+        for points in itertools.combinations(range(1, n), k):
+            bounds = [0, *points, n]
+            total = sum(costs[a, b] for a, b in zip(bounds, bounds[1:]))
+            total += k * penalty
+            if total < best:
+                best, best_points = total, list(points)
+    return best_points
+
+
+def test_change_points_match_exhaustive_search():
+    rng = np.random.default_rng(1)
+    values = np.vstack(
+        [
+            np.r_[np.full(8, 10.0), np.full(10, 25.0)] + rng.normal(0, 1, 18),
+            np.r_[np.full(6, 5.0), np.full(6, 15.0), np.full(6, 0.0)]
+            + rng.normal(0, 1, 18),
+            rng.normal(0, 1, 18),
+        ]
+    )
+    breaks = detect_change_points(values, min_size=4, max_breaks=2)
+    for row, series in enumerate(values):
+        penalty = 3 * np.log(len(series))
+        assert breaks[row] == _brute_force_breaks(series, 4, 2, penalty)
+
+    assert breaks[0] == [8]
+    assert breaks[1] == [6, 12]
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from validation import parse_iso_dates, validate_weather_data
+
+
+def test_parse_iso_dates_checks_calendar():
+    dates = pd.Series(
+        {
+            "2000-02-29": True,  # bissexto (divisível por 400)
+            "1900-02-29": False,  # não bissexto (divisível por 100)
+            "2024-02-29": True,
+            "2023-02-29": False,
+            "2000-02-30": False,
+            "2001-04-31": False,
+            "2001-12-31": True,
+            "2001-00-10": False,
+            "2001-01-00": False,
+            "2001/12/31": False,
+            "2001-12-311": False,
+            "2001-1-01": False,
+        }
+    )
+    year, month, day, valid = parse_iso_dates(pd.Series(dates.index))
+    np.testing.assert_array_equal(valid, dates.to_numpy())
+
+    expected = pd.to_datetime(dates.index[dates.to_numpy()], format="%Y-%m-%d")
+    np.testing.assert_array_equal(year[valid], expected.year)
+    np.testing.assert_array_equal(month[valid], expected.month)
+    np.testing.assert_array_equal(day[valid], expected.day)
+
+
+def test_parse_iso_dates_rejects_non_ascii():
+    dates = pd.Series(["2001-12-31", "2001-12-3１", "２001-01-01", "data é"])
+    _, _, _, valid = parse_iso_dates(dates)
+    np.testing.assert_array_equal(valid, [True, False, False, False])
+
+
+def test_invalid_dates_are_dropped_and_reported():
+    data = pd.DataFrame(
+        {
+            "ESTACAO": ["A001"] * 3,
+            "DATA (YYYY-MM-DD)": ["2000-02-28", "2000-02-30", "2000-03-01"],
+            "temp_max": [30.0, 31.0, 32.0],
+        }
+    )
+    cleaned, report = validate_weather_data(data)
+    assert cleaned["DATA (YYYY-MM-DD)"].tolist() == ["2000-02-28", "2000-03-01"]
+
+    row = report.set_index("Regra").loc["date"]
+    assert row["Violacoes"] == 1 and row["Exemplos"] == ["2000-02-30"]
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+from weather_store import (
+    build_weather_store,
+    ensure_weather_store,
+    open_weather_store,
+    store_reduce,
+    store_slice,
+)
+
+
+def _weather(offset=0.0):
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("2001-01-01", "2001-03-31", freq="D")
+    frames = [
+        pd.DataFrame(
+            {
+                "ESTACAO": station,
+                "DATA (YYYY-MM-DD)": dates.strftime("%Y-%m-%d"),
+                "temp_avg": rng.normal(25, 3, len(dates)) + offset,
+            }
+        )
+        for station in ("A003", "A001", "A002")
+    ]
+    weather = pd.concat(frames, ignore_index=True)
+    # Registros ausentes viram NaN na matriz
+    return weather.drop(index=[5, 6, 100]).reset_index(drop=True)
+
+
+def test_reductions_match_pandas(tmp_path):
+    weather = _weather()
+    index = build_weather_store(weather, str(tmp_path))
+    store = open_weather_store(str(tmp_path))
+    assert index["stations"] == ["A001", "A002", "A003"]
+
+    means = store_reduce(store, "temp_avg", "mean")
+    expected = weather.groupby("ESTACAO")["temp_avg"].mean()
+    np.testing.assert_allclose(means.to_numpy(), expected.to_numpy(), rtol=1e-6)
+
+    counts = store_reduce(store, "temp_avg", "count", over="stations")
+    expected = weather.groupby("DATA (YYYY-MM-DD)").size()
+    np.testing.assert_array_equal(counts.to_numpy(), expected.to_numpy())
+
+    values, stations, periods = store_slice(
+        store, "temp_avg", ["A001", "A002"], "2001-02-01", "2001-02-28"
+    )
+    assert values.shape == (2, 28) and list(stations) == ["A001", "A002"]
+    assert periods[0] == pd.Timestamp("2001-02-01")
+
+
+def test_store_is_rebuilt_when_overwritten(tmp_path):
+    weather = _weather()
+    index = build_weather_store(weather, str(tmp_path))
+
+    # Outra execução regrava o mesmo diretório com outros dados
+    build_weather_store(_weather(offset=10.0), str(tmp_path))
+    store = ensure_weather_store(weather, index)
+    means = store_reduce(store, "temp_avg", "mean")
+    expected = weather.groupby("ESTACAO")["temp_avg"].mean()
+    np.testing.assert_allclose(means.to_numpy(), expected.to_numpy(), rtol=1e-6)